@@ -1,10 +1,10 @@
 __all__ = [
-    "geometry", "physics", "physics2d", "vector", "quaternion",
-    "Material", "Mesh", "Model", "Polygon", "Vertex",
+    "geometry", "matrix", "physics", "physics2d", "vector", "quaternion",
+    "Material", "Mesh", "MeshBuffer", "Model", "Polygon", "Vertex",
     "AABB", "Brush", "Plane",
     "AABB2D", "Circle",
-    "Vec2", "Vec3",
-    "Quaternion",
+    "Vec2", "Vec3", "Vec2Array", "Vec3Array",
+    "Matrix4", "Quaternion",
     "scene",
     "ModelList", "SceneDescription",
     "Gltf", "NavMesh", "Obj", "Usd"]
@@ -13,6 +13,7 @@ __all__ = [
 from . import geometry
 # NOTE: might break material out into it's own module
 # -- will see once we're interacting w/ bite
+from . import matrix
 from . import physics
 from . import physics2d
 from . import scene  # file formats
@@ -23,6 +24,7 @@ from . import quaternion
 from .geometry import (
     Material,
     Mesh,
+    MeshBuffer,
     Model,
     Polygon,
     Vertex)
@@ -34,6 +36,8 @@ from .physics2d import AABB as AABB2D  # TODO: rename
 from .physics2d import Circle
 from .vector import vec2 as Vec2  # TODO: rename
 from .vector import vec3 as Vec3  # TODO: rename
+from .vector import Vec2Array, Vec3Array
+from .matrix import Matrix4
 from .quaternion import Quaternion
 
 # SceneDescriptions
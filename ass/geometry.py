@@ -1,8 +1,10 @@
 from __future__ import annotations
+import array
 import collections
 import itertools
-from typing import Any, List, Tuple
+from typing import Any, Dict, Iterable, List, Tuple, Union
 
+from . import matrix
 from . import vector
 
 
@@ -133,9 +135,12 @@ class Material:
     # -- might want to include arbitrary metadata like cubemap indices
     # NOTE: ApexLegends links cubemap indices to meshes, not MaterialSorts
     name: str
+    metadata: Dict[str, Any]
+    # ^ {"map_Kd": "albedo.png"}; not hashed
 
     def __init__(self, name=""):
         self.name = name.lower().replace("\\", "/")
+        self.metadata = dict()
         # TODO: shorten name
         # TODO: path
         # TODO: asset type (rpak.matl.wld, .vmt, .wad, .shader etc.)
@@ -168,12 +173,138 @@ class Mesh:
         return iter(self.polygons)
 
 
+class PolygonView:
+    """lazy list of Polygons; builds Polygon & Vertex objects on demand"""
+    mesh: MeshBuffer
+
+    def __init__(self, mesh: MeshBuffer):
+        self.mesh = mesh
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {len(self)} polygons>"
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Polygon, List[Polygon]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("polygon index out of range")
+        mesh = self.mesh
+        start, end = mesh.face_offsets[index], mesh.face_offsets[index + 1]
+        return Polygon([mesh.vertex(i) for i in mesh.indices[start:end]])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __len__(self) -> int:
+        return len(self.mesh.face_offsets) - 1
+
+
+class MeshBuffer:
+    """Mesh w/ vertex attributes packed into contiguous arrays"""
+    material: Material
+    # vertex attributes
+    positions: vector.Vec3Array
+    normals: vector.Vec3Array
+    uvs: List[vector.Vec2Array]  # 1 per uv layer
+    colours: array.array  # flat rgba
+    # polygons
+    indices: array.array  # vertex index for each polygon corner
+    face_offsets: array.array  # first corner of each polygon, then len(indices)
+    polygons: PolygonView  # read-only
+
+    def __init__(self, material=Material("default")):
+        self.material = material
+        self.positions = vector.Vec3Array()
+        self.normals = vector.Vec3Array()
+        self.uvs = list()
+        self.colours = array.array("d")
+        self.indices = array.array("I")
+        self.face_offsets = array.array("I", [0])
+
+    def __repr__(self) -> str:
+        material = self.material
+        return f"<{self.__class__.__name__} {len(self.polygons)} polygons, {material=!r}>"
+
+    def __iter__(self):
+        return iter(self.polygons)
+
+    @property
+    def num_vertices(self) -> int:
+        return len(self.positions)
+
+    @property
+    def polygons(self) -> PolygonView:
+        return PolygonView(self)
+
+    def vertex(self, index: int) -> Vertex:
+        return Vertex(
+            self.positions.data[index * 3:index * 3 + 3],
+            self.normals.data[index * 3:index * 3 + 3],
+            *[uv.data[index * 2:index * 2 + 2] for uv in self.uvs],
+            colour=self.colours[index * 4:index * 4 + 4])
+
+    def extend(self, other: MeshBuffer):
+        """append all of other's polygons"""
+        assert len(self.uvs) == len(other.uvs), "uv layer count must match"
+        offset = self.num_vertices
+        self.positions.extend(other.positions)
+        self.normals.extend(other.normals)
+        for uv, other_uv in zip(self.uvs, other.uvs):
+            uv.extend(other_uv)
+        self.colours.extend(other.colours)
+        corner_offset = len(self.indices)
+        self.indices.extend(map(offset.__add__, other.indices))
+        self.face_offsets.extend(map(corner_offset.__add__, other.face_offsets[1:]))
+
+    @classmethod
+    def from_mesh(cls, mesh: Mesh) -> MeshBuffer:
+        """pack a Mesh; identical vertices are shared"""
+        out = cls(mesh.material)
+        polygons = mesh.polygons
+        num_uvs = max([len(v.uv) for p in polygons for v in p.vertices], default=0)
+        no_uv = ((0, 0),)
+        vertex_indices = dict()
+        # ^ {(position, normal, *uvs, colour): index}
+        positions, normals, colours = list(), list(), list()
+        uvs = [list() for i in range(num_uvs)]
+        for polygon in polygons:
+            for vertex in polygon.vertices:
+                position = (vertex.position.x, vertex.position.y, vertex.position.z)
+                normal = (vertex.normal.x, vertex.normal.y, vertex.normal.z)
+                vertex_uvs = (*[(uv.x, uv.y) for uv in vertex.uv], *no_uv * (num_uvs - len(vertex.uv)))
+                key = (position, normal, vertex_uvs, vertex.colour)
+                index = vertex_indices.get(key)
+                if index is None:
+                    index = len(vertex_indices)
+                    vertex_indices[key] = index
+                    positions.append(position)
+                    normals.append(normal)
+                    for layer, uv in zip(uvs, vertex_uvs):
+                        layer.append(uv)
+                    colours.append(vertex.colour)
+                out.indices.append(index)
+            out.face_offsets.append(len(out.indices))
+        out.positions = vector.Vec3Array(positions)
+        out.normals = vector.Vec3Array(normals)
+        out.uvs = [vector.Vec2Array(layer) for layer in uvs]
+        out.colours = array.array("d", itertools.chain.from_iterable(colours))
+        return out
+
+    def as_mesh(self) -> Mesh:
+        return Mesh(self.material, list(self.polygons))
+
+
 class Model:
     meshes: List[Mesh]
     origin: vector.vec3
     angles: vector.vec3  # degrees for each axis
     # TODO: angles from QAngle / Quaternion
     scale: vector.vec3
+    world_matrix: matrix.Matrix4  # cached property
+    _transforms: Tuple[tuple, matrix.Matrix4, matrix.Matrix4]
+    # ^ (key, world_matrix, rotation_matrix)
 
     def __init__(self, meshes=list(), origin=vector.vec3(), angles=vector.vec3(), scale=1):
         self.meshes = self.merge_meshes(meshes)
@@ -183,6 +314,7 @@ class Model:
         if isinstance(scale, (float, int)):
             scale = vector.vec3(scale, scale, scale)
         self.scale = scale
+        self._transforms = (None, None, None)
 
     def __repr__(self) -> str:
         origin = self.origin
@@ -194,39 +326,80 @@ class Model:
         return iter(self.meshes)
 
     @staticmethod
-    def merge_meshes(meshes: List[Mesh]) -> List[Mesh]:
+    def merge_meshes(meshes: List[Union[Mesh, MeshBuffer]]) -> List[Union[Mesh, MeshBuffer]]:
         sort = collections.defaultdict(list)
+        # ^ {Material: [Mesh]}
         for mesh in meshes:
-            sort[mesh.material].extend(mesh.polygons)
-        return [Mesh(material, polygons) for material, polygons in sort.items()]
+            sort[mesh.material].append(mesh)
+        out = list()
+        for material, meshes in sort.items():
+            # NOTE: MeshBuffers stay packed if they can
+            if all(isinstance(mesh, MeshBuffer) for mesh in meshes) and len({len(m.uvs) for m in meshes}) == 1:
+                if len(meshes) == 1:
+                    out.append(meshes[0])
+                    continue
+                merged = MeshBuffer(material)
+                merged.uvs = [vector.Vec2Array() for uv in meshes[0].uvs]
+                for mesh in meshes:
+                    merged.extend(mesh)
+                out.append(merged)
+            else:
+                out.append(Mesh(material, [
+                    polygon
+                    for mesh in meshes
+                    for polygon in mesh.polygons]))
+        return out
+
+    def _update_transforms(self):
+        """rebuild matrices if origin, angles or scale have changed"""
+        # NOTE: vectors can be edited in-place, so we compare values
+        key = (*self.origin, *self.angles, *self.scale)
+        if key == self._transforms[0]:
+            return
+        rotation = matrix.Matrix4.from_euler(self.angles)
+        scale = matrix.Matrix4.from_scale(self.scale)
+        translation = matrix.Matrix4.from_translation(self.origin)
+        self._transforms = (key, translation * rotation * scale, rotation)
 
-    def apply_transforms(self, vertex: Vertex) -> Vertex:
-        # scale
-        vertex.position.x *= self.scale.x
-        vertex.position.y *= self.scale.y
-        vertex.position.z *= self.scale.z
-        # rotate
-        vertex.position = vertex.position.rotated(*self.angles)
-        vertex.normal = vertex.normal.rotated(*self.angles)
-        # translate
-        vertex.position += self.origin
-        return vertex
+    @property
+    def world_matrix(self) -> matrix.Matrix4:
+        """scale, then rotate, then translate"""
+        self._update_transforms()
+        return self._transforms[1]
 
     @property
-    def transform_matrix(self) -> List[List[float]]:
+    def transform_matrix(self) -> matrix.Matrix4:
         """for .gtlf/.glb & .usd/.usda"""
-        # TODO: apply scale & rotation
-        translation = [
-            (1, 0, 0, self.origin.x),
-            (0, 1, 0, self.origin.y),
-            (0, 0, 1, self.origin.z),
-            (0, 0, 0, 1)]
-        # scale = [
-        #     (self.scale.x, 0, 0, 0),
-        #     (0, self.scale.y, 0, 0),
-        #     (0, 0, self.scale.z, 0),
-        #     (0, 0, 0, 1)]
-        return translation
+        return self.world_matrix
+
+    def apply_transforms(self, vertex: Vertex) -> Vertex:
+        """transforms vertex in-place"""
+        transformed = self.transform_vertices([vertex])[0]
+        vertex.position = transformed.position
+        vertex.normal = transformed.normal
+        return vertex
+
+    def transform_vertices(self, vertices: Iterable[Vertex]) -> List[Vertex]:
+        """returns transformed copies of vertices"""
+        self._update_transforms()
+        key, world_matrix, rotation = self._transforms
+        m00, m01, m02, m03, m10, m11, m12, m13, m20, m21, m22, m23 = world_matrix[:12]
+        r00, r01, r02, r10, r11, r12, r20, r21, r22 = rotation.rotation_scale
+        out = list()
+        for vertex in vertices:
+            px, py, pz = vertex.position.x, vertex.position.y, vertex.position.z
+            nx, ny, nz = vertex.normal.x, vertex.normal.y, vertex.normal.z
+            # NOTE: rounded like vec3.rotated to avoid tiny float errors in exports
+            out.append(Vertex(
+                (round(m00 * px + m01 * py + m02 * pz + m03, 6),
+                 round(m10 * px + m11 * py + m12 * pz + m13, 6),
+                 round(m20 * px + m21 * py + m22 * pz + m23, 6)),
+                (round(r00 * nx + r01 * ny + r02 * nz, 6),
+                 round(r10 * nx + r11 * ny + r12 * nz, 6),
+                 round(r20 * nx + r21 * ny + r22 * nz, 6)),
+                *vertex.uv,
+                colour=vertex.colour))
+        return out
 
 
 def generate_cube(mins: vector.vec3, maxs: vector.vec3) -> Model:
@@ -0,0 +1,221 @@
+"""4x4 transform matrices"""
+from __future__ import annotations
+import math
+from typing import Iterable, List, Tuple, Union
+
+from . import quaternion
+from . import vector
+
+
+# NOTE: row-major, column vectors (M * v); translation in the last column
+# -- .gltf wants column-major, use .transposed()
+class Matrix4(tuple):
+    """flat tuple of 16 floats"""
+
+    def __new__(cls, values: Iterable[float] = None):
+        if values is None:
+            values = (
+                1, 0, 0, 0,
+                0, 1, 0, 0,
+                0, 0, 1, 0,
+                0, 0, 0, 1)
+        values = tuple(map(float, values))
+        if len(values) != 16:
+            raise ValueError(f"{cls.__name__} must have 16 values, not {len(values)}")
+        return super().__new__(cls, values)
+
+    def __repr__(self) -> str:
+        rows = ", ".join(repr(row) for row in self.rows)
+        return f"{self.__class__.__name__}({rows})"
+
+    def __mul__(self, other: Union[Matrix4, vector.vec3]) -> Union[Matrix4, vector.vec3]:
+        if isinstance(other, Matrix4):
+            return Matrix4(
+                math.fsum(self[r * 4 + i] * other[i * 4 + c] for i in range(4))
+                for r in range(4)
+                for c in range(4))
+        elif isinstance(other, vector.vec3):
+            return self.transform_point(other)
+        raise TypeError(f"cannot multiply '{type(self).__name__}' by '{type(other).__name__}'")
+
+    __matmul__ = __mul__
+
+    def is_close(self, other: Matrix4, **isclose_kwargs) -> bool:
+        return all(
+            math.isclose(s, o, **isclose_kwargs)
+            for s, o in zip(self, other))
+
+    @property
+    def columns(self) -> List[Tuple[float, float, float, float]]:
+        return [self[c::4] for c in range(4)]
+
+    @property
+    def rows(self) -> List[Tuple[float, float, float, float]]:
+        return [self[r * 4:(r + 1) * 4] for r in range(4)]
+
+    @property
+    def rotation_scale(self) -> Tuple[float, ...]:
+        """upper 3x3 (row-major)"""
+        return (*self[0:3], *self[4:7], *self[8:11])
+
+    @property
+    def translation(self) -> vector.vec3:
+        return vector.vec3(self[3], self[7], self[11])
+
+    def inverse(self) -> Matrix4:
+        """Gauss-Jordan elimination w/ partial pivoting"""
+        rows = [[*row, *(float(r == c) for c in range(4))] for r, row in enumerate(self.rows)]
+        for col in range(4):
+            pivot = max(range(col, 4), key=lambda r: abs(rows[r][col]))
+            if math.isclose(rows[pivot][col], 0, abs_tol=1e-12):
+                raise ValueError("matrix is not invertible")
+            rows[col], rows[pivot] = rows[pivot], rows[col]
+            scale = rows[col][col]
+            rows[col] = [v / scale for v in rows[col]]
+            for r in range(4):
+                if r != col and rows[r][col] != 0:
+                    factor = rows[r][col]
+                    rows[r] = [v - factor * p for v, p in zip(rows[r], rows[col])]
+        return Matrix4(v for row in rows for v in row[4:])
+
+    def transform_direction(self, direction: vector.vec3) -> vector.vec3:
+        """rotate & scale, but don't translate"""
+        x, y, z = direction
+        return vector.vec3(
+            self[0] * x + self[1] * y + self[2] * z,
+            self[4] * x + self[5] * y + self[6] * z,
+            self[8] * x + self[9] * y + self[10] * z)
+
+    def transform_point(self, point: vector.vec3) -> vector.vec3:
+        x, y, z = point
+        return vector.vec3(
+            self[0] * x + self[1] * y + self[2] * z + self[3],
+            self[4] * x + self[5] * y + self[6] * z + self[7],
+            self[8] * x + self[9] * y + self[10] * z + self[11])
+
+    def transposed(self) -> Matrix4:
+        return Matrix4(v for column in self.columns for v in column)
+
+    # COMPOSITION
+
+    @classmethod
+    def compose(cls, translation: vector.vec3 = (0, 0, 0), rotation: quaternion.Quaternion = None,
+                scale: vector.vec3 = (1, 1, 1)) -> Matrix4:
+        """scale, then rotate, then translate"""
+        if rotation is None:
+            out = cls()
+        else:
+            out = cls.from_quaternion(rotation)
+        sx, sy, sz = scale
+        tx, ty, tz = translation
+        return cls((
+            out[0] * sx, out[1] * sy, out[2] * sz, tx,
+            out[4] * sx, out[5] * sy, out[6] * sz, ty,
+            out[8] * sx, out[9] * sy, out[10] * sz, tz,
+            0, 0, 0, 1))
+
+    def decompose(self) -> Tuple[vector.vec3, quaternion.Quaternion, vector.vec3]:
+        """-> (translation, rotation, scale)"""
+        # NOTE: assumes no shear or projection
+        columns = self.columns[:3]
+        scale = vector.vec3(*[math.sqrt(sum(v * v for v in column[:3])) for column in columns])
+        if self.determinant() < 0:  # mirrored
+            scale.x = -scale.x
+        rotation = self.rotation_only()
+        return self.translation, rotation.to_quaternion(), scale
+
+    def determinant(self) -> float:
+        """of upper 3x3"""
+        a, b, c, d, e, f, g, h, i = self.rotation_scale
+        return a * (e * i - f * h) - b * (d * i - f * g) + c * (d * h - e * g)
+
+    def rotation_only(self) -> Matrix4:
+        """strip translation & scale"""
+        columns = [list(column[:3]) for column in self.columns[:3]]
+        lengths = [math.sqrt(sum(v * v for v in column)) for column in columns]
+        if self.determinant() < 0:
+            lengths[0] = -lengths[0]
+        columns = [
+            [v / length if length != 0 else 0 for v in column]
+            for column, length in zip(columns, lengths)]
+        return Matrix4((
+            columns[0][0], columns[1][0], columns[2][0], 0,
+            columns[0][1], columns[1][1], columns[2][1], 0,
+            columns[0][2], columns[1][2], columns[2][2], 0,
+            0, 0, 0, 1))
+
+    # CONVERSIONS
+
+    @classmethod
+    def from_euler(cls, angles: vector.vec3) -> Matrix4:
+        """degrees; rotates around X, then Y, then Z (like vec3.rotated)"""
+        cos_x, sin_x, cos_y, sin_y, cos_z, sin_z = [
+            f(math.radians(a))
+            for a in angles
+            for f in (math.cos, math.sin)]
+        return cls((
+            cos_z * cos_y, cos_z * sin_y * sin_x - sin_z * cos_x, cos_z * sin_y * cos_x + sin_z * sin_x, 0,
+            sin_z * cos_y, sin_z * sin_y * sin_x + cos_z * cos_x, sin_z * sin_y * cos_x - cos_z * sin_x, 0,
+            -sin_y, cos_y * sin_x, cos_y * cos_x, 0,
+            0, 0, 0, 1))
+
+    @classmethod
+    def from_quaternion(cls, rotation: quaternion.Quaternion) -> Matrix4:
+        x, y, z, w = rotation
+        length = x * x + y * y + z * z + w * w
+        s = 2 / length if length != 0 else 0
+        return cls((
+            1 - s * (y * y + z * z), s * (x * y - z * w), s * (x * z + y * w), 0,
+            s * (x * y + z * w), 1 - s * (x * x + z * z), s * (y * z - x * w), 0,
+            s * (x * z - y * w), s * (y * z + x * w), 1 - s * (x * x + y * y), 0,
+            0, 0, 0, 1))
+
+    @classmethod
+    def from_scale(cls, scale: vector.vec3) -> Matrix4:
+        return cls.compose(scale=scale)
+
+    @classmethod
+    def from_translation(cls, translation: vector.vec3) -> Matrix4:
+        return cls.compose(translation=translation)
+
+    def to_euler(self) -> vector.vec3:
+        """degrees; inverse of .from_euler"""
+        m = self.rotation_only()
+        sin_y = max(-1.0, min(1.0, -m[8]))
+        y = math.asin(sin_y)
+        if not math.isclose(abs(sin_y), 1, abs_tol=1e-9):
+            x = math.atan2(m[9], m[10])
+            z = math.atan2(m[4], m[0])
+        else:  # gimbal lock; put all X/Z rotation on X
+            x = math.atan2(-m[6], m[5])
+            z = 0
+        return vector.vec3(*map(math.degrees, (x, y, z)))
+
+    def to_quaternion(self) -> quaternion.Quaternion:
+        m = self.rotation_only()
+        trace = m[0] + m[5] + m[10]
+        if trace > 0:
+            s = 0.5 / math.sqrt(trace + 1)
+            w = 0.25 / s
+            x = (m[9] - m[6]) * s
+            y = (m[2] - m[8]) * s
+            z = (m[4] - m[1]) * s
+        elif m[0] > m[5] and m[0] > m[10]:
+            s = 2 * math.sqrt(1 + m[0] - m[5] - m[10])
+            w = (m[9] - m[6]) / s
+            x = 0.25 * s
+            y = (m[1] + m[4]) / s
+            z = (m[2] + m[8]) / s
+        elif m[5] > m[10]:
+            s = 2 * math.sqrt(1 + m[5] - m[0] - m[10])
+            w = (m[2] - m[8]) / s
+            x = (m[1] + m[4]) / s
+            y = 0.25 * s
+            z = (m[6] + m[9]) / s
+        else:
+            s = 2 * math.sqrt(1 + m[10] - m[0] - m[5])
+            w = (m[4] - m[1]) / s
+            x = (m[2] + m[8]) / s
+            y = (m[6] + m[9]) / s
+            z = 0.25 * s
+        return quaternion.Quaternion(x, y, z, w)
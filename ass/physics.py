@@ -1,7 +1,11 @@
 from __future__ import annotations
+import array
+import bisect
 from collections.abc import Iterable
+import enum
+import heapq
 import math
-from typing import Dict, List, Union
+from typing import Dict, List, Sequence, Set, Tuple, Union
 
 from . import geometry
 from . import vector
@@ -121,7 +125,13 @@ class AABB:
 
     @classmethod
     def from_points(cls, points: List[vector.vec3]) -> AABB:
-        return sum({vector.vec3(*p) for p in points}, start=cls())
+        points = [
+            p if isinstance(p, vector.vec3) else vector.vec3(*p)
+            for p in points]
+        if len(points) == 0:
+            return cls()
+        xs, ys, zs = zip(*points)
+        return cls.from_mins_maxs((min(xs), min(ys), min(zs)), (max(xs), max(ys), max(zs)))
 
     # SETTERS
 
@@ -298,3 +308,562 @@ class Brush:
         """Titanfall 2 trigger entity to physics"""
         # *trigger_brush_[0-9]+_plane_[0-9]+
         raise NotImplementedError()
+
+
+class Split(enum.Enum):
+    """BVH build strategy"""
+    MEDIAN = 0  # halve at the median centroid on the longest axis
+    SAH = 1  # binned Surface Area Heuristic; fewer overlapping nodes, slower build
+
+
+def surface_area(mins: Sequence[float], maxs: Sequence[float]) -> float:
+    x, y, z = (M - m for m, M in zip(mins, maxs))
+    return 2 * (x * y + y * z + z * x)
+
+
+def ray_aabb(origin: Sequence[float], direction: Sequence[float], mins: Sequence[float],
+             maxs: Sequence[float], max_distance: float = math.inf) -> Union[float, None]:
+    """distance along direction to the first hit (0 if origin is inside); None on a miss"""
+    near, far = 0, max_distance
+    for o, d, m, M in zip(origin, direction, mins, maxs):
+        if d == 0:  # parallel
+            if not m <= o <= M:
+                return None
+            continue
+        t0, t1 = (m - o) / d, (M - o) / d
+        if t0 > t1:
+            t0, t1 = t1, t0
+        near, far = max(near, t0), min(far, t1)
+        if near > far:
+            return None
+    return near
+
+
+def ray_brush(origin: vector.vec3, direction: vector.vec3, brush: Brush,
+              max_distance: float = math.inf) -> Union[float, None]:
+    """distance along direction to the first hit (0 if origin is inside); None on a miss"""
+    near, far = 0, max_distance
+    for plane in brush.planes:
+        distance = plane.test(origin)  # +ve in front (outside)
+        speed = vector.dot(plane.normal, direction)
+        if speed == 0:  # parallel
+            if distance > 0:
+                return None
+            continue
+        t = -distance / speed
+        if speed < 0:  # entering
+            near = max(near, t)
+        else:  # exiting
+            far = min(far, t)
+        if near > far:
+            return None
+    return near
+
+
+class BVH:
+    """Bounding Volume Hierarchy over AABBs & Brushes"""
+    # NOTE: nodes are stored in flat arrays, like recast.BoundsNode
+    # -- 1 object per leaf; .build() stores nodes depth-first (left child = node + 1)
+    # NOTE: Brushes are tested against their bounds, then planes (points & rays only)
+    objects: List[Union[AABB, Brush, None]]
+    # ^ None once removed
+    mins: array.array  # 3 doubles per node
+    maxs: array.array  # 3 doubles per node
+    children: array.array  # 2 nodes per node; -1 for leaves
+    parents: array.array  # -1 for the root & free nodes
+    leaf_objects: array.array  # index into .objects per node; -1 for branches
+    root: int  # -1 when empty
+    sah_bins: int = 16
+
+    def __init__(self, objects: Iterable[Union[AABB, Brush]] = tuple(), split: Split = Split.SAH):
+        self.build(objects, split)
+
+    def __iter__(self):
+        return (object_ for object_ in self.objects if object_ is not None)
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {len(self)} objects, {len(self.parents) - len(self._free)} nodes>"
+
+    @staticmethod
+    def bounds_of(object_: Union[AABB, Brush]) -> AABB:
+        return object_.bounds if isinstance(object_, Brush) else object_
+
+    # NODES
+
+    def allocate(self) -> int:
+        """-> index of an unused node"""
+        if len(self._free) > 0:
+            return self._free.pop()
+        self.mins.extend((0, 0, 0))
+        self.maxs.extend((0, 0, 0))
+        self.children.extend((-1, -1))
+        self.parents.append(-1)
+        self.leaf_objects.append(-1)
+        return len(self.parents) - 1
+
+    def release(self, node: int):
+        self.children[node * 2:node * 2 + 2] = array.array("i", (-1, -1))
+        self.parents[node] = -1
+        self.leaf_objects[node] = -1
+        self._free.append(node)
+
+    def node_bounds(self, node: int) -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+        """-> (mins, maxs)"""
+        return tuple(self.mins[node * 3:node * 3 + 3]), tuple(self.maxs[node * 3:node * 3 + 3])
+
+    def refit(self, node: int):
+        """recalculate the bounds of node & every node above it"""
+        mins, maxs, children = self.mins, self.maxs, self.children
+        while node != -1:
+            a, b = children[node * 2] * 3, children[node * 2 + 1] * 3
+            mins[node * 3:node * 3 + 3] = array.array("d", map(min, mins[a:a + 3], mins[b:b + 3]))
+            maxs[node * 3:node * 3 + 3] = array.array("d", map(max, maxs[a:a + 3], maxs[b:b + 3]))
+            node = self.parents[node]
+
+    def depth(self) -> int:
+        """levels below the root"""
+        out = 0
+        stack = [(self.root, 0)] if self.root != -1 else list()
+        while len(stack) > 0:
+            node, level = stack.pop()
+            out = max(out, level)
+            if self.leaf_objects[node] == -1:
+                stack.extend((child, level + 1) for child in self.children[node * 2:node * 2 + 2])
+        return out
+
+    # BUILDING
+
+    def build(self, objects: Iterable[Union[AABB, Brush]], split: Split = Split.SAH):
+        """replace all nodes w/ a top-down build"""
+        self.objects = list(objects)
+        self._indices = {id(object_): i for i, object_ in enumerate(self.objects)}
+        # ^ {id(object): index}
+        if len(self._indices) != len(self.objects):
+            raise ValueError(f"{self.__class__.__name__} objects must be unique (1 leaf per object)")
+        self._free = list()
+        count = len(self.objects)
+        boxes = [self.bounds_of(object_) for object_ in self.objects]
+        centroids = [tuple((m + M) / 2 for m, M in zip(box.mins, box.maxs)) for box in boxes]
+        self.mins = array.array("d")
+        self.maxs = array.array("d")
+        self.children = array.array("i")
+        self.parents = array.array("i")
+        self.leaf_objects = array.array("i")
+        self.leaf_nodes = array.array("i", [-1] * count)
+        # ^ node per object; -1 once removed
+        self.root = -1 if count == 0 else 0
+        stack = [(list(range(count)), -1, 0)] if count > 0 else list()
+        # ^ [(object indices, parent, side)]; popped depth-first
+        while len(stack) > 0:
+            indices, parent, side = stack.pop()
+            node = self.allocate()
+            self.parents[node] = parent
+            if parent != -1:
+                self.children[parent * 2 + side] = node
+            if len(indices) == 1:
+                index = indices[0]
+                self.leaf_objects[node] = index
+                self.leaf_nodes[index] = node
+                self.mins[node * 3:node * 3 + 3] = array.array("d", boxes[index].mins)
+                self.maxs[node * 3:node * 3 + 3] = array.array("d", boxes[index].maxs)
+                continue
+            left, right = self.partition(indices, centroids, boxes, split)
+            stack.append((right, node, 1))
+            stack.append((left, node, 0))
+        # children come after their parents; fit bounds bottom-up
+        mins, maxs, children = self.mins, self.maxs, self.children
+        for node in reversed(range(len(self.parents))):
+            if self.leaf_objects[node] == -1:
+                a, b = children[node * 2] * 3, children[node * 2 + 1] * 3
+                mins[node * 3:node * 3 + 3] = array.array("d", map(min, mins[a:a + 3], mins[b:b + 3]))
+                maxs[node * 3:node * 3 + 3] = array.array("d", map(max, maxs[a:a + 3], maxs[b:b + 3]))
+
+    def partition(self, indices: List[int], centroids: List[Tuple[float, float, float]],
+                  boxes: List[AABB], split: Split) -> Tuple[List[int], List[int]]:
+        """split object indices in 2 (neither empty)"""
+        lows = [min(centroids[i][axis] for i in indices) for axis in range(3)]
+        highs = [max(centroids[i][axis] for i in indices) for axis in range(3)]
+        axis = max(range(3), key=lambda a: highs[a] - lows[a])
+        low, high = lows[axis], highs[axis]
+        if high == low:  # all centroids in the same place
+            middle = len(indices) // 2
+            return indices[:middle], indices[middle:]
+        if split == Split.SAH:
+            bins = self.sah_bins
+            scale = bins / (high - low)
+            bin_indices = [min(bins - 1, int((centroids[i][axis] - low) * scale)) for i in indices]
+            counts = [0] * bins
+            bin_mins = [[math.inf] * 3 for b in range(bins)]
+            bin_maxs = [[-math.inf] * 3 for b in range(bins)]
+            for i, b in zip(indices, bin_indices):
+                counts[b] += 1
+                bin_mins[b] = list(map(min, bin_mins[b], boxes[i].mins))
+                bin_maxs[b] = list(map(max, bin_maxs[b], boxes[i].maxs))
+            # cost of splitting after each bin
+            costs = [0.0] * (bins - 1)
+            mins, maxs, count = [math.inf] * 3, [-math.inf] * 3, 0
+            for b in range(bins - 1):  # left to right
+                mins, maxs = list(map(min, mins, bin_mins[b])), list(map(max, maxs, bin_maxs[b]))
+                count += counts[b]
+                costs[b] = count * surface_area(mins, maxs) if count > 0 else 0
+            mins, maxs, count = [math.inf] * 3, [-math.inf] * 3, 0
+            for b in reversed(range(1, bins)):  # right to left
+                mins, maxs = list(map(min, mins, bin_mins[b])), list(map(max, maxs, bin_maxs[b]))
+                count += counts[b]
+                costs[b - 1] += count * surface_area(mins, maxs) if count > 0 else 0
+            best = min(range(bins - 1), key=costs.__getitem__)
+            left = [i for i, b in zip(indices, bin_indices) if b <= best]
+            right = [i for i, b in zip(indices, bin_indices) if b > best]
+            if len(left) > 0 and len(right) > 0:
+                return left, right
+        # median
+        indices = sorted(indices, key=lambda i: centroids[i][axis])
+        middle = len(indices) // 2
+        return indices[:middle], indices[middle:]
+
+    def insert(self, object_: Union[AABB, Brush]):
+        """add a leaf next to the sibling that grows the tree's surface area the least"""
+        if id(object_) in self._indices:
+            raise ValueError(f"{object_!r} is already in this {self.__class__.__name__}")
+        index = len(self.objects)
+        self.objects.append(object_)
+        self._indices[id(object_)] = index
+        box = self.bounds_of(object_)
+        leaf = self.allocate()
+        self.leaf_objects[leaf] = index
+        self.leaf_nodes.append(leaf)
+        self.mins[leaf * 3:leaf * 3 + 3] = array.array("d", box.mins)
+        self.maxs[leaf * 3:leaf * 3 + 3] = array.array("d", box.maxs)
+        if self.root == -1:
+            self.root = leaf
+            return
+        # find the cheapest sibling (Box2D's b2DynamicTree::InsertLeaf)
+        leaf_mins, leaf_maxs = tuple(box.mins), tuple(box.maxs)
+        node = self.root
+        while self.leaf_objects[node] == -1:
+            mins, maxs = self.node_bounds(node)
+            area = surface_area(mins, maxs)
+            combined = surface_area(map(min, mins, leaf_mins), map(max, maxs, leaf_maxs))
+            cost = 2 * combined  # new parent for node & leaf
+            inherited = 2 * (combined - area)  # growth pushed onto the children
+            child_costs = list()
+            for child in self.children[node * 2:node * 2 + 2]:
+                child_mins, child_maxs = self.node_bounds(child)
+                grown = surface_area(map(min, child_mins, leaf_mins), map(max, child_maxs, leaf_maxs))
+                if self.leaf_objects[child] == -1:
+                    grown -= surface_area(child_mins, child_maxs)
+                child_costs.append(grown + inherited)
+            if cost < min(child_costs):
+                break
+            node = self.children[node * 2 + child_costs.index(min(child_costs))]
+        # replace node w/ a new parent of node & leaf
+        sibling = node
+        old_parent = self.parents[sibling]
+        parent = self.allocate()
+        self.parents[parent] = old_parent
+        self.children[parent * 2:parent * 2 + 2] = array.array("i", (sibling, leaf))
+        if old_parent == -1:
+            self.root = parent
+        else:
+            side = 0 if self.children[old_parent * 2] == sibling else 1
+            self.children[old_parent * 2 + side] = parent
+        self.parents[sibling] = parent
+        self.parents[leaf] = parent
+        self.refit(parent)
+
+    def remove(self, object_: Union[AABB, Brush]):
+        """remove a leaf; its sibling takes its parent's place"""
+        if id(object_) not in self._indices:
+            raise ValueError(f"{object_!r} is not in this {self.__class__.__name__}")
+        index = self._indices.pop(id(object_))
+        self.objects[index] = None
+        leaf = self.leaf_nodes[index]
+        self.leaf_nodes[index] = -1
+        parent = self.parents[leaf]
+        self.release(leaf)
+        if parent == -1:  # leaf was the root
+            self.root = -1
+            return
+        side = 0 if self.children[parent * 2] == leaf else 1
+        sibling = self.children[parent * 2 + 1 - side]
+        grandparent = self.parents[parent]
+        self.release(parent)
+        self.parents[sibling] = grandparent
+        if grandparent == -1:
+            self.root = sibling
+            return
+        side = 0 if self.children[grandparent * 2] == parent else 1
+        self.children[grandparent * 2 + side] = sibling
+        self.refit(grandparent)
+
+    # QUERIES
+
+    def query_box(self, aabb: AABB) -> List[Union[AABB, Brush]]:
+        """objects w/ bounds intersecting aabb"""
+        x0, y0, z0 = aabb.mins
+        x1, y1, z1 = aabb.maxs
+        mins, maxs, children, leaf_objects = self.mins, self.maxs, self.children, self.leaf_objects
+        out = list()
+        stack = [self.root] if self.root != -1 else list()
+        while len(stack) > 0:
+            node = stack.pop()
+            i = node * 3
+            if (mins[i] > x1 or maxs[i] < x0 or mins[i + 1] > y1 or maxs[i + 1] < y0
+                    or mins[i + 2] > z1 or maxs[i + 2] < z0):
+                continue
+            if leaf_objects[node] != -1:
+                out.append(self.objects[leaf_objects[node]])
+            else:
+                stack.append(children[node * 2 + 1])
+                stack.append(children[node * 2])
+        return out
+
+    def query_point(self, point: vector.vec3) -> List[Union[AABB, Brush]]:
+        """objects containing point"""
+        point = vector.vec3(*point)
+        x, y, z = point
+        mins, maxs, children, leaf_objects = self.mins, self.maxs, self.children, self.leaf_objects
+        out = list()
+        stack = [self.root] if self.root != -1 else list()
+        while len(stack) > 0:
+            node = stack.pop()
+            i = node * 3
+            if not (mins[i] <= x <= maxs[i] and mins[i + 1] <= y <= maxs[i + 1] and mins[i + 2] <= z <= maxs[i + 2]):
+                continue
+            if leaf_objects[node] != -1:
+                object_ = self.objects[leaf_objects[node]]
+                if not isinstance(object_, Brush) or point in object_:
+                    out.append(object_)
+            else:
+                stack.append(children[node * 2 + 1])
+                stack.append(children[node * 2])
+        return out
+
+    def query_ray(self, origin: vector.vec3, direction: vector.vec3,
+                  max_distance: float = math.inf) -> List[Tuple[float, Union[AABB, Brush]]]:
+        """[(distance, object)] for each object the ray hits; nearest first"""
+        # NOTE: distances are in multiples of direction; normalise direction for world units
+        origin, direction = vector.vec3(*origin), vector.vec3(*direction)
+        out = list()
+        stack = [self.root] if self.root != -1 else list()
+        while len(stack) > 0:
+            node = stack.pop()
+            mins, maxs = self.node_bounds(node)
+            distance = ray_aabb(origin, direction, mins, maxs, max_distance)
+            if distance is None:
+                continue
+            if self.leaf_objects[node] != -1:
+                object_ = self.objects[self.leaf_objects[node]]
+                if isinstance(object_, Brush):
+                    distance = ray_brush(origin, direction, object_, max_distance)
+                if distance is not None:
+                    out.append((distance, object_))
+            else:
+                stack.extend(self.children[node * 2:node * 2 + 2])
+        out.sort(key=lambda hit: hit[0])
+        return out
+
+    def nearest(self, point: vector.vec3, max_distance: float = math.inf) -> Union[Tuple[float, Union[AABB, Brush]], None]:
+        """(distance, object) w/ the closest bounds to point; None if nothing is in range"""
+        point = tuple(point)
+        best_distance, best = max_distance ** 2, None
+        heap = list()
+        # ^ [(squared distance to node bounds, node)]
+
+        def push(node: int):
+            mins, maxs = self.node_bounds(node)
+            distance = sum((max(m - p, 0, p - M) ** 2 for p, m, M in zip(point, mins, maxs)))
+            if distance <= best_distance:
+                heapq.heappush(heap, (distance, node))
+
+        if self.root != -1:
+            push(self.root)
+        while len(heap) > 0:
+            distance, node = heapq.heappop(heap)
+            if distance > best_distance:
+                break  # every other node is further away
+            if self.leaf_objects[node] != -1:
+                best_distance, best = distance, self.objects[self.leaf_objects[node]]
+                continue
+            for child in self.children[node * 2:node * 2 + 2]:
+                push(child)
+        if best is None:
+            return None
+        return math.sqrt(best_distance), best
+
+
+class SweepAndPrune:
+    """broad-phase; tracks every pair of objects w/ overlapping bounds"""
+    # NOTE: objects are sorted by mins on the axis w/ the most spread out centres
+    # -- a moved object is re-sorted w/ bisect & only its own pairs are re-tested
+    # NOTE: Brushes are tested by bounds only
+    dimensions: int = 3
+    objects: List[Union[AABB, Brush, None]]
+    # ^ None once removed
+    mins: List[array.array]  # 1 array of doubles per axis
+    maxs: List[array.array]  # 1 array of doubles per axis
+    axis: int  # sorting axis
+    order: List[int]  # object indices, sorted by mins[axis]
+    starts: List[float]  # mins[axis] of each object in order
+    width: float  # largest size on axis; bounds the search for any 1 object
+    pairs: Set[Tuple[int, int]]  # {(i, j)}; i < j
+    partners: List[Set[int]]  # overlapping objects, per object
+
+    def __init__(self, objects: Iterable[Union[AABB, Brush]] = tuple()):
+        self.objects = list(objects)
+        self.rebuild()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {len(self.order)} objects, {len(self.pairs)} pairs>"
+
+    @staticmethod
+    def bounds_of(object_: Union[AABB, Brush]) -> AABB:
+        return object_.bounds if isinstance(object_, Brush) else object_
+
+    def overlap(self, i: int, j: int) -> bool:
+        """narrow-phase test for objects w/ overlapping bounds"""
+        return True
+
+    def rebuild(self) -> Tuple[Set[Tuple[int, int]], Set[Tuple[int, int]]]:
+        """re-read all bounds & sweep (faster than .update() when most objects move)"""
+        # -> (new pairs, lost pairs)
+        old_pairs = getattr(self, "pairs", set())
+        live = [i for i, object_ in enumerate(self.objects) if object_ is not None]
+        self.mins = [array.array("d", [0]) * len(self.objects) for axis in range(self.dimensions)]
+        self.maxs = [array.array("d", [0]) * len(self.objects) for axis in range(self.dimensions)]
+        for i in live:
+            self.pack(i)
+        # sort on the axis w/ the most spread out centres (variance)
+        axes = range(self.dimensions)
+        if len(live) > 1:
+            centres = [[self.mins[a][i] + self.maxs[a][i] for i in live] for a in axes]
+            spreads = [
+                math.fsum(c * c for c in centres[a]) - math.fsum(centres[a]) ** 2 / len(live)
+                for a in axes]
+            self.axis = max(axes, key=spreads.__getitem__)
+        else:
+            self.axis = 0
+        mins, maxs = self.mins[self.axis], self.maxs[self.axis]
+        self.order = sorted(live, key=mins.__getitem__)
+        self.starts = [mins[i] for i in self.order]
+        self.width = max((maxs[i] - mins[i] for i in live), default=0)
+        self.pairs = set(self.sweep())
+        self.partners = [set() for object_ in self.objects]
+        for i, j in self.pairs:
+            self.partners[i].add(j)
+            self.partners[j].add(i)
+        return self.pairs - old_pairs, old_pairs - self.pairs
+
+    def pack(self, index: int):
+        """copy the bounds of an object into .mins & .maxs"""
+        bounds = self.bounds_of(self.objects[index])
+        for axis, (m, M) in enumerate(zip(bounds.mins, bounds.maxs)):
+            self.mins[axis][index] = m
+            self.maxs[axis][index] = M
+
+    def other_axes(self) -> List[Tuple[array.array, array.array]]:
+        return [(self.mins[a], self.maxs[a]) for a in range(self.dimensions) if a != self.axis]
+
+    def sweep(self) -> Iterable[Tuple[int, int]]:
+        """every overlapping pair of sorted objects"""
+        order, starts = self.order, self.starts
+        maxs = self.maxs[self.axis]
+        others = self.other_axes()
+        for position, i in enumerate(order):
+            end = bisect.bisect_right(starts, maxs[i], position + 1)
+            candidates = order[position + 1:end]
+            for lows, highs in others:
+                low, high = lows[i], highs[i]
+                candidates = [j for j in candidates if lows[j] <= high and highs[j] >= low]
+            for j in candidates:
+                if self.overlap(i, j):
+                    yield (i, j) if i < j else (j, i)
+
+    def query(self, index: int) -> List[int]:
+        """sorted objects w/ bounds overlapping the bounds of objects[index]"""
+        mins, maxs = self.mins[self.axis], self.maxs[self.axis]
+        low, high = mins[index], maxs[index]
+        start = bisect.bisect_left(self.starts, low - self.width)
+        end = bisect.bisect_right(self.starts, high, start)
+        candidates = [j for j in self.order[start:end] if maxs[j] >= low and j != index]
+        for lows, highs in self.other_axes():
+            low, high = lows[index], highs[index]
+            candidates = [j for j in candidates if lows[j] <= high and highs[j] >= low]
+        return candidates
+
+    # INCREMENTAL UPDATES
+
+    def unsort(self, index: int):
+        position = bisect.bisect_left(self.starts, self.mins[self.axis][index])
+        position = self.order.index(index, position)
+        del self.order[position]
+        del self.starts[position]
+
+    def insort(self, index: int):
+        mins, maxs = self.mins[self.axis], self.maxs[self.axis]
+        position = bisect.bisect_right(self.starts, mins[index])
+        self.order.insert(position, index)
+        self.starts.insert(position, mins[index])
+        self.width = max(self.width, maxs[index] - mins[index])
+        # NOTE: width never shrinks until .rebuild()
+
+    def retest(self, index: int) -> Tuple[Set[Tuple[int, int]], Set[Tuple[int, int]]]:
+        """-> (new pairs, lost pairs)"""
+        old = self.partners[index]
+        new = {j for j in self.query(index) if self.overlap(index, j)}
+        for j in old - new:
+            self.partners[j].discard(index)
+        for j in new - old:
+            self.partners[j].add(index)
+        self.partners[index] = new
+        added = {(min(index, j), max(index, j)) for j in new - old}
+        lost = {(min(index, j), max(index, j)) for j in old - new}
+        self.pairs |= added
+        self.pairs -= lost
+        return added, lost
+
+    def add(self, object_: Union[AABB, Brush]) -> Tuple[int, Set[Tuple[int, int]]]:
+        """-> (index, new pairs)"""
+        index = len(self.objects)
+        self.objects.append(object_)
+        for axis in range(self.dimensions):
+            self.mins[axis].append(0)
+            self.maxs[axis].append(0)
+        self.partners.append(set())
+        self.pack(index)
+        self.insort(index)
+        added, lost = self.retest(index)
+        return index, added
+
+    def update(self, index: int, object_: Union[AABB, Brush, None] = None
+               ) -> Tuple[Set[Tuple[int, int]], Set[Tuple[int, int]]]:
+        """re-read the bounds of a moved object (or replace it); -> (new pairs, lost pairs)"""
+        if self.objects[index] is None:
+            raise IndexError(f"object #{index} was removed")
+        if object_ is not None:
+            self.objects[index] = object_
+        self.unsort(index)
+        self.pack(index)
+        self.insort(index)
+        return self.retest(index)
+
+    def remove(self, index: int) -> Set[Tuple[int, int]]:
+        """-> lost pairs"""
+        if self.objects[index] is None:
+            raise IndexError(f"object #{index} was removed")
+        self.unsort(index)
+        self.objects[index] = None
+        for j in self.partners[index]:
+            self.partners[j].discard(index)
+        lost = {(min(index, j), max(index, j)) for j in self.partners[index]}
+        self.partners[index] = set()
+        self.pairs -= lost
+        return lost
+
+
+def find_overlapping_pairs(aabbs: Iterable[Union[AABB, Brush]]) -> List[Tuple[int, int]]:
+    """sorted (i, j) index pairs of intersecting bounds; i < j"""
+    return sorted(SweepAndPrune(aabbs).pairs)
@@ -2,8 +2,9 @@
 from __future__ import annotations
 from collections.abc import Iterable
 import math
-from typing import List, Union
+from typing import List, Tuple, Union
 
+from . import physics
 from . import vector
 
 
@@ -102,7 +103,13 @@ class AABB:
 
     @classmethod
     def from_points(cls, points: List[vector.vec2]) -> AABB:
-        return sum({vector.vec2(*p) for p in points}, start=cls())
+        points = [
+            p if isinstance(p, vector.vec2) else vector.vec2(*p)
+            for p in points]
+        if len(points) == 0:
+            return cls()
+        xs, ys = zip(*points)
+        return cls.from_mins_maxs((min(xs), min(ys)), (max(xs), max(ys)))
 
     # SETTERS
 
@@ -174,16 +181,14 @@ class Circle:
             return offset + other.radius ** 2 <= self.radius ** 2
 
     def intersects(self, other: Bounds):
-        if isinstance(other, AABB):
-            if not self.as_AABB().intersects(other):
-                return False
-            if any(corner in self for corner in other.corners):
-                return True
-            raise NotImplementedError("need to test for edge intersection")
+        if isinstance(other, AABB):  # closest point on other is in self
+            distance = sum(
+                max(m - c, 0, c - M) ** 2
+                for c, m, M in zip(self.center, other.mins, other.maxs))
+            return distance <= self.radius ** 2
         elif isinstance(other, Circle):
-            distance = (self.center - other.center).sqrmagnitude()
-            sqrradii = self.radius ** 2 + other.radius ** 2
-            return distance <= sqrradii
+            distance = sum((s - o) ** 2 for s, o in zip(self.center, other.center))
+            return distance <= (self.radius + other.radius) ** 2
         else:
             raise TypeError(...)
 
@@ -205,3 +210,26 @@ class Circle:
 
 
 Bounds = Union[AABB, Circle]
+
+
+class SweepAndPrune(physics.SweepAndPrune):
+    """broad-phase; tracks every pair of overlapping AABBs & Circles"""
+    # NOTE: Circles are swept by their square bounds, then tested exactly
+    dimensions = 2
+
+    @staticmethod
+    def bounds_of(object_: Bounds) -> AABB:
+        return object_.as_AABB() if isinstance(object_, Circle) else object_
+
+    def overlap(self, i: int, j: int) -> bool:
+        a, b = self.objects[i], self.objects[j]
+        if isinstance(a, Circle):
+            return a.intersects(b)
+        elif isinstance(b, Circle):
+            return b.intersects(a)
+        return True  # AABB bounds already overlap
+
+
+def find_overlapping_pairs(shapes: Iterable[Bounds]) -> List[Tuple[int, int]]:
+    """sorted (i, j) index pairs of intersecting shapes; i < j"""
+    return sorted(SweepAndPrune(shapes).pairs)
@@ -1,8 +1,9 @@
 # https://en.wikipedia.org/wiki/Conversion_between_quaternions_and_Euler_angles
 from __future__ import annotations
 import math
-from typing import Iterable
+from typing import Iterable, Union
 
+from . import matrix
 from . import vector
 
 
@@ -40,9 +41,97 @@ class Quaternion:
     def __len__(self) -> int:
         return 4
 
-    # TODO: __mul__ vector.vec3 to apply rotation?
+    def __mul__(self, other: Union[Quaternion, vector.vec3]) -> Union[Quaternion, vector.vec3]:
+        """Quaternion * Quaternion: combine rotations (other is applied first)
+        Quaternion * vec3: rotate vector"""
+        if isinstance(other, Quaternion):
+            x1, y1, z1, w1 = self
+            x2, y2, z2, w2 = other
+            return Quaternion(
+                w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+                w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+                w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2,
+                w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2)
+        elif isinstance(other, vector.vec3):
+            return self.rotate(other)
+        raise TypeError(f"cannot multiply '{type(self).__name__}' by '{type(other).__name__}'")
+
+    def __neg__(self) -> Quaternion:
+        return Quaternion(-self.x, -self.y, -self.z, -self.w)
+
+    def conjugate(self) -> Quaternion:
+        return Quaternion(-self.x, -self.y, -self.z, self.w)
+
+    def dot(self, other: Quaternion) -> float:
+        return math.fsum(a * b for a, b in zip(self, other))
+
+    def inverse(self) -> Quaternion:
+        sqrmagnitude = self.dot(self)
+        if sqrmagnitude == 0:
+            raise ValueError("cannot invert a zero-length quaternion")
+        return Quaternion(*[a / sqrmagnitude for a in self.conjugate()])
+
+    def magnitude(self) -> float:
+        return math.sqrt(self.dot(self))
+
+    def normalise(self):
+        """scale this quaternion to unit length"""
+        self.x, self.y, self.z, self.w = self.normalised()
+
+    def normalised(self) -> Quaternion:
+        m = self.magnitude()
+        return Quaternion(*[a / m for a in self]) if m != 0 else self
+
+    # ROTATION
+    # NOTE: assumes unit quaternions
+
+    def rotate(self, point: vector.vec3) -> vector.vec3:
+        # v + 2w(q x v) + 2(q x (q x v))
+        qx, qy, qz, w = self
+        x, y, z = point
+        tx = 2 * (qy * z - qz * y)
+        ty = 2 * (qz * x - qx * z)
+        tz = 2 * (qx * y - qy * x)
+        return vector.vec3(
+            x + w * tx + qy * tz - qz * ty,
+            y + w * ty + qz * tx - qx * tz,
+            z + w * tz + qx * ty - qy * tx)
+
+    def rotate_many(self, points: vector.Vec3Array) -> vector.Vec3Array:
+        """rotate every point in a Vec3Array"""
+        m00, m01, m02, m10, m11, m12, m20, m21, m22 = self.to_matrix().rotation_scale
+        xs, ys, zs = points.axes()
+        return vector.Vec3Array.from_axes(
+            [m00 * x + m01 * y + m02 * z for x, y, z in zip(xs, ys, zs)],
+            [m10 * x + m11 * y + m12 * z for x, y, z in zip(xs, ys, zs)],
+            [m20 * x + m21 * y + m22 * z for x, y, z in zip(xs, ys, zs)])
+
+    def slerp(self, other: Quaternion, t: float) -> Quaternion:
+        """spherical linear interpolation by t [0-1]; takes the shortest path"""
+        cos_theta = self.dot(other)
+        if cos_theta < 0:  # shortest path
+            other = -other
+            cos_theta = -cos_theta
+        if cos_theta > 0.9995:  # nearly parallel; lerp to avoid dividing by ~0
+            return Quaternion(*[
+                a + t * (b - a)
+                for a, b in zip(self, other)]).normalised()
+        theta = math.acos(cos_theta)
+        sin_theta = math.sin(theta)
+        s = math.sin((1 - t) * theta) / sin_theta
+        o = math.sin(t * theta) / sin_theta
+        return Quaternion(*[
+            s * a + o * b
+            for a, b in zip(self, other)])
+
+    # CONVERSION
+
+    def to_euler(self) -> vector.vec3:
+        """degrees; inverse of .from_euler"""
+        return self.to_matrix().to_euler()
 
-    # TODO: Quaterion -> Euler xyz
+    def to_matrix(self) -> matrix.Matrix4:
+        return matrix.Matrix4.from_quaternion(self)
 
     @classmethod
     def from_euler(cls, angles: vector.vec3) -> Quaternion:
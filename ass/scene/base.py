@@ -1,5 +1,7 @@
 from __future__ import annotations
-from typing import Dict, List, Union
+import collections.abc
+import itertools
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Union
 
 from .. import geometry
 
@@ -12,14 +14,89 @@ ModelList = Union[
     Dict[str, geometry.Model]]
 
 
+def batched(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(iterable)
+    batch = list(itertools.islice(iterator, size))
+    while len(batch) > 0:
+        yield batch
+        batch = list(itertools.islice(iterator, size))
+
+
+def buffered(chunks: Iterable[str], size: int = 1 << 16) -> Iterator[str]:
+    """join small chunks into strings of at least size characters"""
+    buffer, length = list(), 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = list(), 0
+    if len(buffer) > 0:
+        yield "".join(buffer)
+
+
+def chunk_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """split newline terminated chunks into lines (w/o newlines)"""
+    partial = list()
+    # ^ pieces of the current line; long array lines span many chunks
+    for chunk in chunks:
+        if "\n" not in chunk:
+            partial.append(chunk)
+            continue
+        first, *lines, last = chunk.split("\n")
+        partial.append(first)
+        yield "".join(partial)
+        yield from lines
+        partial = [last]
+    if "".join(partial) != "":
+        yield "".join(partial)
+
+
 def indent(count: int = 1) -> str:
     return " " * 4 * count  # 4 spaces, no tabs
 
 
+class LazyDict(collections.abc.MutableMapping):
+    """dict w/ values that are only loaded when first accessed"""
+    loaders: Dict[str, Callable[[], Any]]
+    # ^ {key: loader}; None if the value was set directly
+    cache: Dict[str, Any]
+
+    def __init__(self, loaders: Dict[str, Callable[[], Any]] = None):
+        self.loaders = dict() if loaders is None else dict(loaders)
+        self.cache = dict()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {len(self.cache)}/{len(self)} loaded>"
+
+    def __delitem__(self, key: str):
+        del self.loaders[key]
+        self.cache.pop(key, None)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.cache:
+            self.cache[key] = self.loaders[key]()
+        return self.cache[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.loaders)
+
+    def __len__(self) -> int:
+        return len(self.loaders)
+
+    def __setitem__(self, key: str, value: Any):
+        self.loaders[key] = None
+        self.cache[key] = value
+
+    def is_loaded(self, key: str) -> bool:
+        return key in self.cache
+
+
 # NOTE: wavefront.Obj uses groups instead of models
 # -- Gltf & Usd have nodes / node trees (indexed relationships)
 # -- might need to rethink how we represent model names
 # -- copying data for every instance seems like a bad idea
+# -- pixar.Usd writes repeated models as instances of one prototype
 class SceneDescription(breki.ParsedFile):
     """base class for file formats containing multiple models etc."""
     # NOTE: formats can be lossy, reloading a saved file could result in data loss
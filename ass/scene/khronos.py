@@ -1,13 +1,23 @@
 from __future__ import annotations
+import array
+import base64
 import enum
+import functools
+import itertools
 import json
+import mmap
+import operator
 import os
 import re
 import struct
-from typing import Any, Dict, List, Tuple, Union
+import sys
+from typing import Any, BinaryIO, Dict, Iterator, List, Sequence, Tuple, Union
+import urllib.parse
 
 from .. import geometry
+from .. import matrix
 from .. import quaternion
+from .. import vector
 from . import base
 
 import breki
@@ -15,9 +25,8 @@ from breki.files.parsed import parse_first
 
 
 # TODO: export Z-up geometry.Model as Y-up (add rotation to transform matrix?)
-# TODO: scrap complex vertex & index buffer construction
-# -- just dump the raw vertices, don't check for duplicates
-# -- keep it simple, just like in utils.geometry
+# NOTE: VertexBuffer(deduplicate=False) dumps the raw vertices
+# -- no duplicate checks, just like in utils.geometry
 # TODO: custom JSONEncoder & Decoder classes
 # -- could handle converting enum.Enum
 
@@ -41,15 +50,40 @@ class Buffer(enum.Enum):
     ELEMENT_ARRAY = 34963
 
 
+class Chunk(enum.Enum):
+    """.glb chunk type"""
+    JSON = 0x4E4F534A
+    BIN = 0x004E4942
+
+
 Json = Dict[str, Union[str, int]]  # and List[Json]
 
 
+# NOTE: array & struct use the same format characters
+component_formats = {
+    Data.BYTE: "b", Data.UNSIGNED_BYTE: "B",
+    Data.SHORT: "h", Data.UNSIGNED_SHORT: "H",
+    Data.UNSIGNED_INT: "I", Data.FLOAT: "f"}
+
+# accessor.normalized int -> float
+normalised_divisors = {"b": 127, "B": 255, "h": 32767, "H": 65535}
+
+# NOTE: ignoring column padding for byte & short matrices
+type_sizes = {
+    "SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4,
+    "MAT2": 4, "MAT3": 9, "MAT4": 16}
+
+
 def split_sub_format(sub_format: str):
     count, type_ = re.match(r"([0-9]*)([fIhHbB])", sub_format).groups()
     count = int(count) if count != "" else 1
     return count, type_
 
 
+def padding(length: int, alignment: int = 4) -> int:
+    return -length % alignment
+
+
 class VertexBuffer:  # Json + Binary Data
     """treat as write-only"""
     # ENCODING
@@ -62,12 +96,29 @@ class VertexBuffer:  # Json + Binary Data
     vertex_attrs: Dict[str, int]
     # DATA
     vertices: List[geometry.Vertex]
+    deduplicate: bool
+    indices: Dict[Tuple[Any], int]
+    # ^ {tuplify(vertex): index}
+    batch_size: int = 4096
+    # ^ vertices packed per struct.pack call
 
-    def __init__(self, **format_: Dict[str, str]):
+    def __init__(self, deduplicate: bool = True, **format_: Dict[str, str]):
         self.format_ = format_
         self.vertices = list()
+        self.deduplicate = deduplicate
+        self.indices = dict()
+        # NOTE: glTF is little-endian & unpadded
         self.format_string = "".join(self.format_.values())
-        self.byteStride = struct.calcsize(self.format_string)
+        self.byteStride = struct.calcsize(f"<{self.format_string}")
+        # tuplify helpers
+        if len(self.format_) == 1:
+            attr = [*self.format_][0]
+            self._getter = lambda v: (getattr(v, attr),)
+        else:
+            self._getter = operator.attrgetter(*self.format_)
+        self._is_scalar = [
+            split_sub_format(sub_format)[0] == 1
+            for sub_format in self.format_.values()]
         # for indexing / mapping vertex member accessors:
         # -- (might need to add an offset)
         self.attributes = dict()
@@ -89,26 +140,52 @@ class VertexBuffer:  # Json + Binary Data
 
     def add(self, vertex: geometry.Vertex) -> int:
         # TODO: assert vertex format is valid
-        if vertex in self.vertices:
-            return self.vertices.index(vertex)
-        else:
+        if not self.deduplicate:
             self.vertices.append(vertex)
             return len(self.vertices) - 1
+        # NOTE: vertices are identical if they pack to the same data
+        key = self.tuplify(vertex)
+        index = self.indices.get(key)
+        if index is None:
+            index = len(self.vertices)
+            self.indices[key] = index
+            self.vertices.append(vertex)
+        return index
 
     def tuplify(self, vertex: geometry.Vertex) -> Tuple[Any]:
         out = list()
-        for attr in self.format_:
-            val = getattr(vertex, attr)
-            if isinstance(val, (float, int)):
+        for val, is_scalar in zip(self._getter(vertex), self._is_scalar):
+            if is_scalar:
                 out.append(val)
             else:
                 out.extend(val)
         return tuple(out)
 
+    def batches(self) -> Iterator[Tuple[struct.Struct, List[Any]]]:
+        """(struct, flat values) for up to .batch_size vertices at a time"""
+        # NOTE: deduplicated vertices were already tuplified by .add
+        if self.deduplicate:
+            tuples = iter(self.indices)
+        else:
+            tuples = map(self.tuplify, self.vertices)
+        batch_struct = struct.Struct(f"<{self.format_string * self.batch_size}")
+        for batch in base.batched(tuples, self.batch_size):
+            if len(batch) < self.batch_size:  # last batch
+                batch_struct = struct.Struct(f"<{self.format_string * len(batch)}")
+            yield batch_struct, list(itertools.chain.from_iterable(batch))
+
     def as_bytes(self) -> bytes:
-        return b"".join([
-            struct.pack(self.format_string, *self.tuplify(v))
-            for v in self.vertices])
+        out = bytearray(self.byteLength)
+        offset = 0
+        for batch_struct, values in self.batches():
+            batch_struct.pack_into(out, offset, *values)
+            offset += batch_struct.size
+        return bytes(out)
+
+    def write(self, stream: BinaryIO):
+        """write packed vertices to an open binary file, one batch at a time"""
+        for batch_struct, values in self.batches():
+            stream.write(batch_struct.pack(*values))
 
     @property
     def accessors(self) -> List[Json]:
@@ -143,13 +220,14 @@ class VertexBuffer:  # Json + Binary Data
 
 class IndexBuffer:  # Json + BinaryData
     """treat as write-only"""
-    indices: List[int]
+    indices: array.array
+    # ^ array("I")
     meshes: List[Tuple[int, int]]
     # ^ [(byteOffset, count)]
     byteLength: int
 
     def __init__(self):
-        self.indices = list()
+        self.indices = array.array("I")
         self.meshes = list()
 
     def add(self, mesh: geometry.Mesh, vertex_buffer: VertexBuffer):
@@ -166,8 +244,21 @@ class IndexBuffer:  # Json + BinaryData
         self.indices.extend(new_indices)
         self.meshes.append((byteOffset, len(new_indices)))
 
+    def as_array(self) -> array.array:
+        """little-endian indices"""
+        assert self.indices.itemsize == 4, "array('I') is not uint32 on this platform"
+        if sys.byteorder == "little":
+            return self.indices
+        out = array.array("I", self.indices)
+        out.byteswap()
+        return out
+
     def as_bytes(self) -> bytes:
-        return struct.pack(f"{len(self.indices)}I", *self.indices)
+        return self.as_array().tobytes()
+
+    def write(self, stream: BinaryIO):
+        """write packed indices to an open binary file"""
+        stream.write(self.as_array())
 
     @property
     def accessors(self) -> List[Json]:
@@ -216,50 +307,332 @@ class MaterialList:
 BufferPair = Tuple[VertexBuffer, IndexBuffer]
 
 
-# TODO: friend_patterns for buffers & textures
+# TODO: friend_patterns for textures
 class Gltf(base.SceneDescription, breki.FriendlyHybridFile):
     """WebGL Transmission Format"""
     exts = {
         "*.glb": breki.DataType.BINARY,
         "*.gltf": breki.DataType.TEXT}
     buffers: List[BufferPair]
+    # ^ for writing
     json: Json
+    models: base.LazyDict
+    # ^ meshes are decoded when a model is first accessed
+    # parsed data caches
+    _accessors: Dict[int, Sequence[Union[float, int]]]
+    _bin_chunk: Tuple[int, int]
+    # ^ (offset, length) of .glb BIN chunk
+    _buffers: Dict[int, memoryview]
+    _materials: Dict[int, geometry.Material]
+    _meshes: Dict[int, List[geometry.MeshBuffer]]
 
     def __init__(self, filepath: str, archive=None, code_page=None):
         super().__init__(filepath, archive, code_page)
         self.buffers = list()
         self.json = dict()
+        self._accessors = dict()
+        self._bin_chunk = None
+        self._buffers = dict()
+        self._materials = dict()
+        self._meshes = dict()
 
     @parse_first
     def __repr__(self) -> str:
         descriptor = f"{len(self.models)} models {len(self.buffers)} buffers"
         return f"<Gltf {descriptor} @ 0x{id(self):016X}>"
 
+    @parse_first
+    def as_bytes(self) -> bytes:
+        """.glb"""
+        return b"".join(self.glb_chunks())
+
+    @parse_first
+    def glb_chunks(self) -> List[bytes]:
+        """header, JSON chunk & BIN chunk (w/ padding) for writelines"""
+        # NOTE: all buffers are packed into one BIN chunk
+        # -- each .json["buffers"] entry gets its own 4-byte aligned span
+        binary = self.buffer_data()
+        bin_chunk = list()
+        offsets = list()
+        bin_length = 0
+        for data in binary:
+            length = len(data) * getattr(data, "itemsize", 1)
+            offsets.append(bin_length)
+            bin_chunk.extend([data, b"\x00" * padding(length)])
+            bin_length += length + padding(length)
+        # json
+        glb_json = {
+            **self.json,
+            "buffers": [{"byteLength": bin_length}],
+            "bufferViews": [
+                {**view, "buffer": 0, "byteOffset": offsets[view["buffer"]] + view.get("byteOffset", 0)}
+                for view in self.json["bufferViews"]]}
+        json_chunk = json.dumps(glb_json, separators=(",", ":")).encode("utf-8")
+        json_chunk += b" " * padding(len(json_chunk))
+        # assemble
+        length = 12 + 8 + len(json_chunk) + 8 + bin_length
+        return [
+            struct.pack("<4s2I", b"glTF", 2, length),
+            struct.pack("<2I", len(json_chunk), Chunk.JSON.value),
+            json_chunk,
+            struct.pack("<2I", bin_length, Chunk.BIN.value),
+            *bin_chunk]
+
+    @parse_first
+    def buffer_data(self) -> List[Union[bytes, array.array]]:
+        """data for each .json["buffers"] entry"""
+        if len(self.buffers) > 0:  # from_models
+            return [
+                buffer.as_bytes() if isinstance(buffer, VertexBuffer) else buffer.as_array()
+                for buffer_pair in self.buffers
+                for buffer in buffer_pair]
+        # parsed; re-emit the original bytes
+        # NOTE: copied, .glb buffers are mmapped & we might be overwriting the file
+        return [
+            bytes(self.buffer(i)[:buffer["byteLength"]])
+            for i, buffer in enumerate(self.json.get("buffers", list()))]
+
     @parse_first
     def save_as(self, filepath: str):
-        """.gltf only! no .glb (yet)"""
-        # TODO: use relpath so we can split off "./" is no folder if given
+        """.gltf (w/ external .bin buffers) or .glb"""
         folder, filename = os.path.split(filepath)
-        filename, ext = os.path.splitext(filepath)
-        assert ext == ".gltf", f"cannot write to '{ext}' extension"
+        filename, ext = os.path.splitext(filename)
+        assert ext in (".gltf", ".glb"), f"cannot write to '{ext}' extension"
+        if ext == ".glb":
+            chunks = self.glb_chunks()  # before opening, in case it fails
+            with open(filepath, "wb") as glb_file:
+                glb_file.writelines(chunks)
+            return
         # write .bin
-        for i, buffer_pair in enumerate(self.buffers):
-            buffer_names = ("vertex", "index")
-            for j, (name, buffer) in enumerate(zip(buffer_names, buffer_pair)):
-                bin_name = f"{filename}.{name}.{i}.bin"
-                self.json["buffers"][i * 2 + j]["uri"] = bin_name
-                with open(os.path.join(folder, bin_name), "wb") as bin_file:
-                    bin_file.write(buffer.as_bytes())
+        if len(self.buffers) > 0:  # from_models
+            for i, buffer_pair in enumerate(self.buffers):
+                buffer_names = ("vertex", "index")
+                for j, (name, buffer) in enumerate(zip(buffer_names, buffer_pair)):
+                    bin_name = f"{filename}.{name}.{i}.bin"
+                    self.json["buffers"][i * 2 + j]["uri"] = bin_name
+                    with open(os.path.join(folder, bin_name), "wb") as bin_file:
+                        buffer.write(bin_file)
+            gltf_json = self.json
+        else:  # parsed; .json keeps pointing at the original buffers
+            gltf_json = {**self.json, "buffers": [dict(buffer) for buffer in self.json.get("buffers", list())]}
+            for i, (buffer, data) in enumerate(zip(gltf_json["buffers"], self.buffer_data())):
+                buffer["uri"] = f"{filename}.{i}.bin"
+                with open(os.path.join(folder, buffer["uri"]), "wb") as bin_file:
+                    bin_file.write(data)
         # write .gltf
         with open(os.path.join(folder, f"{filename}.gltf"), "w") as json_file:
-            json.dump(self.json, json_file, indent=2)
+            json.dump(gltf_json, json_file, indent=2)
+
+    @property
+    def friend_patterns(self) -> Dict[str, breki.DataType]:
+        return {
+            urllib.parse.unquote(buffer["uri"]): breki.DataType.BINARY
+            for buffer in self.json.get("buffers", list())
+            if not buffer.get("uri", "data:").startswith("data:")}
+
+    def parse_binary(self):
+        magic, version, length = struct.unpack("<4s2I", self.stream.read(12))
+        assert magic == b"glTF", "not a .glb file"
+        assert version == 2, f"unsupported .glb version: {version}"
+        while self.stream.tell() < length:
+            chunk_length, chunk_type = struct.unpack("<2I", self.stream.read(8))
+            if chunk_type == Chunk.JSON.value:
+                self.json = json.loads(self.stream.read(chunk_length))
+            else:
+                if chunk_type == Chunk.BIN.value and self._bin_chunk is None:
+                    self._bin_chunk = (self.stream.tell(), chunk_length)
+                self.stream.seek(chunk_length, 1)  # read later
+        self.models = self.lazy_models()
+        self.is_parsed = True
+
+    def parse_text(self):
+        self.json = json.load(self.stream)
+        self.models = self.lazy_models()
+        self.is_parsed = True
+
+    def lazy_models(self) -> base.LazyDict:
+        """a model for each node w/ a mesh; meshes aren't decoded until accessed"""
+        nodes = self.json.get("nodes", list())
+        scenes = self.json.get("scenes", list())
+        if len(scenes) > 0:
+            roots = scenes[self.json.get("scene", 0)].get("nodes", list())
+        else:  # every node that isn't a child
+            children = {child for node in nodes for child in node.get("children", list())}
+            roots = [i for i in range(len(nodes)) if i not in children]
+        out = base.LazyDict()
+        stack = [(index, matrix.Matrix4()) for index in reversed(roots)]
+        while len(stack) > 0:
+            index, parent_matrix = stack.pop()
+            node = nodes[index]
+            world_matrix = parent_matrix * self.node_matrix(node)
+            if "mesh" in node:
+                name = node.get("name", f"node_{index:03d}")
+                if name in out:
+                    name = f"{name}.{index:03d}"
+                out.loaders[name] = functools.partial(self.load_model, node["mesh"], world_matrix)
+            stack.extend(
+                (child, world_matrix)
+                for child in reversed(node.get("children", list())))
+        return out
+
+    @staticmethod
+    def node_matrix(node: Json) -> matrix.Matrix4:
+        if "matrix" in node:  # column-major
+            return matrix.Matrix4(node["matrix"]).transposed()
+        return matrix.Matrix4.compose(
+            node.get("translation", (0, 0, 0)),
+            quaternion.Quaternion(*node.get("rotation", (0, 0, 0, 1))),
+            node.get("scale", (1, 1, 1)))
+
+    def load_model(self, mesh_index: int, world_matrix: matrix.Matrix4) -> geometry.Model:
+        origin, rotation, scale = world_matrix.decompose()
+        return geometry.Model(self.mesh(mesh_index), origin, rotation.to_euler(), scale)
+
+    # DECODING
+
+    def buffer(self, index: int) -> memoryview:
+        if index not in self._buffers:
+            uri = self.json["buffers"][index].get("uri")
+            if uri is None:  # .glb BIN chunk
+                assert index == 0 and self._bin_chunk is not None, "buffer has no data"
+                offset, length = self._bin_chunk
+                try:  # NOTE: mmap is zero-copy & only reads pages we touch
+                    data = memoryview(mmap.mmap(self.stream.fileno(), 0, access=mmap.ACCESS_READ))
+                    data = data[offset:offset + length]
+                except (AttributeError, OSError, ValueError):  # not a real file
+                    self.stream.seek(offset)
+                    data = memoryview(self.stream.read(length))
+            elif uri.startswith("data:"):
+                data = memoryview(base64.b64decode(uri.partition(",")[2]))
+            else:  # external file
+                filename = urllib.parse.unquote(uri)
+                if filename not in self.friends:
+                    self.make_friends({filename: os.path.join(self.folder, filename)})
+                friend = self.friends[filename]
+                friend.stream.seek(0)
+                data = memoryview(friend.stream.read())
+            self._buffers[index] = data
+        return self._buffers[index]
+
+    def accessor(self, index: int) -> Sequence[Union[float, int]]:
+        """flat components; zero-copy memoryview when tightly packed"""
+        if index not in self._accessors:
+            self._accessors[index] = self.decode_accessor(self.json["accessors"][index])
+        return self._accessors[index]
+
+    def decode_accessor(self, accessor: Json) -> Sequence[Union[float, int]]:
+        if "sparse" in accessor:
+            raise NotImplementedError("sparse accessors are not supported")
+        format_ = component_formats[Data(accessor["componentType"])]
+        num_components = type_sizes[accessor["type"]] * accessor["count"]
+        if "bufferView" not in accessor:  # all zeroes
+            out = array.array(format_, bytes(struct.calcsize(format_) * num_components))
+        else:
+            buffer_view = self.json["bufferViews"][accessor["bufferView"]]
+            data = self.buffer(buffer_view["buffer"])
+            start = buffer_view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+            element = struct.Struct(f"<{type_sizes[accessor['type']]}{format_}")
+            stride = buffer_view.get("byteStride", element.size)
+            if stride == element.size:
+                data = data[start:start + element.size * accessor["count"]]
+                if sys.byteorder == "little":
+                    out = data.cast(format_)
+                else:
+                    out = array.array(format_, data.tobytes())
+                    out.byteswap()
+            else:  # interleaved
+                padded = struct.Struct(f"{element.format}{stride - element.size}x")
+                count = accessor["count"]
+                # NOTE: last element might not have trailing padding
+                out = array.array(format_, itertools.chain.from_iterable(
+                    padded.iter_unpack(data[start:start + stride * (count - 1)])))
+                if count > 0:
+                    out.extend(element.unpack_from(data, start + stride * (count - 1)))
+        if accessor.get("normalized", False):
+            divisor = normalised_divisors[format_]
+            out = array.array("d", [max(v / divisor, -1.0) for v in out])
+        return out
+
+    def material(self, index: int = None) -> geometry.Material:
+        if index is None:
+            return geometry.Material("default")
+        if index not in self._materials:
+            name = self.json["materials"][index].get("name", f"material_{index:03d}")
+            self._materials[index] = geometry.Material(name)
+        return self._materials[index]
+
+    def mesh(self, index: int) -> List[geometry.MeshBuffer]:
+        """a MeshBuffer for each primitive"""
+        if index not in self._meshes:
+            self._meshes[index] = [
+                self.primitive(primitive)
+                for primitive in self.json["meshes"][index]["primitives"]]
+        return self._meshes[index]
+
+    def primitive(self, primitive: Json) -> geometry.MeshBuffer:
+        mode = primitive.get("mode", 4)
+        if mode != 4:
+            raise NotImplementedError(f"only TRIANGLES (4) primitives are supported, not {mode}")
+        attributes = primitive["attributes"]
+        out = geometry.MeshBuffer(self.material(primitive.get("material")))
+        # NOTE: primitives can share vertex accessors (e.g. Gltf.from_models)
+        # -- only copy the vertices this primitive uses
+        vertices = None  # all
+        num_vertices = self.json["accessors"][attributes["POSITION"]]["count"]
+        if "indices" in primitive:
+            indices = self.accessor(primitive["indices"])
+            used = sorted(set(indices))
+            if len(used) < num_vertices:
+                vertices = used
+                num_vertices = len(used)
+                remap = {old: new for new, old in enumerate(used)}
+                indices = map(remap.__getitem__, indices)
+            out.indices = array.array("I", indices)
+        else:
+            out.indices = array.array("I", range(num_vertices))
+        out.face_offsets = array.array("I", range(0, len(out.indices) + 1, 3))
+        # vertex attributes
+        out.positions = vector.Vec3Array.from_flat(
+            self.vertex_attribute(attributes["POSITION"], vertices))
+        if "NORMAL" in attributes:
+            out.normals = vector.Vec3Array.from_flat(
+                self.vertex_attribute(attributes["NORMAL"], vertices))
+        else:
+            out.normals = vector.Vec3Array.from_flat(array.array("d", bytes(8 * 3 * num_vertices)))
+        num_uvs = 0
+        while f"TEXCOORD_{num_uvs}" in attributes:
+            out.uvs.append(vector.Vec2Array.from_flat(
+                self.vertex_attribute(attributes[f"TEXCOORD_{num_uvs}"], vertices)))
+            num_uvs += 1
+        if "COLOR_0" in attributes:
+            colours = self.vertex_attribute(attributes["COLOR_0"], vertices)
+            if len(colours) == 3 * num_vertices:  # rgb -> rgba
+                out.colours = array.array("d", [1.0] * 4 * num_vertices)
+                for i in range(3):
+                    out.colours[i::4] = colours[i::3]
+            else:
+                out.colours = colours
+        else:  # glTF default is white
+            out.colours = array.array("d", [1.0] * 4 * num_vertices)
+        return out
+
+    def vertex_attribute(self, index: int, vertices: List[int] = None) -> array.array:
+        """accessor as doubles; only the listed vertices if given"""
+        data = self.accessor(index)
+        if vertices is None:
+            return array.array("d", data)
+        size = type_sizes[self.json["accessors"][index]["type"]]
+        return array.array("d", itertools.chain.from_iterable(
+            data[i * size:(i + 1) * size]
+            for i in vertices))
 
     @classmethod
     def from_buffers(cls, buffers: List[BufferPair]) -> Gltf:
         raise NotImplementedError()
 
     @classmethod
-    def from_models(cls, filepath: str, models: base.ModelList) -> Gltf:
+    def from_models(cls, filepath: str, models: base.ModelList, deduplicate: bool = True) -> Gltf:
+        """deduplicate=False skips checking for shared vertices (faster, bigger files)"""
         out = super().from_models(filepath, models)  # sets .is_parsed
 
         # base json
@@ -276,6 +649,7 @@ class Gltf(base.SceneDescription, breki.FriendlyHybridFile):
         # -- optimising for unused vertex colour would be nice
         out.buffers = [(
             VertexBuffer(
+                deduplicate=deduplicate,
                 position="3f",
                 normal="3f",
                 # uv0="2f",
@@ -289,12 +663,10 @@ class Gltf(base.SceneDescription, breki.FriendlyHybridFile):
         mesh_offset = len(out.buffers[0][0])  # accessor index
         for i, (name, model) in enumerate(out.models.items()):
             # metadata
-            angles_quaternion = quaternion.Quaternion.from_euler(model.angles)
             out.json["nodes"].append({
                 "mesh": i,
                 "name": name,
-                "rotation": list(angles_quaternion),
-                "translation": list(model.origin)})
+                "matrix": list(model.transform_matrix.transposed())})  # column-major
             # triangles
             out.json["meshes"].append({
                 "primitives": list()})
@@ -0,0 +1,11 @@
+__all__ = [
+    "crate", "usd",
+    "Crate", "Prim", "Property", "Usd",
+    "array_chunks", "sanitise", "usd_repr"]
+
+from . import crate
+from . import usd
+
+from .crate import Crate
+from .usd import Prim, Property, Usd
+from .usd import array_chunks, sanitise, usd_repr
@@ -0,0 +1,1006 @@
+# https://github.com/PixarAnimationStudios/OpenUSD/blob/release/pxr/usd/sdf/crateFile.cpp
+# https://github.com/PixarAnimationStudios/OpenUSD/blob/release/pxr/usd/sdf/integerCoding.cpp
+from __future__ import annotations
+import array
+import collections
+import enum
+import functools
+import itertools
+import struct
+import sys
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+from ... import vector
+from .. import base
+
+
+Data = Union[bytes, memoryview]
+# ^ whole file; usually a memoryview of an mmap
+
+
+class Type(enum.Enum):
+    """ValueRep type"""
+    INVALID = 0
+    BOOL = 1
+    UCHAR = 2
+    INT = 3
+    UINT = 4
+    INT64 = 5
+    UINT64 = 6
+    HALF = 7
+    FLOAT = 8
+    DOUBLE = 9
+    STRING = 10
+    TOKEN = 11
+    ASSET_PATH = 12
+    MATRIX2D = 13
+    MATRIX3D = 14
+    MATRIX4D = 15
+    QUATD = 16
+    QUATF = 17
+    QUATH = 18
+    VEC2D = 19
+    VEC2F = 20
+    VEC2H = 21
+    VEC2I = 22
+    VEC3D = 23
+    VEC3F = 24
+    VEC3H = 25
+    VEC3I = 26
+    VEC4D = 27
+    VEC4F = 28
+    VEC4H = 29
+    VEC4I = 30
+    DICTIONARY = 31
+    TOKEN_LIST_OP = 32
+    STRING_LIST_OP = 33
+    PATH_LIST_OP = 34
+    REFERENCE_LIST_OP = 35
+    INT_LIST_OP = 36
+    INT64_LIST_OP = 37
+    UINT_LIST_OP = 38
+    UINT64_LIST_OP = 39
+    PATH_VECTOR = 40
+    TOKEN_VECTOR = 41
+    SPECIFIER = 42
+    PERMISSION = 43
+    VARIABILITY = 44
+    VARIANT_SELECTION_MAP = 45
+    TIME_SAMPLES = 46
+    PAYLOAD = 47
+    DOUBLE_VECTOR = 48
+    LAYER_OFFSET_VECTOR = 49
+    STRING_VECTOR = 50
+    VALUE_BLOCK = 51
+    VALUE = 52
+    UNREGISTERED_VALUE = 53
+    UNREGISTERED_VALUE_LIST_OP = 54
+    PAYLOAD_LIST_OP = 55
+    TIME_CODE = 56
+
+
+class SpecType(enum.Enum):
+    UNKNOWN = 0
+    ATTRIBUTE = 1
+    CONNECTION = 2
+    EXPRESSION = 3
+    MAPPER = 4
+    MAPPER_ARG = 5
+    PRIM = 6
+    PSEUDO_ROOT = 7
+    RELATIONSHIP = 8
+    RELATIONSHIP_TARGET = 9
+    VARIANT = 10
+    VARIANT_SET = 11
+
+
+type_formats = {
+    Type.BOOL: "?",
+    Type.UCHAR: "B",
+    Type.INT: "i",
+    Type.UINT: "I",
+    Type.INT64: "q",
+    Type.UINT64: "Q",
+    Type.HALF: "e",
+    Type.FLOAT: "f",
+    Type.DOUBLE: "d",
+    Type.TIME_CODE: "d",
+    Type.MATRIX2D: "4d",
+    Type.MATRIX3D: "9d",
+    Type.MATRIX4D: "16d",
+    Type.QUATD: "4d",
+    Type.QUATF: "4f",
+    Type.QUATH: "4e",
+    Type.VEC2D: "2d",
+    Type.VEC2F: "2f",
+    Type.VEC2H: "2e",
+    Type.VEC2I: "2i",
+    Type.VEC3D: "3d",
+    Type.VEC3F: "3f",
+    Type.VEC3H: "3e",
+    Type.VEC3I: "3i",
+    Type.VEC4D: "4d",
+    Type.VEC4F: "4f",
+    Type.VEC4H: "4e",
+    Type.VEC4I: "4i"}
+# ^ {Type: struct format}; little-endian
+
+array_formats = ("B", "i", "I", "q", "Q", "f", "d")
+# ^ scalar formats array.array can hold
+
+quat_types = (Type.QUATD, Type.QUATF, Type.QUATH)
+# NOTE: crate stores quaternions as (i, j, k, real)
+# -- Crate & CrateWriter values are (real, i, j, k), like .usda text & pxr.Gf.Quatf(real, imaginary)
+
+
+def text_quat(quat: Tuple[float, float, float, float]) -> Tuple[float, float, float, float]:
+    """(i, j, k, real) -> (real, i, j, k)"""
+    return (quat[3], *quat[:3])
+
+
+def crate_quat(quat: Tuple[float, float, float, float]) -> Tuple[float, float, float, float]:
+    """(real, i, j, k) -> (i, j, k, real)"""
+    return (*quat[1:], quat[0])
+
+
+specifiers = ("def", "over", "class")
+permissions = ("public", "private")
+variabilities = ("varying", "uniform")
+
+list_op_bits = {
+    "explicit_items": 1 << 1,
+    "added": 1 << 2,
+    "deleted": 1 << 3,
+    "ordered": 1 << 4,
+    "prepended": 1 << 5,
+    "appended": 1 << 6}
+# ^ ListOp header flags; bit 0 is "explicit"
+list_op_keys = ("explicit_items", "added", "prepended", "appended", "deleted", "ordered")
+# ^ order of items after the header
+
+list_op_types = (Type.TOKEN_LIST_OP, Type.PATH_LIST_OP, Type.STRING_LIST_OP, Type.REFERENCE_LIST_OP)
+# ^ list ops we can read & write
+
+reference_size = struct.calcsize("<2I2d")
+# ^ asset path (string index), prim path (path index) & layer offset (offset, scale); then custom data
+
+FIELD_SET_END = 0xFFFFFFFF
+# ^ terminates each field set
+
+
+# COMPRESSION
+
+def lz4_decompress(data: Data) -> bytes:
+    """LZ4 block format"""
+    out = bytearray()
+    i, end = 0, len(data)
+    while i < end:
+        token = data[i]
+        i += 1
+        length = token >> 4
+        if length == 15:
+            extra = 255
+            while extra == 255:
+                extra = data[i]
+                i += 1
+                length += extra
+        out += data[i:i + length]  # literals
+        i += length
+        if i >= end:  # last sequence has no match
+            break
+        offset = data[i] | data[i + 1] << 8
+        i += 2
+        if offset == 0 or offset > len(out):
+            raise ValueError("invalid LZ4 match offset")
+        length = (token & 15) + 4
+        if length == 19:
+            extra = 255
+            while extra == 255:
+                extra = data[i]
+                i += 1
+                length += extra
+        start = len(out) - offset
+        if length <= offset:
+            out += out[start:start + length]
+        else:  # overlapping match repeats the last offset bytes
+            repeats, remainder = divmod(length, offset)
+            pattern = out[start:]
+            out += pattern * repeats + pattern[:remainder]
+    return bytes(out)
+
+
+def decompress(data: Data) -> bytes:
+    """TfFastCompression; 0 chunks means one LZ4 block"""
+    num_chunks = data[0]
+    if num_chunks == 0:
+        return lz4_decompress(data[1:])
+    out = bytearray()
+    offset = 1
+    for i in range(num_chunks):
+        chunk_size = struct.unpack_from("<i", data, offset)[0]
+        offset += 4
+        out += lz4_decompress(data[offset:offset + chunk_size])
+        offset += chunk_size
+    return bytes(out)
+
+
+@functools.lru_cache(maxsize=None)
+def byte_codes(byte: int) -> Tuple[int, int, int, int]:
+    return tuple((byte >> shift) & 3 for shift in (0, 2, 4, 6))
+
+
+def decode_ints(data: Data, count: int, typecode: str = "i") -> array.array:
+    """Usd_IntegerCompression; deltas of 32-bit (iI) or 64-bit (qQ) ints"""
+    out = array.array(typecode)
+    if count == 0:
+        return out
+    wide = out.itemsize == 8
+    # NOTE: codes are 0: common delta, 1: small, 2: medium, 3: large
+    formats = (None, "<h", "<i", "<q") if wide else (None, "<b", "<h", "<i")
+    sizes = (0, 2, 4, 8) if wide else (0, 1, 2, 4)
+    common = struct.unpack_from(formats[3], data, 0)[0]
+    codes_start = sizes[3]
+    vints = codes_start + (count * 2 + 7) // 8
+    codes = [
+        code
+        for byte in data[codes_start:vints]
+        for code in byte_codes(byte)]
+    mask = (1 << (out.itemsize * 8)) - 1
+    values = list()
+    previous = 0
+    unpack_from = struct.unpack_from
+    for code in codes[:count]:
+        if code == 0:
+            previous += common
+        else:
+            previous += unpack_from(formats[code], data, vints)[0]
+            vints += sizes[code]
+        values.append(previous & mask)
+    unsigned = array.array(typecode.upper(), values)
+    out.frombytes(unsigned.tobytes())  # reinterpret as signed
+    return out
+
+
+def read_compressed_ints(data: Data, offset: int, count: int, typecode: str = "i") -> Tuple[array.array, int]:
+    """-> (ints, offset after)"""
+    compressed_size = struct.unpack_from("<Q", data, offset)[0]
+    offset += 8
+    raw = decompress(data[offset:offset + compressed_size])
+    return decode_ints(raw, count, typecode), offset + compressed_size
+
+
+def lz4_sequence(out: bytearray, literals: bytes, offset: int = 0, length: int = 0):
+    """append one LZ4 sequence; offset 0 for the final (literals only) sequence"""
+    match_length = length - 4 if offset != 0 else 0
+    out.append(min(len(literals), 15) << 4 | min(match_length, 15))
+    if len(literals) >= 15:
+        lz4_length(out, len(literals) - 15)
+    out += literals
+    if offset != 0:
+        out += struct.pack("<H", offset)
+        if match_length >= 15:
+            lz4_length(out, match_length - 15)
+
+
+def lz4_length(out: bytearray, extra: int):
+    """lengths past 15 continue in bytes of 255 & a remainder"""
+    out += b"\xFF" * (extra // 255)
+    out.append(extra % 255)
+
+
+def lz4_compress(data: bytes) -> bytes:
+    """LZ4 block format; greedy, w/ the last 4 byte match for each position"""
+    out = bytearray()
+    data = bytes(data)
+    end = len(data)
+    last_match = end - 12  # matches can't start in the last 12 bytes
+    last_literals = end - 5  # or cover the last 5 bytes
+    table = dict()
+    # ^ {4 bytes: last position}
+    anchor = i = 0
+    while i < last_match:
+        key = data[i:i + 4]
+        candidate = table.get(key, -1)
+        table[key] = i
+        if candidate == -1 or i - candidate > 0xFFFF:
+            i += 1
+            continue
+        length = 4
+        while i + length + 8 <= last_literals:  # 8 bytes at a time
+            if data[candidate + length:candidate + length + 8] != data[i + length:i + length + 8]:
+                break
+            length += 8
+        while i + length < last_literals and data[candidate + length] == data[i + length]:
+            length += 1
+        lz4_sequence(out, data[anchor:i], i - candidate, length)
+        i += length
+        anchor = i
+    lz4_sequence(out, data[anchor:])
+    return bytes(out)
+
+
+def compress(data: bytes) -> bytes:
+    """TfFastCompression; one chunk"""
+    # NOTE: chunks are only needed past ~2GB (LZ4_MAX_INPUT_SIZE)
+    return b"\x00" + lz4_compress(data)
+
+
+def encode_ints(values: Sequence[int], typecode: str = "i") -> bytes:
+    """Usd_IntegerCompression; inverse of decode_ints"""
+    if len(values) == 0:
+        return b""
+    wide = array.array(typecode).itemsize == 8
+    bits = 64 if wide else 32
+    formats = (None, "h", "i", "q") if wide else (None, "b", "h", "i")
+    sizes = (0, 2, 4, 8) if wide else (0, 1, 2, 4)
+    limits = [1 << (size * 8 - 1) if size > 0 else 0 for size in sizes]
+    half, full = 1 << (bits - 1), 1 << bits
+    deltas = list()
+    previous = 0
+    for value in values:
+        delta = (value - previous) % full  # wraps like the C++
+        deltas.append(delta - full if delta >= half else delta)
+        previous = value
+    counts = collections.Counter(deltas)
+    common = max(counts, key=lambda delta: (counts[delta], delta))
+    codes = bytearray()
+    vints = list()
+    vint_formats = list()
+    for i in range(0, len(deltas), 4):
+        byte = 0
+        for j, delta in enumerate(deltas[i:i + 4]):
+            if delta == common:
+                code = 0
+            else:
+                code = 1 if -limits[1] <= delta < limits[1] else 2 if -limits[2] <= delta < limits[2] else 3
+                vints.append(delta)
+                vint_formats.append(formats[code])
+            byte |= code << (j * 2)
+        codes.append(byte)
+    common = struct.pack("<" + formats[3], common)
+    return common + bytes(codes) + struct.pack("<" + "".join(vint_formats), *vints)
+
+
+def compressed_ints(values: Sequence[int], typecode: str = "i") -> bytes:
+    """inverse of read_compressed_ints"""
+    data = compress(encode_ints(values, typecode))
+    return struct.pack("<Q", len(data)) + data
+
+
+def little_endian(values: array.array) -> array.array:
+    """array from little-endian bytes"""
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+# ValueRep (uint64)
+# -- bit 63: array, bit 62: inlined, bit 61: compressed
+# -- bits 48-55: Type, bits 0-47: payload (inlined value or file offset)
+ARRAY = 1 << 63
+INLINED = 1 << 62
+COMPRESSED = 1 << 61
+PAYLOAD = (1 << 48) - 1
+
+
+def rep_type(rep: int) -> Type:
+    return Type((rep >> 48) & 0xFF)
+
+
+class Crate:
+    """decodes the sections of a .usdc"""
+    data: Data
+    version: Tuple[int, int, int]
+    sections: Dict[str, memoryview]
+    # ^ {"TOKENS": section_data}; slices of data (not copies)
+
+    def __init__(self, data: Data):
+        self.data = memoryview(data)
+        magic, *version, toc_offset = struct.unpack_from("<8s3B5xQ", self.data, 0)
+        if magic != b"PXR-USDC":
+            raise ValueError(f"not a .usdc: {magic!r}")
+        self.version = tuple(version)
+        if self.version < (0, 4, 0):
+            raise NotImplementedError(f"crate version {self.version} is too old (< 0.4.0)")
+        num_sections = struct.unpack_from("<Q", self.data, toc_offset)[0]
+        self.sections = dict()
+        for i in range(num_sections):
+            name, start, size = struct.unpack_from("<16s2Q", self.data, toc_offset + 8 + i * 32)
+            name = name.rstrip(b"\x00").decode()
+            self.sections[name] = self.data[start:start + size]
+
+    def __repr__(self) -> str:
+        version = ".".join(map(str, self.version))
+        return f"<{self.__class__.__name__} v{version} {len(self.specs)} specs @ 0x{id(self):016X}>"
+
+    # SECTIONS
+
+    @functools.cached_property
+    def tokens(self) -> List[str]:
+        section = self.sections["TOKENS"]
+        num_tokens, uncompressed_size, compressed_size = struct.unpack_from("<3Q", section, 0)
+        raw = decompress(section[24:24 + compressed_size])
+        return raw.decode().split("\x00")[:num_tokens]
+
+    @functools.cached_property
+    def strings(self) -> List[str]:
+        """indices into tokens"""
+        section = self.sections["STRINGS"]
+        count = struct.unpack_from("<Q", section, 0)[0]
+        indices = little_endian(array.array("I", section[8:8 + count * 4].tobytes()))
+        return [self.tokens[i] for i in indices]
+
+    @functools.cached_property
+    def fields(self) -> List[Tuple[str, int]]:
+        """[(name, ValueRep)]"""
+        section = self.sections["FIELDS"]
+        count = struct.unpack_from("<Q", section, 0)[0]
+        token_indices, offset = read_compressed_ints(section, 8, count, "I")
+        reps_size = struct.unpack_from("<Q", section, offset)[0]
+        reps = little_endian(array.array("Q", decompress(section[offset + 8:offset + 8 + reps_size])))
+        return [(self.tokens[i], rep) for i, rep in zip(token_indices, reps)]
+
+    @functools.cached_property
+    def field_sets(self) -> array.array:
+        """field indices; each set ends w/ FIELD_SET_END"""
+        section = self.sections["FIELDSETS"]
+        count = struct.unpack_from("<Q", section, 0)[0]
+        return read_compressed_ints(section, 8, count, "I")[0]
+
+    @functools.cached_property
+    def paths(self) -> List[str]:
+        section = self.sections["PATHS"]
+        num_paths, count = struct.unpack_from("<2Q", section, 0)
+        path_indices, offset = read_compressed_ints(section, 16, count, "I")
+        element_tokens, offset = read_compressed_ints(section, offset, count, "i")
+        jumps, offset = read_compressed_ints(section, offset, count, "i")
+        paths = [""] * num_paths
+        # NOTE: depth-first; jump -1: child only, -2: leaf, 0: sibling only
+        # -- > 0: child is next & sibling is at index + jump
+        stack = [(0, None)]
+        # ^ [(index, parent_path)]
+        while len(stack) > 0:
+            index, parent = stack.pop()
+            while True:
+                if parent is None:
+                    path = "/"
+                else:
+                    name = self.tokens[abs(element_tokens[index])]
+                    if element_tokens[index] < 0:  # property
+                        path = f"{parent}.{name}"
+                    else:
+                        path = f"{parent}{name}" if parent == "/" else f"{parent}/{name}"
+                paths[path_indices[index]] = path
+                jump = jumps[index]
+                has_child = jump > 0 or jump == -1
+                has_sibling = jump >= 0
+                if has_child:
+                    if has_sibling:
+                        stack.append((index + jump, parent))
+                    parent = path
+                index += 1
+                if not (has_child or has_sibling):
+                    break
+        return paths
+
+    @functools.cached_property
+    def specs(self) -> Dict[str, Tuple[SpecType, int]]:
+        """{path: (spec_type, field_set_index)}"""
+        section = self.sections["SPECS"]
+        count = struct.unpack_from("<Q", section, 0)[0]
+        path_indices, offset = read_compressed_ints(section, 8, count, "I")
+        field_set_indices, offset = read_compressed_ints(section, offset, count, "I")
+        spec_types, offset = read_compressed_ints(section, offset, count, "I")
+        return {
+            self.paths[path_index]: (SpecType(spec_type), field_set_index)
+            for path_index, field_set_index, spec_type in zip(path_indices, field_set_indices, spec_types)}
+
+    # SPECS
+
+    def spec_fields(self, path: str) -> base.LazyDict:
+        """{name: value}; values are decoded on first access"""
+        spec_type, index = self.specs[path]
+        out = base.LazyDict()
+        while self.field_sets[index] != FIELD_SET_END:
+            name, rep = self.fields[self.field_sets[index]]
+            out.loaders[name] = functools.partial(self.value, rep)
+            index += 1
+        return out
+
+    def children(self, path: str) -> List[str]:
+        """child prim paths"""
+        fields = self.spec_fields(path)
+        if "primChildren" not in fields:
+            return list()
+        prefix = "/" if path == "/" else f"{path}/"
+        return [f"{prefix}{name}" for name in fields["primChildren"]]
+
+    # VALUES
+
+    def value(self, rep: int) -> Any:
+        type_ = rep_type(rep)
+        payload = rep & PAYLOAD
+        if rep & INLINED:
+            return self.inlined_value(type_, payload)
+        elif rep & ARRAY:
+            return self.array_value(type_, payload, rep & COMPRESSED != 0)
+        return self.read_value(type_, payload)[0]
+
+    def inlined_value(self, type_: Type, payload: int) -> Any:
+        raw = payload.to_bytes(6, "little")
+        if type_ == Type.BOOL:
+            return bool(payload)
+        elif type_ in (Type.UCHAR, Type.UINT):
+            return payload
+        elif type_ == Type.INT:
+            return struct.unpack_from("<i", raw)[0]
+        elif type_ == Type.HALF:
+            return struct.unpack_from("<e", raw)[0]
+        elif type_ in (Type.FLOAT, Type.DOUBLE, Type.TIME_CODE):  # doubles are inlined as floats
+            return struct.unpack_from("<f", raw)[0]
+        elif type_ in (Type.TOKEN, Type.ASSET_PATH):
+            return self.tokens[payload]
+        elif type_ == Type.STRING:
+            return self.strings[payload]
+        elif type_ == Type.SPECIFIER:
+            return specifiers[payload]
+        elif type_ == Type.PERMISSION:
+            return permissions[payload]
+        elif type_ == Type.VARIABILITY:
+            return variabilities[payload]
+        elif type_.name.startswith("VEC"):  # int8 components
+            size = int(type_.name[3])
+            return struct.unpack_from(f"<{size}b", raw)
+        elif type_.name.startswith("MATRIX"):  # int8 diagonal
+            size = int(type_.name[6])
+            diagonal = struct.unpack_from(f"<{size}b", raw)
+            return tuple(
+                float(diagonal[r]) if r == c else 0.0
+                for r in range(size)
+                for c in range(size))
+        elif type_ == Type.DICTIONARY:
+            return dict()
+        elif type_ == Type.VALUE_BLOCK:
+            return None
+        elif type_.name.endswith("_VECTOR") or type_.name.endswith("_LIST_OP"):
+            return list()
+        raise NotImplementedError(f"cannot decode inlined {type_.name}")
+
+    def read_value(self, type_: Type, offset: int) -> Tuple[Any, int]:
+        """-> (value, offset after)"""
+        data = self.data
+        if type_ in type_formats:
+            format_ = "<" + type_formats[type_]
+            value = struct.unpack_from(format_, data, offset)
+            if type_ in quat_types:
+                value = text_quat(value)
+            return (value[0] if len(value) == 1 else value), offset + struct.calcsize(format_)
+        elif type_ in (Type.TOKEN, Type.ASSET_PATH):
+            return self.tokens[struct.unpack_from("<I", data, offset)[0]], offset + 4
+        elif type_ == Type.STRING:
+            return self.strings[struct.unpack_from("<I", data, offset)[0]], offset + 4
+        elif type_ in (Type.TOKEN_VECTOR, Type.PATH_VECTOR, Type.STRING_VECTOR):
+            return self.read_indices(type_, offset)
+        elif type_ == Type.DOUBLE_VECTOR:
+            count = struct.unpack_from("<Q", data, offset)[0]
+            values = little_endian(array.array("d", data[offset + 8:offset + 8 + count * 8].tobytes()))
+            return list(values), offset + 8 + count * 8
+        elif type_ == Type.DICTIONARY:
+            count = struct.unpack_from("<Q", data, offset)[0]
+            offset += 8
+            out = dict()
+            for i in range(count):
+                key = self.strings[struct.unpack_from("<I", data, offset)[0]]
+                # NOTE: values are ValueReps at an offset relative to the offset itself
+                relative = struct.unpack_from("<q", data, offset + 4)[0]
+                rep = struct.unpack_from("<Q", data, offset + 4 + relative)[0]
+                out[key] = self.value(rep)
+                offset += 12
+            return out, offset
+        elif type_ == Type.VARIANT_SELECTION_MAP:
+            count = struct.unpack_from("<Q", data, offset)[0]
+            pairs = struct.unpack_from(f"<{count * 2}I", data, offset + 8)
+            out = {
+                self.strings[pairs[i]]: self.strings[pairs[i + 1]]
+                for i in range(0, len(pairs), 2)}
+            return out, offset + 8 + count * 8
+        elif type_ in list_op_types:
+            return self.read_list_op(type_, offset)
+        raise NotImplementedError(f"cannot decode {type_.name}")
+
+    def read_indices(self, type_: Type, offset: int) -> Tuple[List[Any], int]:
+        """vector of token, path or string indices; or references"""
+        count = struct.unpack_from("<Q", self.data, offset)[0]
+        if type_ == Type.REFERENCE_LIST_OP:
+            return self.read_references(count, offset + 8)
+        indices = struct.unpack_from(f"<{count}I", self.data, offset + 8)
+        if type_ in (Type.TOKEN_VECTOR, Type.TOKEN_LIST_OP):
+            lookup = self.tokens
+        elif type_ in (Type.PATH_VECTOR, Type.PATH_LIST_OP):
+            lookup = self.paths
+        else:
+            lookup = self.strings
+        return [lookup[i] for i in indices], offset + 8 + count * 4
+
+    def read_references(self, count: int, offset: int) -> Tuple[List[Tuple[str, str]], int]:
+        """[(asset path, prim path)]"""
+        # NOTE: layer offsets & custom data are skipped
+        out = list()
+        for i in range(count):
+            asset_path, prim_path = struct.unpack_from("<2I", self.data, offset)
+            custom_data, offset = self.read_value(Type.DICTIONARY, offset + reference_size)
+            out.append((self.strings[asset_path], self.paths[prim_path]))
+        return out, offset
+
+    def read_list_op(self, type_: Type, offset: int) -> Tuple[Dict[str, Any], int]:
+        """{"explicit": bool, "prepended": [...], ...}"""
+        header = self.data[offset]
+        offset += 1
+        out = {"explicit": bool(header & 1)}
+        for key in list_op_keys:  # in file order
+            if header & list_op_bits[key]:
+                out[key], offset = self.read_indices(type_, offset)
+        return out, offset
+
+    def array_value(self, type_: Type, offset: int, compressed: bool) -> Union[array.array, List[Any]]:
+        """scalars -> array.array; vectors -> [tuple]"""
+        data = self.data
+        if offset == 0:  # empty
+            return array.array(type_formats[type_]) if type_formats.get(type_) in array_formats else list()
+        if self.version < (0, 7, 0):
+            count = struct.unpack_from("<I", data, offset)[0]
+            offset += 4
+        else:
+            count = struct.unpack_from("<Q", data, offset)[0]
+            offset += 8
+        if type_ in (Type.TOKEN, Type.STRING, Type.ASSET_PATH):
+            lookup = self.strings if type_ == Type.STRING else self.tokens
+            return [lookup[i] for i in struct.unpack_from(f"<{count}I", data, offset)]
+        format_ = type_formats[type_]
+        if compressed and type_ in (Type.INT, Type.UINT, Type.INT64, Type.UINT64):
+            return read_compressed_ints(data, offset, count, format_)[0]
+        elif compressed and type_ in (Type.HALF, Type.FLOAT, Type.DOUBLE):
+            code = bytes(data[offset:offset + 1])
+            if code == b"i":  # whole numbers
+                ints = read_compressed_ints(data, offset + 1, count, "i")[0]
+                return array.array("d" if type_ == Type.DOUBLE else "f", ints)
+            elif code == b"t":  # lookup table
+                table_size = struct.unpack_from("<I", data, offset + 1)[0]
+                table = struct.unpack_from(f"<{table_size}{format_}", data, offset + 5)
+                table_end = offset + 5 + table_size * struct.calcsize(format_)
+                indices = read_compressed_ints(data, table_end, count, "I")[0]
+                return array.array("d" if type_ == Type.DOUBLE else "f", [table[i] for i in indices])
+            raise NotImplementedError(f"unknown float compression: {code!r}")
+        size = struct.calcsize("<" + format_)
+        raw = data[offset:offset + count * size]
+        if format_ in array_formats:
+            return little_endian(array.array(format_, raw.tobytes()))
+        elif len(format_) == 1:  # bool & half
+            return [value for value, in struct.iter_unpack("<" + format_, raw)]
+        elif type_ in quat_types:
+            return list(map(text_quat, struct.iter_unpack("<" + format_, raw)))
+        return list(struct.iter_unpack("<" + format_, raw))
+
+
+# WRITING
+
+usda_types = {
+    "bool": Type.BOOL,
+    "uchar": Type.UCHAR,
+    "int": Type.INT,
+    "uint": Type.UINT,
+    "int64": Type.INT64,
+    "uint64": Type.UINT64,
+    "half": Type.HALF,
+    "float": Type.FLOAT,
+    "double": Type.DOUBLE,
+    "timecode": Type.TIME_CODE,
+    "string": Type.STRING,
+    "token": Type.TOKEN,
+    "asset": Type.ASSET_PATH,
+    "matrix2d": Type.MATRIX2D,
+    "matrix3d": Type.MATRIX3D,
+    "matrix4d": Type.MATRIX4D,
+    "quatd": Type.QUATD,
+    "quatf": Type.QUATF,
+    "quath": Type.QUATH,
+    "double2": Type.VEC2D,
+    "float2": Type.VEC2F,
+    "half2": Type.VEC2H,
+    "int2": Type.VEC2I,
+    "double3": Type.VEC3D,
+    "float3": Type.VEC3F,
+    "half3": Type.VEC3H,
+    "int3": Type.VEC3I,
+    "double4": Type.VEC4D,
+    "float4": Type.VEC4F,
+    "half4": Type.VEC4H,
+    "int4": Type.VEC4I,
+    "point3f": Type.VEC3F,
+    "point3d": Type.VEC3D,
+    "normal3f": Type.VEC3F,
+    "normal3d": Type.VEC3D,
+    "vector3f": Type.VEC3F,
+    "vector3d": Type.VEC3D,
+    "color3f": Type.VEC3F,
+    "color3d": Type.VEC3D,
+    "color4f": Type.VEC4F,
+    "texCoord2f": Type.VEC2F,
+    "texCoord2d": Type.VEC2D,
+    "texCoord3f": Type.VEC3F}
+# ^ {"typeName": Type}; w/o "[]"
+
+Field = Tuple[Type, Any]
+# ^ (type, value); lists & arrays of scalar types are written as arrays
+
+MIN_COMPRESSED_ARRAY = 16
+# ^ shorter int arrays aren't worth compressing
+
+
+class CrateWriter:
+    """builds a .usdc from specs"""
+    # NOTE: write-only; deduplicates tokens, strings, paths, fields & field sets
+    tokens: Dict[str, int]
+    # ^ {token: index}
+    strings: Dict[str, int]
+    # ^ {string: index}; each string is also a token
+    paths: Dict[str, int]
+    # ^ {path: index}
+    fields: Dict[Tuple[int, int], int]
+    # ^ {(token index, ValueRep): index}
+    field_sets: Dict[Tuple[int, ...], int]
+    # ^ {(field index, ...): start}
+    specs: Dict[str, Tuple[SpecType, int]]
+    # ^ {path: (spec_type, field set start)}
+    values: bytearray
+    # ^ everything after the 88 byte bootstrap header & before the sections
+    version: Tuple[int, int, int] = (0, 8, 0)
+
+    def __init__(self):
+        # NOTE: token 0 is a placeholder; -0 can't mark a property path
+        self.tokens = {";-)": 0}
+        self.strings = dict()
+        self.paths = dict()
+        self.fields = dict()
+        self.field_sets = dict()
+        self.specs = dict()
+        self.values = bytearray()
+        self._field_sets_length = 0
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {len(self.specs)} specs @ 0x{id(self):016X}>"
+
+    def token(self, token: str) -> int:
+        return self.tokens.setdefault(token, len(self.tokens))
+
+    def string(self, string: str) -> int:
+        self.token(string)
+        return self.strings.setdefault(string, len(self.strings))
+
+    def path(self, path: str) -> int:
+        return self.paths.setdefault(path, len(self.paths))
+
+    def add_spec(self, path: str, spec_type: SpecType, fields: Dict[str, Field]):
+        self.path(path)
+        field_indices = tuple(
+            self.fields.setdefault((self.token(name), self.pack(*field)), len(self.fields))
+            for name, field in fields.items())
+        if field_indices not in self.field_sets:
+            self.field_sets[field_indices] = self._field_sets_length
+            self._field_sets_length += len(field_indices) + 1
+        self.specs[path] = (spec_type, self.field_sets[field_indices])
+
+    # VALUES
+
+    def offset(self) -> int:
+        """file offset of the next value; 8 byte aligned"""
+        self.values += bytes(-len(self.values) % 8)
+        return 88 + len(self.values)
+
+    def pack(self, type_: Type, value: Any) -> int:
+        """-> ValueRep"""
+        type_bits = type_.value << 48
+        if isinstance(value, (list, array.array, vector.Vec2Array, vector.Vec3Array)) and (
+                type_ in type_formats or type_ in (Type.TOKEN, Type.STRING, Type.ASSET_PATH)):
+            if len(value) == 0:
+                return ARRAY | type_bits
+            offset, compressed = self.write_array(type_, value)
+            return ARRAY | (COMPRESSED if compressed else 0) | type_bits | offset
+        inlined = self.inline(type_, value)
+        if inlined is not None:
+            return INLINED | type_bits | inlined
+        offset = self.offset()
+        self.values += self.value_bytes(type_, value)
+        return type_bits | offset
+
+    def inline(self, type_: Type, value: Any) -> Union[int, None]:
+        """payload if value fits in a ValueRep"""
+        if type_ in (Type.BOOL, Type.UCHAR, Type.UINT):
+            return int(value)
+        elif type_ == Type.INT:
+            return value & 0xFFFFFFFF
+        elif type_ == Type.HALF:
+            return struct.unpack("<H", struct.pack("<e", value))[0]
+        elif type_ == Type.FLOAT:
+            return struct.unpack("<I", struct.pack("<f", value))[0]
+        elif type_ in (Type.DOUBLE, Type.TIME_CODE):  # if float32 is exact
+            if struct.unpack("<f", struct.pack("<f", value))[0] == value:
+                return struct.unpack("<I", struct.pack("<f", value))[0]
+        elif type_ in (Type.TOKEN, Type.ASSET_PATH):
+            return self.token(value)
+        elif type_ == Type.STRING:
+            return self.string(value)
+        elif type_ == Type.SPECIFIER:
+            return specifiers.index(value)
+        elif type_ == Type.PERMISSION:
+            return permissions.index(value)
+        elif type_ == Type.VARIABILITY:
+            return variabilities.index(value)
+        elif type_.name.startswith("VEC") and all(v == int(v) and -128 <= v < 128 for v in value):
+            return int.from_bytes(struct.pack(f"<{len(value)}b", *map(int, value)), "little")
+        return None
+
+    def value_bytes(self, type_: Type, value: Any) -> bytes:
+        """not inlined; written at an offset"""
+        if type_ in quat_types:
+            return struct.pack("<" + type_formats[type_], *crate_quat(value))
+        elif type_ in type_formats:
+            return struct.pack("<" + type_formats[type_], *(value if isinstance(value, tuple) else (value,)))
+        elif type_ in (Type.TOKEN_VECTOR, Type.PATH_VECTOR, Type.STRING_VECTOR):
+            return self.index_bytes(type_, value)
+        elif type_ == Type.DOUBLE_VECTOR:
+            return struct.pack(f"<Q{len(value)}d", len(value), *value)
+        elif type_ in list_op_types:
+            header = 1 if value.get("explicit", False) else 0
+            for key, bit in list_op_bits.items():
+                if key in value:
+                    header |= bit
+            return bytes([header]) + b"".join(
+                self.index_bytes(type_, value[key])
+                for key in list_op_keys
+                if key in value)
+        raise NotImplementedError(f"cannot write {type_.name}")
+
+    def index_bytes(self, type_: Type, values: List[Any]) -> bytes:
+        """vector of token, path or string indices; or references"""
+        if type_ == Type.REFERENCE_LIST_OP:  # [(asset path, prim path)]
+            return struct.pack("<Q", len(values)) + b"".join(
+                struct.pack("<2I2dQ", self.string(asset_path), self.path(prim_path), 0.0, 1.0, 0)
+                for asset_path, prim_path in values)
+        if type_ in (Type.TOKEN_VECTOR, Type.TOKEN_LIST_OP):
+            indices = [self.token(value) for value in values]
+        elif type_ in (Type.PATH_VECTOR, Type.PATH_LIST_OP):
+            indices = [self.path(value) for value in values]
+        else:
+            indices = [self.string(value) for value in values]
+        return struct.pack(f"<Q{len(indices)}I", len(indices), *indices)
+
+    def write_array(self, type_: Type, values: Any) -> Tuple[int, bool]:
+        """-> (offset, compressed)"""
+        offset = self.offset()
+        self.values += struct.pack("<Q", len(values))
+        if type_ in (Type.TOKEN, Type.ASSET_PATH):
+            self.values += struct.pack(f"<{len(values)}I", *map(self.token, values))
+            return offset, False
+        elif type_ == Type.STRING:
+            self.values += struct.pack(f"<{len(values)}I", *map(self.string, values))
+            return offset, False
+        format_ = type_formats[type_]
+        if format_ in ("i", "I", "q", "Q") and len(values) >= MIN_COMPRESSED_ARRAY:
+            self.values += compressed_ints(values, format_)
+            return offset, True
+        if type_ in quat_types:
+            flat = list(itertools.chain.from_iterable(map(crate_quat, values)))
+        elif isinstance(values, (vector.Vec2Array, vector.Vec3Array)):
+            flat = values.data
+        elif isinstance(values, array.array) or len(format_) == 1:
+            flat = values
+        else:
+            flat = list(itertools.chain.from_iterable(values))
+        base_format = format_[-1]
+        if base_format in array_formats:
+            flat = array.array(base_format, flat)
+            if sys.byteorder == "big":
+                flat.byteswap()
+            self.values += flat.tobytes()
+        else:  # bool & half
+            self.values += struct.pack(f"<{len(flat)}{base_format}", *flat)
+        return offset, False
+
+    # SECTIONS
+
+    def path_tree(self) -> Tuple[List[int], List[int], List[int]]:
+        """(path indices, element tokens, jumps) in depth-first order"""
+        children = collections.defaultdict(list)
+        # ^ {parent: [child]}
+        elements = dict()
+        # ^ {path: element token}; negative for properties
+        for path in list(self.paths):  # NOTE: adds missing ancestors
+            while path != "/" and path not in elements:
+                parent, dot, name = path.rpartition(".")
+                if dot == "" or "/" in name:  # prim
+                    parent, slash, name = path.rpartition("/")
+                    parent = parent or "/"
+                    elements[path] = self.token(name)
+                else:
+                    elements[path] = -self.token(name)
+                self.path(parent)
+                children[parent].append(path)
+                path = parent
+        path_indices, element_tokens, jumps = list(), list(), list()
+
+        def visit(path: str, has_sibling: bool) -> int:
+            """-> size of subtree"""
+            index = len(path_indices)
+            path_indices.append(self.paths[path])
+            element_tokens.append(elements.get(path, 0))
+            jumps.append(None)
+            size = 1
+            for i, child in enumerate(children[path]):
+                size += visit(child, i < len(children[path]) - 1)
+            has_child = len(children[path]) > 0
+            # NOTE: -1: child only, -2: leaf, 0: sibling only, > 0: both
+            if has_child:
+                jumps[index] = size if has_sibling else -1
+            else:
+                jumps[index] = 0 if has_sibling else -2
+            return size
+
+        self.path("/")
+        visit("/", False)
+        return path_indices, element_tokens, jumps
+
+    def sections(self) -> Dict[str, bytes]:
+        """{name: data}; in file order"""
+        # NOTE: PATHS & FIELDS can add tokens, so TOKENS is built last
+        path_indices, element_tokens, jumps = self.path_tree()
+        paths = b"".join([
+            struct.pack("<2Q", len(self.paths), len(path_indices)),
+            compressed_ints(path_indices, "I"),
+            compressed_ints(element_tokens, "i"),
+            compressed_ints(jumps, "i")])
+        specs = list(self.specs.items())
+        specs = b"".join([
+            struct.pack("<Q", len(specs)),
+            compressed_ints([self.paths[path] for path, spec in specs], "I"),
+            compressed_ints([field_set for path, (spec_type, field_set) in specs], "I"),
+            compressed_ints([spec_type.value for path, (spec_type, field_set) in specs], "I")])
+        field_sets = [
+            index
+            for field_set in self.field_sets
+            for index in (*field_set, FIELD_SET_END)]
+        field_sets = struct.pack("<Q", len(field_sets)) + compressed_ints(field_sets, "I")
+        reps = array.array("Q", [rep for token, rep in self.fields])
+        if sys.byteorder == "big":
+            reps.byteswap()
+        reps = compress(reps.tobytes())
+        fields = b"".join([
+            struct.pack("<Q", len(self.fields)),
+            compressed_ints([token for token, rep in self.fields], "I"),
+            struct.pack("<Q", len(reps)), reps])
+        strings = struct.pack(f"<Q{len(self.strings)}I", len(self.strings), *map(self.tokens.get, self.strings))
+        raw_tokens = "".join(f"{token}\x00" for token in self.tokens).encode()
+        compressed_tokens = compress(raw_tokens)
+        tokens = struct.pack("<3Q", len(self.tokens), len(raw_tokens), len(compressed_tokens)) + compressed_tokens
+        return {
+            "TOKENS": tokens,
+            "STRINGS": strings,
+            "FIELDS": fields,
+            "FIELDSETS": field_sets,
+            "PATHS": paths,
+            "SPECS": specs}
+
+    def as_bytes(self) -> bytes:
+        sections = self.sections()
+        out = bytearray(88)  # bootstrap header
+        out += self.values
+        toc = [struct.pack("<Q", len(sections))]
+        for name, data in sections.items():
+            out += bytes(-len(out) % 8)
+            toc.append(struct.pack("<16s2Q", name.encode(), len(out), len(data)))
+            out += data
+        out += bytes(-len(out) % 8)
+        toc_offset = len(out)
+        out += b"".join(toc)
+        out[:88] = struct.pack("<8s3B5xQ64x", b"PXR-USDC", *self.version, toc_offset)
+        return bytes(out)
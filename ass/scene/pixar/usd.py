@@ -0,0 +1,1053 @@
+# https://openusd.org/release/glossary.html
+from __future__ import annotations
+import array
+import ast
+import collections
+import functools
+import itertools
+import json
+import mmap
+import re
+from typing import Any, Dict, Generator, Iterable, Iterator, List, TextIO, Tuple, Union
+
+from ... import geometry
+from ... import vector
+from .. import base
+from . import crate
+
+import breki
+from breki.files.parsed import parse_first
+
+
+reference_pattern = re.compile(r"@(.*)@(?:<(.*)>)?|<(.*)>")
+
+list_operations = {
+    "add": "added",
+    "append": "appended",
+    "delete": "deleted",
+    "prepend": "prepended",
+    "reorder": "ordered"}
+# ^ {operation: list op key}
+
+
+def sanitise(name: str) -> str:
+    for bad_char in ".{}- ":
+        name = name.replace(bad_char, "_")
+    if name[0].isdigit():  # no leading digits
+        name = f"_{name}"
+    name = name.replace("\\", "/")
+    if "/" in name:  # "foliage/tree01" -> "tree01" etc.
+        name = name.rpartition("/")[-1]
+    # TODO: use nested nodes instead of trimming
+    # NOTE: blender might create namespace collision
+    return name
+
+
+def usd_repr(value: Any) -> str:
+    # NOTE: assumes lists of vectors will be converted beforehand
+    if isinstance(value, list) and any(isinstance(v, (str, bool)) for v in value):
+        return f"[{', '.join(map(usd_repr, value))}]"
+    elif isinstance(value, str):
+        if reference_pattern.fullmatch(value) is not None:
+            return value
+        else:
+            return f'"{sanitise(value)}"'
+    elif isinstance(value, bool):
+        return "true" if value else "false"
+    elif isinstance(value, (vector.vec2, vector.vec3)):
+        return repr(tuple(value))
+    else:
+        return repr(value)
+
+
+bulk_arrays = {
+    f"{name}[]": ("q" if format_[-1] in "BiIqQ" else "d", int(format_[:-1] or 1))
+    for name, format_ in (
+        (name, crate.type_formats.get(type_, "?"))
+        for name, type_ in crate.usda_types.items())
+    if format_ != "?" and not name.startswith("matrix")}
+# ^ {"point3f[]": (typecode, components)}
+# NOTE: parsed w/o tokenizing each number & formatted by array_chunks
+# -- matrices are nested tuples; left to ast.literal_eval & usd_repr
+
+
+def flat_array(values: Any, size: int, typecode: str = "d") -> array.array:
+    """flat components of a list of vectors / tuples"""
+    if isinstance(values, (vector.Vec2Array, vector.Vec3Array)):
+        return values.data
+    elif isinstance(values, array.array):
+        return values  # assumed flat
+    elif size > 1:
+        return array.array(typecode, itertools.chain.from_iterable(values))
+    else:
+        return array.array(typecode, values)
+
+
+def array_chunks(type_: str, values: Any, float_format: str = "%r", batch_size: int = 4096) -> Iterator[str]:
+    """usda text for an array; batch_size elements at a time"""
+    typecode, size = bulk_arrays[type_.rpartition(" ")[-1]]  # w/o qualifiers
+    value_format = "%d" if typecode == "q" else float_format
+    flat = flat_array(values, size, typecode)
+    if size == 1:
+        element = value_format
+    else:
+        element = "(" + ", ".join([value_format] * size) + ")"
+    step = batch_size * size
+    yield "["
+    for start in range(0, len(flat), step):
+        batch = flat[start:start + step]
+        text = ", ".join([element] * (len(batch) // size)) % tuple(batch)
+        yield text if start == 0 else ", " + text
+    yield "]"
+
+
+def is_uv(name: str, type_name: str) -> bool:
+    """texCoord2f[] attributes & float2[] primvars"""
+    # NOTE: the texCoord role is optional (e.g. "float2[] primvars:st")
+    if type_name == "texCoord2f[]":
+        return True
+    return type_name == "float2[]" and name.startswith("primvars:")
+
+
+def crate_field(value: Any) -> crate.Field:
+    """(Type, value) for a metadata value"""
+    if isinstance(value, bool):
+        return crate.Type.BOOL, value
+    elif isinstance(value, int):
+        return crate.Type.INT, value
+    elif isinstance(value, float):
+        return crate.Type.DOUBLE, value
+    elif isinstance(value, str):
+        return crate.Type.TOKEN, value
+    elif isinstance(value, list) and all(isinstance(v, str) for v in value):
+        return crate.Type.TOKEN_VECTOR, value
+    raise NotImplementedError(f"cannot convert {type(value).__name__} to a crate field")
+
+
+def reference(text: str) -> Tuple[str, str]:
+    """"@asset.usd@</prim>" -> ("asset.usd", "/prim")"""
+    match = reference_pattern.fullmatch(text)
+    if match is None:
+        raise ValueError(f"invalid reference: {text!r}")
+    asset_path, asset_prim_path, prim_path = match.groups()
+    return asset_path or "", asset_prim_path or prim_path or ""
+
+
+def crate_metadata(metadata: Dict[str, Any]) -> Dict[str, crate.Field]:
+    """"prepend apiSchemas" etc. become list ops"""
+    out = dict()
+    for name, value in metadata.items():
+        operation, space, list_name = name.partition(" ")
+        if operation in ("prepend", "append", "delete") and space != "":
+            key = list_operations[operation]
+            values = [value] if isinstance(value, str) else value
+            if list_name == "references":
+                list_op = out.setdefault(list_name, (crate.Type.REFERENCE_LIST_OP, {"explicit": False}))[1]
+                list_op[key] = [reference(v) for v in values]
+            else:
+                list_op = out.setdefault(list_name, (crate.Type.TOKEN_LIST_OP, {"explicit": False}))[1]
+                list_op[key] = [sanitise(v) for v in values]
+        else:
+            out[name] = crate_field(value)
+    return out
+
+
+def index_values(values: Iterable[Any]) -> Tuple[List[Any], array.array]:
+    """(unique values, index of each value)"""
+    lookup = dict()
+    # ^ {value: index}
+    indices = array.array("q", [
+        lookup.setdefault(value, len(lookup))
+        for value in values])
+    return list(lookup), indices
+
+
+def indexed_primvar(type_: str, name: str, values: List[Any], indices: array.array) -> List[Property]:
+    """faceVarying primvar w/ :indices"""
+    return [
+        Property(type_, f"primvars:{name}", values, interpolation="faceVarying"),
+        Property("int[]", f"primvars:{name}:indices", indices)]
+
+
+# TEXT PARSER
+
+token_pattern = re.compile("".join([
+    r"(?:\s+|#[^\n]*)*",  # whitespace & comments
+    "(?:", "|".join([
+        r"(?P<array>\[(?=\s*(?:[-+\d.(\]]|inf|nan)))",  # numbers only; read up to "]" w/ str.find
+        r'(?P<string>"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\')',
+        r"(?P<asset>@@@[\s\S]*?@@@|@[^@\n]*@)",
+        r"(?P<path><[^<>\n]*>)",
+        r"(?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|[-+]?inf\b|nan\b)",
+        r"(?P<word>[A-Za-z_][\w:.]*(?:\[\])?)",
+        r"(?P<symbol>[=()\[\]{},:;])",
+        r"(?P<end>\Z)"]), ")"]))
+# ^ numeric arrays are one token
+
+separators = str.maketrans("(),", "   ")
+
+qualifiers = ("config", "custom", "uniform", "varying")
+
+
+class Tokenizer:
+    """.usda tokens; numeric arrays are read in bulk"""
+    text: str
+    position: int
+    # ^ end of the current token
+    kind: str
+    # ^ "array", "string", "asset", "path", "number", "word", "symbol" or "end"
+    token: str
+
+    def __init__(self, text: str, position: int = 0):
+        self.text = text
+        self._match = token_pattern.scanner(text, position).match
+        self.position = position
+        self.advance()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} line {self.line()} @ 0x{id(self):016X}>"
+
+    def line(self) -> int:
+        return self.text.count("\n", 0, self.position) + 1
+
+    def advance(self):
+        match = self._match()
+        if match is None:
+            raise ValueError(f"line {self.line()}: unexpected {self.text[self.position:self.position + 16]!r}")
+        self.kind = match.lastgroup
+        self.position = match.end()
+        if self.kind == "array":  # skip to the closing bracket
+            start = match.start(self.kind)
+            self.position = self.text.find("]", start) + 1
+            if self.position == 0:
+                raise ValueError(f"line {self.line()}: unclosed array")
+            self.token = self.text[start:self.position]
+            self._match = token_pattern.scanner(self.text, self.position).match
+        else:
+            self.token = match.group(self.kind)
+
+    def peek(self) -> Tuple[str, str]:
+        """-> (kind, token)"""
+        return self.kind, self.token
+
+    def next(self) -> Tuple[str, str]:
+        out = (self.kind, self.token)
+        self.advance()
+        return out
+
+    def expect(self, expected: str) -> str:
+        if self.token != expected or self.kind != "symbol":
+            raise ValueError(f"line {self.line()}: expected {expected!r}, got {self.token!r}")
+        self.advance()
+        return expected
+
+    def accept(self, expected: str) -> bool:
+        """consume the next token if it matches"""
+        if self.token == expected and self.kind == "symbol":
+            self.advance()
+            return True
+        return False
+
+    # VALUES
+
+    def value(self, type_: str = None) -> Any:
+        kind, token = self.next()
+        if kind == "array":
+            if type_ in bulk_arrays:
+                return bulk_array(token, *bulk_arrays[type_])
+            return ast.literal_eval(token)
+        elif kind == "number":
+            if token.lstrip("+-").isdigit():
+                return int(token)
+            return float(token)
+        elif kind == "string":
+            if "\\" in token or token[:3] in ('"""', "\'\'\'"):
+                return ast.literal_eval(token)
+            return token[1:-1]
+        elif kind == "asset":
+            if self.kind == "path":  # @asset.usd@</prim>
+                return token + self.next()[1]
+            return token
+        elif kind == "path":
+            return token
+        elif kind == "word":
+            return {"true": True, "false": False, "None": None}.get(token, token)
+        elif kind == "symbol" and token in "[(":
+            closer = "]" if token == "[" else ")"
+            values = list()
+            while not self.accept(closer):
+                values.append(self.value())
+                if not self.accept(","):
+                    self.expect(closer)
+                    break
+            return values if token == "[" else tuple(values)
+        elif kind == "symbol" and token == "{":
+            return self.dictionary()
+        raise ValueError(f"line {self.line()}: unexpected {token!r}")
+
+    def dictionary(self) -> Dict[Any, Any]:
+        """{string key = "value"} or {time: value} (timeSamples); "{" already read"""
+        out = dict()
+        while not self.accept("}"):
+            kind, token = self.next()
+            if kind == "number":  # timeSample
+                self.expect(":")
+                out[float(token)] = self.value()
+                self.accept(",")
+                continue
+            words = [token]  # type & key
+            while not self.accept("="):
+                words.append(self.next()[1])
+            type_, key = words[0], words[-1]
+            if key[0] in "\"'":
+                key = ast.literal_eval(key)
+            out[key] = self.dictionary() if self.accept("{") else self.value(type_)
+            self.accept(";")
+        return out
+
+    def metadata(self) -> Dict[str, Any]:
+        """( key = value ... ); "(" already read"""
+        out = dict()
+        while not self.accept(")"):
+            kind, token = self.next()
+            if kind == "string":  # doc string
+                out["doc"] = ast.literal_eval(token)
+                continue
+            name = token
+            if token in list_operations:
+                name = f"{token} {self.next()[1]}"
+            if self.accept("="):
+                out[name] = self.value()
+            else:  # "kind" w/o a value etc.
+                out[name] = None
+            self.accept(";")
+        return out
+
+
+def bulk_array(text: str, typecode: str, size: int, window: int = 1 << 20) -> Any:
+    """"[(0, 1, 2), ...]" -> array / VecArray; window characters at a time"""
+    convert = int if typecode == "q" else float
+    flat = array.array(typecode)
+    start, stop = 1, len(text) - 1  # inside [ ]
+    while start < stop:
+        cut = text.rfind(",", start, start + window) if start + window < stop else stop
+        cut = stop if cut <= start else cut
+        if typecode == "q" and size == 1:  # NOTE: json parses ints faster than int()
+            flat.extend(json.loads(f"[{text[start:cut]}]"))
+        else:
+            flat.extend(map(convert, text[start:cut].translate(separators).split()))
+        start = cut + 1
+    if len(flat) % size != 0:
+        raise ValueError(f"array of {size} component values has {len(flat)} components")
+    if size == 1:
+        return flat
+    elif size == 2 and typecode == "d":
+        return vector.Vec2Array.from_flat(flat)
+    elif size == 3 and typecode == "d":
+        return vector.Vec3Array.from_flat(flat)
+    return list(zip(*[iter(flat)] * size))
+
+
+class Prim:
+    """USD Data Node"""
+    type_: str
+    name: str
+    metadata: Dict[str, Any]
+    properties: List[Property]
+    children: List[Prim]
+    specifier: str
+    # ^ "def", "over" or "class"
+
+    def __init__(self, type_, name, metadata={}, properties=[], children=[], specifier="def"):
+        self.type_ = type_
+        self.name = sanitise(name)
+        self.metadata = metadata
+        self.properties = properties
+        self.children = children
+        self.specifier = specifier
+
+    def __repr__(self) -> str:
+        descriptor = f'{self.type_} "{self.name}"'
+        return f"<{self.__class__.__name__} {descriptor} @ 0x{id(self):016X}>"
+
+    def as_lines(self, depth: int = 0) -> Generator[str, None, None]:
+        yield from base.chunk_lines(self.chunks(depth))
+
+    def chunks(self, depth: int = 0, float_format: str = "%r") -> Iterator[str]:
+        """text w/ depth indents; each line ends w/ a newline"""
+        # NOTE: walks child prims w/ a stack, not recursion
+        # -- each nested `yield from` would cost every chunk another hop
+        stack: List[Tuple[Union[Prim, str], int]] = [(self, depth)]
+        while len(stack) > 0:
+            prim, depth = stack.pop()
+            if isinstance(prim, str):
+                yield prim
+                continue
+            yield from prim.header_chunks(depth, float_format)
+            stack.append((f"{base.indent(depth)}}}\n", depth))
+            for i, child in reversed(list(enumerate(prim.children))):
+                stack.append((child, depth + 1))
+                if i > 0:
+                    stack.append(("\n", depth))  # newline
+            if len(prim.properties) > 0 and len(prim.children) > 0:
+                stack.append(("\n", depth))  # newline
+
+    def header_chunks(self, depth: int = 0, float_format: str = "%r") -> Iterator[str]:
+        """specifier, metadata & properties; w/o children or closing brace"""
+        prefix = base.indent(depth)
+        header = " ".join(filter(None, [self.specifier, self.type_, f'"{self.name}"']))
+        if len(self.metadata) > 0:
+            yield f"{prefix}{header} (\n"
+            for name, value in self.metadata.items():
+                yield f"{prefix}    {name} = {usd_repr(value)}\n"
+            yield f"{prefix})\n"
+        else:
+            yield f"{prefix}{header}\n"
+        yield f"{prefix}{{\n"
+        for property_ in self.properties:
+            yield from property_.chunks(depth + 1, float_format)
+
+    def add_specs(self, writer: crate.CrateWriter, parent: str = "/"):
+        """add this prim, its properties & its children to a .usdc"""
+        path = f"{parent}{self.name}" if parent == "/" else f"{parent}/{self.name}"
+        fields = {
+            "specifier": (crate.Type.SPECIFIER, self.specifier),
+            "typeName": (crate.Type.TOKEN, self.type_),
+            **crate_metadata(self.metadata)}
+        if len(self.properties) > 0:
+            fields["properties"] = (crate.Type.TOKEN_VECTOR, [property_.name for property_ in self.properties])
+        if len(self.children) > 0:
+            fields["primChildren"] = (crate.Type.TOKEN_VECTOR, [child.name for child in self.children])
+        writer.add_spec(path, crate.SpecType.PRIM, fields)
+        for property_ in self.properties:
+            property_.add_spec(writer, path)
+        for child in self.children:
+            child.add_specs(writer, path)
+
+    @classmethod
+    def from_lines(cls, lines: List[str]) -> Prim:
+        return cls.from_tokens(Tokenizer("\n".join(lines)))
+
+    @classmethod
+    def from_tokens(cls, tokens: Tokenizer) -> Prim:
+        specifier = tokens.next()[1]
+        if specifier not in crate.specifiers:
+            raise ValueError(f"line {tokens.line()}: expected a prim, got {specifier!r}")
+        type_ = ""
+        kind, token = tokens.next()
+        if kind == "word":
+            type_ = token
+            kind, token = tokens.next()
+        if kind != "string":
+            raise ValueError(f"line {tokens.line()}: expected a prim name, got {token!r}")
+        name = ast.literal_eval(token)
+        metadata = tokens.metadata() if tokens.accept("(") else dict()
+        tokens.expect("{")
+        properties, children = list(), list()
+        while not tokens.accept("}"):
+            kind, token = tokens.peek()
+            if token in crate.specifiers:
+                children.append(cls.from_tokens(tokens))
+            elif token == "reorder":  # NOTE: order is discarded
+                tokens.next()
+                tokens.next()
+                tokens.expect("=")
+                tokens.value()
+            elif token == "variantSet":
+                raise NotImplementedError(f"line {tokens.line()}: cannot parse variantSets")
+            else:
+                properties.append(Property.from_tokens(tokens))
+        return cls(type_, name, metadata, properties, children, specifier)
+
+
+class Property:
+    type_: str
+    name: str
+    value: Any
+    metadata: Dict[str, Any]
+
+    def __init__(self, type_, name, value, **metadata):
+        self.type_ = type_
+        self.name = name
+        self.value = value
+        self.metadata = metadata
+
+    def __repr__(self) -> str:
+        if len(self.metadata) == 0:
+            return f'Property("{self.type_}", "{self.name}", {usd_repr(self.value)})'
+        metadata = ", ".join(f"{name}={value!r}" for name, value in self.metadata.items())
+        return f'Property("{self.type_}", "{self.name}", {usd_repr(self.value)}, {metadata})'
+
+    def as_lines(self, depth: int = 0) -> Generator[str, None, None]:
+        yield from base.chunk_lines(self.chunks(depth))
+
+    def chunks(self, depth: int = 0, float_format: str = "%r") -> Iterator[str]:
+        """text w/ depth indents; each line ends w/ a newline"""
+        prefix = base.indent(depth)
+        if self.value is None:  # declared w/o a value
+            yield f"{prefix}{self.type_} {self.name}"
+        else:
+            yield f"{prefix}{self.type_} {self.name} = "
+            yield from self.value_chunks(float_format)
+        if len(self.metadata) > 0:
+            yield " (\n"
+            for name, value in self.metadata.items():
+                yield f"{prefix}    {name} = {usd_repr(value)}\n"
+            yield f"{prefix})\n"
+        else:
+            yield "\n"
+
+    def value_chunks(self, float_format: str = "%r") -> Iterator[str]:
+        """large arrays are formatted in batches"""
+        type_name = self.type_.rpartition(" ")[-1]  # w/o qualifiers
+        if type_name in bulk_arrays and not isinstance(self.value, str):
+            yield from array_chunks(type_name, self.value, float_format)
+        else:
+            yield usd_repr(self.value)
+
+    def add_spec(self, writer: crate.CrateWriter, prim_path: str):
+        path = f"{prim_path}.{self.name}"
+        *qualifiers_, type_name = self.type_.split(" ")
+        if type_name == "rel":
+            targets = [self.value] if isinstance(self.value, str) else self.value or list()
+            writer.add_spec(path, crate.SpecType.RELATIONSHIP, {
+                "variability": (crate.Type.VARIABILITY, "uniform"),
+                "targetPaths": (crate.Type.PATH_LIST_OP, {
+                    "explicit": True,
+                    "explicit_items": [target.strip("<>") for target in targets]})})
+            return
+        type_ = crate.usda_types[type_name.rstrip("[]")]
+        value = self.value
+        if isinstance(value, str):
+            value = value if reference_pattern.fullmatch(value) else sanitise(value)
+        elif isinstance(value, list) and all(isinstance(v, str) for v in value):
+            value = list(map(sanitise, value))
+        elif not type_name.endswith("[]") and not isinstance(value, (int, float, type(None))):
+            value = tuple(value)  # vec3 etc.
+        fields = {"typeName": (crate.Type.TOKEN, type_name)}
+        if "uniform" in qualifiers_:
+            fields["variability"] = (crate.Type.VARIABILITY, "uniform")
+        if value is not None:
+            fields["default"] = (type_, value)
+        fields.update({
+            name: crate_field(value)
+            for name, value in self.metadata.items()})
+        writer.add_spec(path, crate.SpecType.ATTRIBUTE, fields)
+
+    @classmethod
+    def from_lines(cls, lines: List[str]) -> Property:
+        return cls.from_tokens(Tokenizer("\n".join(lines)))
+
+    @classmethod
+    def from_tokens(cls, tokens: Tokenizer) -> Property:
+        words = list()
+        # ^ [*qualifiers, type_]
+        while len(words) == 0 or words[-1] in qualifiers:
+            kind, token = tokens.next()
+            if kind != "word":
+                raise ValueError(f"line {tokens.line()}: expected a property, got {token!r}")
+            words.append(token)
+        kind, name = tokens.next()
+        if kind != "word":
+            raise ValueError(f"line {tokens.line()}: expected a property name, got {name!r}")
+        value = tokens.value(words[-1]) if tokens.accept("=") else None
+        metadata = tokens.metadata() if tokens.accept("(") else dict()
+        return cls(" ".join(words), name, value, **metadata)
+
+
+class TextLayer:
+    """spec fields of a .usda Prim tree; same lookups as crate.Crate"""
+    specs: Dict[str, Dict[str, Any]]
+    # ^ {path: fields}
+
+    def __init__(self, metadata: Dict[str, Any], prims: List[Prim]):
+        self.specs = {"/": {**metadata, "primChildren": [prim.name for prim in prims]}}
+        stack = [("/", prim) for prim in reversed(prims)]
+        while len(stack) > 0:
+            parent, prim = stack.pop()
+            path = f"/{prim.name}" if parent == "/" else f"{parent}/{prim.name}"
+            self.specs[path] = {
+                "specifier": prim.specifier,
+                "typeName": prim.type_,
+                **self.list_ops(prim.metadata),
+                "properties": [property_.name for property_ in prim.properties],
+                "primChildren": [child.name for child in prim.children]}
+            for property_ in prim.properties:
+                self.specs[f"{path}.{property_.name}"] = self.property_fields(property_)
+            stack.extend((path, child) for child in reversed(prim.children))
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {len(self.specs)} specs @ 0x{id(self):016X}>"
+
+    @staticmethod
+    def list_ops(metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """"prepend references" etc. become list ops, like in a .usdc"""
+        out = dict()
+        for name, value in metadata.items():
+            operation, space, list_name = name.partition(" ")
+            if space == "" and name != "references":
+                out[name] = value
+                continue
+            values = [value] if isinstance(value, str) else value
+            if list_name == "references" or name == "references":
+                values = [reference(v) for v in values]
+            if space == "":  # references = ...
+                out[name] = {"explicit": True, "explicit_items": values}
+            else:
+                out.setdefault(list_name, {"explicit": False})[list_operations[operation]] = values
+        return out
+
+    @staticmethod
+    def property_fields(property_: Property) -> Dict[str, Any]:
+        *qualifiers_, type_name = property_.type_.split(" ")
+        if type_name == "rel":
+            targets = [property_.value] if isinstance(property_.value, str) else property_.value or list()
+            return {
+                "variability": "uniform",
+                "targetPaths": {
+                    "explicit": True,
+                    "explicit_items": [target.strip("<>") for target in targets]}}
+        fields = {"typeName": type_name, **property_.metadata}
+        if "uniform" in qualifiers_:
+            fields["variability"] = "uniform"
+        if property_.value is not None:
+            fields["default"] = property_.value
+        return fields
+
+    def spec_fields(self, path: str) -> Dict[str, Any]:
+        return self.specs[path]
+
+    def children(self, path: str) -> List[str]:
+        """child prim paths"""
+        prefix = "/" if path == "/" else f"{path}/"
+        return [f"{prefix}{name}" for name in self.specs[path].get("primChildren", list())]
+
+
+def mesh_key(mesh: Union[geometry.Mesh, geometry.MeshBuffer]) -> Tuple[Any, ...]:
+    """content of a mesh; equal for identical meshes"""
+    # NOTE: Vertex & Material compare by hash; keys hold their values instead
+    if isinstance(mesh, geometry.MeshBuffer):  # packed arrays, not Vertex objects
+        return (
+            mesh.material.name,
+            mesh.positions.data.tobytes(),
+            mesh.normals.data.tobytes(),
+            *[uv.data.tobytes() for uv in mesh.uvs],
+            mesh.colours.tobytes(),
+            mesh.indices.tobytes(),
+            mesh.face_offsets.tobytes())
+    return (mesh.material.name, tuple(
+        tuple(
+            (tuple(vertex.position), tuple(vertex.normal), *map(tuple, vertex.uv), vertex.colour)
+            for vertex in polygon.vertices)
+        for polygon in mesh.polygons))
+
+
+def content_key(model: geometry.Model, mesh_ids: Dict[Tuple, int] = None,
+                identities: Dict[Any, int] = None) -> Tuple[int, ...]:
+    """same key for models w/ the same meshes, wherever they are placed"""
+    # NOTE: mesh_ids ({mesh_key: id}) compares whole mesh keys, not just their hashes
+    # -- a hash collision can't share a prototype between different meshes
+    # NOTE: Model() copies Meshes, but not their Polygons
+    # -- identities ({identity: id}) skips rebuilding keys for Polygons shared by many Models
+    mesh_ids = dict() if mesh_ids is None else mesh_ids
+    identities = dict() if identities is None else identities
+    out = list()
+    for mesh in model.meshes:
+        if isinstance(mesh, geometry.MeshBuffer):
+            identity = id(mesh)
+        else:
+            identity = (mesh.material.name, tuple(map(id, mesh.polygons)))
+        if identity not in identities:
+            identities[identity] = mesh_ids.setdefault(mesh_key(mesh), len(mesh_ids))
+        out.append(identities[identity])
+    return tuple(out)
+
+
+def xform_ops(model: geometry.Model) -> List[Property]:
+    return [
+        Property("float3", "xformOp:rotateXYZ", model.angles),
+        Property("float3", "xformOp:scale", model.scale),
+        Property("double3", "xformOp:translate", model.origin),
+        Property("uniform token[]", "xformOpOrder", [
+            "xformOp:translate", "xformOp:rotateXYZ", "xformOp:scale"])]
+
+
+def mesh_prim(name: str, model: geometry.Model) -> Prim:
+    """Mesh prim w/ a GeomSubset per material"""
+    material_polygons = collections.defaultdict(list)
+    # ^ {Material: [Polygon]}
+    for mesh in model.meshes:
+        material_polygons[mesh.material].extend(mesh.polygons)
+    # core mesh properties
+    face_lengths = [
+        len(polygon.vertices)
+        for polygons in material_polygons.values()
+        for polygon in polygons]
+    vertices = [
+        vertex
+        for polygons in material_polygons.values()
+        for polygon in polygons
+        for vertex in reversed(polygon.vertices)]
+    # shared points & indexed faceVarying primvars
+    points, face_vertex_indices = index_values(tuple(vertex.position) for vertex in vertices)
+    normals = index_values(tuple(vertex.normal) for vertex in vertices)
+    uvs = [
+        index_values(
+            tuple(vertex.uv[i]) if i < len(vertex.uv) else (0, 0)
+            for vertex in vertices)
+        for i in range(max(len(vertex.uv) for vertex in vertices))]
+    colours = index_values(tuple(vertex.colour[:3]) for vertex in vertices)
+    opacities = index_values(1 - vertex.colour[3] for vertex in vertices)
+    # material binding spans
+    start = 0
+    material_bindings = list()
+    for material, polygons in material_polygons.items():
+        material_bindings.append(Prim(
+            "GeomSubset", sanitise(material.name),
+            metadata={
+                "prepend apiSchemas": ["MaterialBindingAPI"]},
+            properties=[
+                Property("uniform token", "elementType", "face"),
+                Property("uniform token", "familyName", "materialBind"),
+                Property("int[]", "indices", [*range(start, start + len(polygons))]),
+                Property("rel", "material:binding", f"</_materials/{sanitise(material.name)}>")]))
+        start += len(polygons)
+    return Prim(
+        "Mesh", name,
+        metadata={
+            "prepend apiSchemas": ["MaterialBindingAPI"]},
+        properties=[
+            Property("int[]", "faceVertexCounts", face_lengths),
+            Property("int[]", "faceVertexIndices", face_vertex_indices),
+            Property("point3f[]", "points", points),
+            *indexed_primvar("normal3f[]", "normals", *normals),
+            *[
+                property_
+                for i, uv_layer in enumerate(uvs)
+                for property_ in indexed_primvar("texCoord2f[]", f"uv{i}", *uv_layer)],
+            *indexed_primvar("color3f[]", "displayColor", *colours),
+            *indexed_primvar("float[]", "displayOpacity", *opacities)],
+        children=material_bindings)
+
+
+# TODO: friend_patterns for textures & sub-models
+class Usd(base.SceneDescription, breki.FriendlyHybridFile):
+    """Pixar's Universal Scene Description format"""
+    exts = {
+        "*.usd": breki.DataType.EITHER,
+        "*.usda": breki.DataType.TEXT,
+        "*.usdc": breki.DataType.BINARY}
+    # NOTE: use .from_archive to load `.usdz`
+    models: Dict[str, geometry.Model]
+    # ^ LazyDict when parsed
+    metadata: Dict[str, Any]
+    prims: List[Prim]
+    crate: crate.Crate
+    # ^ set by .parse_binary
+    layer: Union[crate.Crate, TextLayer]
+    # ^ spec lookups for loading models; set by .parse
+    prototype_meshes: Dict[str, List[geometry.Mesh]]
+    # ^ {Mesh prim path: [Mesh]}; shared by instances
+    float_format: str
+    # ^ %-format for each float in arrays; e.g. "%.6g"
+    instancing: bool
+    # ^ regenerate_prims writes repeated models as instances of one prototype
+
+    def __init__(self, filepath: str, archive=None, code_page=None):
+        super().__init__(filepath, archive, code_page)
+        self.metadata = dict(
+            defaultPrim="root",
+            metersPerUnit=0.0254,  # inches
+            upAxis="Z")
+        self.prims = list()
+        self.float_format = "%r"  # same as str(float)
+        self.instancing = True
+
+    as_bytes = breki.ParsedFile.as_bytes
+
+    @parse_first
+    def as_lines(self) -> List[str]:
+        return list(base.chunk_lines(self.chunks()))
+
+    @parse_first
+    def chunks(self) -> Iterator[str]:
+        """.usda text; each line ends w/ a newline"""
+        # generate prims if none exist & have models
+        if len(self.prims) == 0 and len(self.models) > 0:
+            self.regenerate_prims()
+        # metadata
+        yield "#usda 1.0\n(\n"
+        for name, value in self.metadata.items():
+            yield f"    {name} = {usd_repr(value)}\n"
+        yield ")\n"
+        # prims
+        for prim in self.prims:
+            yield "\n"  # newline
+            yield from prim.chunks(0, self.float_format)
+
+    @parse_first
+    def as_usdc(self) -> bytes:
+        """binary crate file"""
+        if len(self.prims) == 0 and len(self.models) > 0:
+            self.regenerate_prims()
+        writer = crate.CrateWriter()
+        fields = crate_metadata(self.metadata)
+        fields["primChildren"] = (crate.Type.TOKEN_VECTOR, [prim.name for prim in self.prims])
+        writer.add_spec("/", crate.SpecType.PSEUDO_ROOT, fields)
+        for prim in self.prims:
+            prim.add_specs(writer)
+        return writer.as_bytes()
+
+    def save_as(self, filepath: str):
+        """.usdc is binary; .usd & .usda are text"""
+        if filepath.lower().endswith(".usdc"):
+            with open(filepath, "wb") as usd_file:
+                usd_file.write(self.as_usdc())
+            return
+        encoding, errors = self.code_page
+        with open(filepath, "w", encoding=encoding, errors=errors, newline="\n") as usd_file:
+            self.write(usd_file)
+
+    @parse_first
+    def write(self, stream: TextIO, buffer_size: int = 1 << 16):
+        """stream .usda text into an open text file"""
+        # NOTE: chunks are joined into ~buffer_size writes; memory use doesn't grow w/ the file
+        for text in base.buffered(self.chunks(), buffer_size):
+            stream.write(text)
+
+    @classmethod
+    def identify(cls, filepath: str, stream: base.ByteStream) -> base.DataType:
+        type_ = super().identify(filepath, stream)
+        if type_ == breki.DataType.EITHER:
+            stream.seek(0)
+            magic = stream.read(8)
+            if magic == b"PXR-USDC":
+                type_ = breki.DataType.BINARY
+            elif magic[:4] == b"PK\x03\x04":
+                raise RuntimeError(
+                    "cannot open .usdz directly; use .from_archive() instead")
+            else:  # most likely usda
+                type_ = breki.DataType.TEXT
+        return type_
+
+    def parse_binary(self):
+        if self.is_parsed:
+            return
+        self.is_parsed = True
+        try:  # NOTE: mmap is zero-copy & only reads pages we touch
+            data = mmap.mmap(self.stream.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):  # not a real file
+            self.stream.seek(0)
+            data = self.stream.read()
+        self.crate = crate.Crate(data)
+        self.layer = self.crate
+        root = self.crate.spec_fields("/")
+        self.metadata = {
+            name: root[name]
+            for name in root
+            if name != "primChildren"}
+        self.models = self.lazy_models()
+
+    def parse_text(self):
+        if self.is_parsed:
+            return
+        self.is_parsed = True
+        text = self.stream.read()
+        if not text.startswith("#usda "):
+            raise ValueError(f"{self.filename} is not a .usda")
+        tokens = Tokenizer(text)  # NOTE: "#usda 1.0" is a comment
+        self.metadata = tokens.metadata() if tokens.accept("(") else dict()
+        self.prims = list()
+        while tokens.kind != "end":
+            self.prims.append(Prim.from_tokens(tokens))
+        self.layer = TextLayer(self.metadata, self.prims)
+        self.models = self.lazy_models()
+
+    def lazy_models(self) -> base.LazyDict:
+        """a model for each Mesh prim; meshes aren't decoded until accessed"""
+        self.prototype_meshes = dict()
+        out = base.LazyDict()
+        for model_path, path in self.mesh_paths():
+            name = model_path.rpartition("/")[2]
+            if name in out.loaders:  # name collision
+                name = model_path[1:]
+            xform = model_path if model_path != path else None
+            out.loaders[name] = functools.partial(self.load_mesh, path, xform)
+        return out
+
+    def mesh_paths(self) -> List[Tuple[str, str]]:
+        """[(model path, Mesh prim path)]; depth-first"""
+        # NOTE: skips abstract ("class") prims & follows internal references
+        # -- Meshes under an instance's prototype use the instance's path
+        out = list()
+        stack = [("/", "/")]
+        while len(stack) > 0:
+            model_path, path = stack.pop()
+            fields = self.layer.spec_fields(path)
+            if fields.get("specifier") == "class":
+                continue
+            if fields.get("typeName") == "Mesh":
+                out.append((model_path, path))
+            references = fields.get("references", dict())
+            targets = [
+                prim_path
+                for key in ("explicit_items", "prepended", "appended")
+                for asset_path, prim_path in references.get(key, list())
+                if asset_path == "" and prim_path in self.layer.specs]
+            inside = model_path != path
+            stack.extend(reversed([
+                *[(path, target) for target in targets],
+                *[(model_path if inside else child, child) for child in self.layer.children(path)]]))
+        return out
+
+    def attribute(self, path: str, default: Any = None) -> Any:
+        """"default" value of an attribute spec"""
+        if path not in self.layer.specs:
+            return default
+        return self.layer.spec_fields(path).get("default", default)
+
+    def corner_values(self, path: str, face_lengths: List[int], face_vertex_indices: List[int],
+                      interpolation: str = "constant") -> List[Any]:
+        """per-corner values of an attribute / primvar"""
+        # NOTE: interpolation is the fallback if the attribute doesn't have one
+        # -- "constant" for primvars; "vertex" for Mesh.normals
+        values = self.attribute(path)
+        indices = self.attribute(f"{path}:indices")
+        if indices is not None:
+            values = [values[i] for i in indices]
+        interpolation = self.layer.spec_fields(path).get("interpolation", interpolation)
+        if interpolation == "faceVarying":
+            return values
+        elif interpolation in ("vertex", "varying"):
+            return [values[i] for i in face_vertex_indices]
+        elif interpolation == "uniform":
+            return [
+                value
+                for value, length in zip(values, face_lengths)
+                for i in range(length)]
+        else:  # constant
+            return [values[0]] * len(face_vertex_indices)
+
+    def load_mesh(self, path: str, xform: str = None) -> geometry.Model:
+        """Mesh prim -> Model"""
+        # NOTE: only reads xformOps on xform, the Mesh, or the Xform above it
+        # -- xform is the instance prim for Meshes in prototypes
+        # TODO: compose the whole prim hierarchy
+        fields = self.layer.spec_fields(path)
+        if xform is None:
+            meshes = self.load_meshes(path)
+            xform = path
+            if not any(name.startswith("xformOp:") for name in fields.get("properties", [])):
+                xform = path.rpartition("/")[0] or "/"
+        else:  # instances share their prototype's Meshes
+            if path not in self.prototype_meshes:
+                self.prototype_meshes[path] = self.load_meshes(path)
+            meshes = self.prototype_meshes[path]
+        return geometry.Model(
+            meshes,
+            origin=self.attribute(f"{xform}.xformOp:translate", (0, 0, 0)),
+            angles=self.attribute(f"{xform}.xformOp:rotateXYZ", (0, 0, 0)),
+            scale=vector.vec3(*self.attribute(f"{xform}.xformOp:scale", (1, 1, 1))))
+
+    def load_meshes(self, path: str) -> List[geometry.Mesh]:
+        """Mesh prim -> a Mesh per bound material"""
+        fields = self.layer.spec_fields(path)
+        face_lengths = self.attribute(f"{path}.faceVertexCounts", [])
+        face_vertex_indices = self.attribute(f"{path}.faceVertexIndices", [])
+        points = self.attribute(f"{path}.points", [])
+        positions = [points[i] for i in face_vertex_indices]
+        normals = itertools.repeat((0, 0, 0))
+        for name, interpolation in (("primvars:normals", "constant"), ("normals", "vertex")):
+            if f"{path}.{name}" in self.layer.specs:
+                normals = self.corner_values(f"{path}.{name}", face_lengths, face_vertex_indices, interpolation)
+                break
+        uvs = [
+            self.corner_values(f"{path}.{name}", face_lengths, face_vertex_indices)
+            for name in fields.get("properties", [])
+            if is_uv(name, self.layer.spec_fields(f"{path}.{name}").get("typeName"))]
+        vertices = [
+            geometry.Vertex(position, normal, *uv)
+            for position, normal, *uv in zip(positions, normals, *uvs)]
+        reverse = self.attribute(f"{path}.orientation", "rightHanded") == "rightHanded"
+        polygons = list()
+        start = 0
+        for length in face_lengths:
+            corners = vertices[start:start + length]
+            polygons.append(geometry.Polygon(corners[::-1] if reverse else corners))
+            start += length
+        # material subsets
+        material_faces = dict()
+        # ^ {material_name: [face_index]}
+        for child in self.layer.children(path):
+            if self.layer.spec_fields(child).get("typeName") != "GeomSubset":
+                continue
+            material_faces[self.bound_material(child)] = self.attribute(f"{child}.indices", [])
+        default_material = self.bound_material(path)
+        bound = {i for faces in material_faces.values() for i in faces}
+        unbound = [i for i in range(len(polygons)) if i not in bound]
+        if len(unbound) > 0:
+            material_faces.setdefault(default_material, list()).extend(unbound)
+        return [
+            geometry.Mesh(geometry.Material(material_name), [polygons[i] for i in faces])
+            for material_name, faces in material_faces.items()]
+
+    def bound_material(self, path: str) -> str:
+        """name of the material bound to a prim"""
+        binding = f"{path}.material:binding"
+        if binding not in self.layer.specs:
+            return "default"
+        targets = self.layer.spec_fields(binding).get("targetPaths", dict())
+        paths = targets.get("explicit_items") or targets.get("prepended") or targets.get("appended") or []
+        return paths[0].rpartition("/")[2] if len(paths) > 0 else "default"
+
+    # TODO: material variants based on lightmap & cubemap indices (titanfall2)
+    # -- could maybe do per-polygon attributes to encode this
+    # TODO: catch duplicate material names ('Duplicate prim' will not load)
+    def regenerate_prims(self):
+        """build self.prims from self.models"""
+        # translate models
+        model_prims = list()
+        prototypes = dict()
+        # ^ {content_key: Prim}
+        if self.instancing:
+            mesh_ids, identities = dict(), dict()
+            keys = {
+                model_name: content_key(model, mesh_ids, identities)
+                for model_name, model in self.models.items()}
+            counts = collections.Counter(keys.values())
+        for model_name, model in self.models.items():
+            if not self.instancing or counts[keys[model_name]] == 1:
+                model_prims.append(Prim(
+                    "Xform", model_name,
+                    properties=xform_ops(model),
+                    children=[mesh_prim(model_name, model)]))
+                continue
+            # instance of a shared prototype
+            key = keys[model_name]
+            if key not in prototypes:
+                prototypes[key] = Prim("Xform", model_name, children=[mesh_prim(model_name, model)])
+            model_prims.append(Prim(
+                "Xform", model_name,
+                metadata={
+                    "instanceable": True,
+                    "prepend references": f"</root/_prototypes/{prototypes[key].name}>"},
+                properties=xform_ops(model)))
+        # material prims
+        materials = {
+                mesh.material
+                for model in self.models.values()
+                for mesh in model.meshes}
+        # TODO: try replicating the material folder structure
+        material_prims = [
+            Prim("Material", sanitise(material.name))
+            for material in sorted(materials, key=lambda m: m.name)]
+        # TODO: construct a material users can plug textures into
+        # -- will require parsing .vmt, .rpak & .vpk
+        # root prim
+        root = Prim("Xform", "root", children=[
+            *model_prims,
+            Prim("Scope", "_materials", children=[
+                *material_prims])])
+        if len(prototypes) > 0:  # NOTE: "class" prims aren't drawn, only their instances
+            root.children.append(Prim("Scope", "_prototypes", children=[*prototypes.values()], specifier="class"))
+        self.prims = [root]
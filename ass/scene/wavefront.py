@@ -1,8 +1,18 @@
 from __future__ import annotations
+import array
+import bisect
 import collections
-from typing import Dict, List, Union
+import contextlib
+import concurrent.futures
+import functools
+import itertools
+import mmap
+import os
+import re
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple, Union
 
 from .. import geometry
+from .. import vector
 from . import base
 
 import breki
@@ -14,17 +24,455 @@ GroupList = Union[
     Dict[str, base.ModelList]]
 
 
+Pools = Tuple[array.array, array.array, array.array]
+# ^ (v, vt, vn); flat components
+
+State = Tuple[Optional[str], Optional[str], str]
+# ^ (group_name, model_name, material_name)
+
+Section = Tuple[Optional[str], Optional[str], str, List[str]]
+# ^ (group_name, model_name, material_name, ["f" line args])
+
+FaceIndices = Tuple[array.array, array.array, Optional[array.array], Optional[array.array]]
+# ^ (sizes, vi, vti, vni); vti & vni are None if unused
+
+Corners = Tuple[array.array, array.array, array.array, array.array, array.array]
+# ^ (sizes, indices, unique_vi, unique_vti, unique_vni)
+
+Chunk = Tuple[Pools, List[Tuple[Optional[str], Optional[str], str, Corners]], List[str]]
+# ^ (pools, [(group_name, model_name, material_name, corners)], mtl_files)
+
+Block = Tuple[int, int, State, Tuple[int, int, int], Tuple[int, int, int, int]]
+# ^ (start, end, state, (v, vt, vn) before, (v, vt, vn, f) counts)
+
+
+# MATERIALS
+
+material_cache: Dict[str, geometry.Material] = dict()
+# ^ {name: Material}; shared by every .obj & .mtl in this process
+
+
+def shared_material(name: str) -> geometry.Material:
+    """one Material instance per name"""
+    material = material_cache.get(name)
+    if material is None:
+        material = geometry.Material(name)
+        # NOTE: names are normalised (e.g. lowercase), cache both
+        material = material_cache.setdefault(material.name, material)
+        material_cache[name] = material
+    return material
+
+
+class Mtl(breki.TextFile):
+    """Wavefront material library"""
+    exts = ["*.mtl"]
+    materials: Dict[str, geometry.Material]
+    # NOTE: each material's .metadata gets the raw mtl values
+    # -- {"Kd": (1.0, 1.0, 1.0), "map_Kd": "albedo.png", "illum": 2}
+    # -- map options (e.g. "-bm 0.5") are dropped
+    # NOTE: materials are shared; last .mtl to define a name wins
+
+    def __init__(self, filepath: str, archive=None, code_page=None):
+        super().__init__(filepath, archive, code_page)
+        self.materials = dict()
+
+    @parse_first
+    def __repr__(self) -> str:
+        descriptor = f'"{self.filename}" {len(self.materials)} materials'
+        return f"<{self.__class__.__name__} {descriptor} @ 0x{id(self):016X}>"
+
+    def parse(self):
+        if self.is_parsed:
+            return
+        self.is_parsed = True
+        material = None
+        for line in self.stream:
+            type_, args = line.strip().partition(" ")[::2]
+            args = args.strip()
+            if type_ == "" or type_.startswith("#"):
+                continue
+            elif type_ == "newmtl":
+                material = shared_material(args)
+                self.materials[material.name] = material
+            elif material is None:
+                continue  # no newmtl yet
+            elif type_ in ("Ka", "Kd", "Ks", "Ke", "Tf"):  # colours
+                material.metadata[type_] = tuple(map(float, args.split()))
+            elif type_ in ("Ns", "Ni", "d", "Tr", "Pr", "Pm", "Ps", "Pc", "Pcr", "aniso", "anisor"):
+                material.metadata[type_] = float(args)
+            elif type_ == "illum":
+                material.metadata[type_] = int(args)
+            elif type_.startswith("map_") or type_ in ("bump", "disp", "decal", "norm", "refl"):
+                if args.startswith("-"):  # options, then filename
+                    args = args.split()[-1]
+                material.metadata[type_] = args
+            else:  # unknown
+                material.metadata[type_] = args
+
+
+# FAST PARSER (Obj.parse(fast=True))
+
+# NOTE: negative indices are resolved before matching
+face_formats = {
+    format_: re.compile(f"{corner}( {corner})*")
+    for format_, corner in {
+        "v": r"\d+",
+        "v/vt/vn": r"\d+/\d+/\d+",
+        "v//vn": r"\d+//\d+",
+        "v/vt": r"\d+/\d+"}.items()}
+
+# NOTE: relative indices are resolved to (chunk index - LOCAL)
+# -- chunks don't know how many vertices came before them
+# -- build_mesh adds LOCAL & the chunk's pool offsets back on
+LOCAL = 1 << 40
+
+
+def parse_records(text: str, state: State = (None, None, "default")) -> Tuple[Pools, List[Section], List[str]]:
+    """sort .obj records by type; faces are grouped into Sections"""
+    records = {"v": list(), "vt": list(), "vn": list()}
+    v_lines, vt_lines, vn_lines = records.values()
+    mtl_files = list()
+    group_name, model_name, material_name = state
+    faces = list()
+    sections = [(group_name, model_name, material_name, faces)]
+
+    def add_face(args: str):
+        if "-" in args:  # relative indices
+            args = local_face(args, len(v_lines), len(vt_lines), len(vn_lines))
+        faces.append(args)
+
+    for line in text.splitlines():
+        kind = line[:2]  # fast path for the most common records
+        if kind == "v ":
+            v_lines.append(line[2:])
+        elif kind == "f ":
+            if "-" in line:
+                add_face(line[2:])
+            else:
+                faces.append(line[2:])
+        elif kind == "vt":
+            vt_lines.append(line[3:])
+        elif kind == "vn":
+            vn_lines.append(line[3:])
+        else:
+            type_, args = (line.split(None, 1) + [""])[:2]
+            args = args.strip()
+            if type_ in records:
+                records[type_].append(args)
+            elif type_ == "f":
+                add_face(args)
+            elif type_ in ("g", "o", "usemtl"):
+                if type_ == "g":
+                    group_name, model_name, material_name = args, None, "default"
+                elif type_ == "o":
+                    model_name, material_name = args, "default"
+                else:
+                    material_name = args
+                faces = list()
+                sections.append((group_name, model_name, material_name, faces))
+            elif type_ == "mtllib":
+                mtl_files.append(args)
+    pools = (
+        read_floats(v_lines, 3),
+        read_floats(vt_lines, 2),
+        read_floats(vn_lines, 3))
+    return pools, sections, mtl_files
+
+
+def local_face(args: str, num_v: int, num_vt: int, num_vn: int) -> str:
+    """resolve negative (relative) indices to chunk indices - LOCAL"""
+    counts = (num_v, num_vt, num_vn)
+    corners = list()
+    for corner in args.split():
+        corners.append("/".join(
+            str(int(index) + count + 1 - LOCAL) if index.startswith("-") else index
+            for index, count in zip(corner.split("/"), counts)))
+    return " ".join(corners)
+
+
+def read_floats(lines: List[str], size: int) -> array.array:
+    """flat array of the first size components of each line"""
+    split_lines = list(map(str.split, lines))
+    out = array.array("d")
+    if set(map(len, split_lines)) <= {size}:
+        out.extend(map(float, itertools.chain.from_iterable(split_lines)))
+    else:  # e.g. "v x y z w" or "vt u v w"
+        padding = ["0"] * size
+        for components in split_lines:
+            out.extend(map(float, (components + padding)[:size]))
+    return out
+
+
+def read_faces(lines: List[str]) -> FaceIndices:
+    split_lines = list(map(str.split, lines))
+    sizes = array.array("I", map(len, split_lines))
+    corners = list(itertools.chain.from_iterable(split_lines))
+    joined = " ".join(corners)
+    vti, vni = None, None
+    if face_formats["v"].fullmatch(joined):
+        vi = array.array("q", map(int, corners))
+    elif face_formats["v/vt/vn"].fullmatch(joined):
+        indices = array.array("q", map(int, joined.replace("/", " ").split()))
+        vi, vti, vni = indices[0::3], indices[1::3], indices[2::3]
+    elif face_formats["v//vn"].fullmatch(joined):
+        indices = array.array("q", map(int, joined.replace("//", " ").split()))
+        vi, vni = indices[0::2], indices[1::2]
+    elif face_formats["v/vt"].fullmatch(joined):
+        indices = array.array("q", map(int, joined.replace("/", " ").split()))
+        vi, vti = indices[0::2], indices[1::2]
+    else:  # mixed formats
+        vi, vti, vni = (array.array("q") for i in range(3))
+        for corner in corners:
+            indices = [int(index) if index != "" else 0 for index in corner.split("/")]
+            indices.extend([0, 0])
+            vi.append(indices[0])
+            vti.append(indices[1])
+            vni.append(indices[2])
+    return sizes, vi, vti, vni
+
+
+def index_corners(faces: FaceIndices) -> Corners:
+    """deduplicate (vi, vti, vni) corners"""
+    sizes, vi, vti, vni = faces
+    zeroes = itertools.repeat(0)
+    corners = list(zip(vi, zeroes if vti is None else vti, zeroes if vni is None else vni))
+    unique = dict.fromkeys(corners)  # ordered set
+    lookup = dict(zip(unique, itertools.count()))
+    # ^ {(vi, vti, vni): index}
+    indices = array.array("I", map(lookup.__getitem__, corners))
+    unique_indices = zip(*unique) if len(unique) > 0 else [(), (), ()]
+    unique_vi, unique_vti, unique_vni = (array.array("q", axis) for axis in unique_indices)
+    return sizes, indices, unique_vi, unique_vti, unique_vni
+
+
+def parse_chunk(text: str, state: State = (None, None, "default")) -> Chunk:
+    pools, sections, mtl_files = parse_records(text, state)
+    sections = [
+        (group_name, model_name, material_name, index_corners(read_faces(faces)))
+        for group_name, model_name, material_name, faces in sections
+        if len(faces) > 0]
+    return pools, sections, mtl_files
+
+
+def parse_file_chunk(filepath: str, start: int, end: int, state: State, code_page: Tuple[str, str]) -> Chunk:
+    """for ProcessPoolExecutor workers"""
+    with open(filepath, "rb") as obj_file:
+        with mmap.mmap(obj_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            text = data[start:end].decode(*code_page)
+    return parse_chunk(text, state)
+
+
+def chunk_bounds(data: mmap.mmap, num_chunks: int) -> List[Tuple[int, int]]:
+    """split at newlines"""
+    starts = [0]
+    for i in range(1, num_chunks):
+        start = data.find(b"\n", max(len(data) * i // num_chunks, starts[-1])) + 1
+        if start in (0, len(data)):  # no more newlines
+            break
+        if start > starts[-1]:
+            starts.append(start)
+    return list(zip(starts, [*starts[1:], len(data)]))
+
+
+def chunk_state(data: mmap.mmap, start: int, code_page: Tuple[str, str]) -> State:
+    """g, o & usemtl state at start of a chunk"""
+    return chunk_states(data, [start], code_page)[0]
+
+
+def chunk_states(data: mmap.mmap, starts: List[int], code_page: Tuple[str, str]) -> List[State]:
+    """g, o & usemtl state at the start of each chunk"""
+    # NOTE: finds indented & tab separated records, like the lazy parser
+    regular = not irregular(data)
+    records = [record_starts(data, record, regular) for record in (b"g ", b"o ", b"usemtl ")]
+    out = list()
+    for start in starts:
+        lasts = list()
+        # ^ [(line start, args)] of the last g, o & usemtl before start
+        for line_starts in records:
+            i = bisect.bisect_left(line_starts, start) - 1
+            if i < 0:
+                lasts.append((-1, None))  # not found
+            else:
+                lasts.append((line_starts[i], record_args(data, line_starts[i], code_page)))
+        (g, group_name), (o, model_name), (usemtl, material_name) = lasts
+        if o < g:  # "g" resets model & material
+            model_name = None
+        if usemtl < max(g, o):  # "g" & "o" reset material
+            material_name = None
+        out.append((group_name, model_name, material_name or "default"))
+    return out
+
+
+def pool_axes(pools: Pools) -> Tuple[List[array.array], ...]:
+    """split pools by axis; each axis starts w/ 0 for missing (index 0)"""
+    return tuple(
+        [array.array("d", [0]) + pool[axis::size] for axis in range(size)]
+        for pool, size in zip(pools, (3, 2, 3)))
+
+
+def build_mesh(material: geometry.Material, axes: Tuple[List[array.array], ...], corners: Corners,
+               offsets: Tuple[int, int, int] = (0, 0, 0)) -> geometry.MeshBuffer:
+    """axes: pool_axes(pools); offsets: v, vt & vn entries before this chunk"""
+    sizes, indices, *uniques = corners
+    out = geometry.MeshBuffer(material)
+    out.indices = indices
+    out.face_offsets = array.array("I", itertools.accumulate(sizes, initial=0))
+    attributes = list()
+    for attribute_axes, unique, offset in zip(axes, uniques, offsets):
+        if len(unique) > 0 and min(unique) < 0:  # resolve relative indices
+            unique = array.array("q", [i + LOCAL + offset if i < 0 else i for i in unique])
+        if len(unique) > 0 and (max(unique) >= len(attribute_axes[0]) or min(unique) < 0):
+            raise IndexError("face index out of range")
+        attributes.append([
+            array.array("d", map(axis.__getitem__, unique))
+            for axis in attribute_axes])
+    positions, uvs, normals = attributes
+    out.positions = vector.Vec3Array.from_axes(*positions)
+    out.uvs = [vector.Vec2Array.from_axes(*uvs)]
+    out.normals = vector.Vec3Array.from_axes(*normals)
+    out.colours = array.array("d", [0, 0, 0, 1] * out.num_vertices)
+    return out
+
+
+def build_groups(chunks: List[Chunk]) -> Dict[str, Dict[str, geometry.Model]]:
+    """merge parsed chunks (in file order)"""
+    pools = (array.array("d"), array.array("d"), array.array("d"))
+    meshes = collections.defaultdict(lambda: collections.defaultdict(list))
+    # ^ {group_name: {model_name: [MeshBuffer]}}
+    sections = list()
+    for chunk_pools, chunk_sections, mtl_files in chunks:
+        offsets = (len(pools[0]) // 3, len(pools[1]) // 2, len(pools[2]) // 3)
+        sections.extend((*section, offsets) for section in chunk_sections)
+        for pool, chunk_pool in zip(pools, chunk_pools):
+            pool.extend(chunk_pool)
+    axes = pool_axes(pools)
+    for group_name, model_name, material_name, corners, offsets in sections:
+        mesh = build_mesh(shared_material(material_name), axes, corners, offsets)
+        meshes[group_name][model_name].append(mesh)
+    return {
+        group_name: {
+            model_name: geometry.Model(model_meshes)
+            for model_name, model_meshes in models.items()}
+        for group_name, models in meshes.items()}
+
+
+# LAZY PARSER (Obj.parse(lazy=True))
+# NOTE: find & count only see unindented, space separated records
+# -- data w/ indents or tabs is searched w/ (slower) regular expressions
+
+record_pattern = re.compile(rb"^[ \t]*(v|vt|vn|f)[ \t]", re.MULTILINE)
+
+
+def irregular(data: Union[mmap.mmap, bytes]) -> bool:
+    """has indented or tab separated lines"""
+    return data.find(b"\t") != -1 or data.find(b"\n ") != -1 or data[:1] == b" "
+
+
+def record_starts(data: mmap.mmap, record: bytes, regular: bool = None) -> List[int]:
+    """start of every line beginning w/ record"""
+    if regular is None:
+        regular = not irregular(data)
+    if not regular:
+        pattern = re.compile(rb"^[ \t]*" + re.escape(record.strip()) + rb"[ \t]", re.MULTILINE)
+        return [match.start() for match in pattern.finditer(data)]
+    out = [0] if data[:len(record)] == record else list()
+    start = data.find(b"\n" + record)
+    while start != -1:
+        out.append(start + 1)
+        start = data.find(b"\n" + record, start + 1)
+    return out
+
+
+def record_args(data: mmap.mmap, start: int, code_page: Tuple[str, str]) -> str:
+    end = data.find(b"\n", start)
+    line = data[start:end if end != -1 else len(data)].decode(*code_page)
+    return (line.split(None, 1) + [""])[1].strip()
+
+
+def count_records(data: mmap.mmap, start: int, end: int, window: int = 1 << 24,
+                  regular: bool = None) -> Tuple[int, int, int, int]:
+    """(v, vt, vn, f) lines between start & end; reads window bytes at a time"""
+    counts = [0, 0, 0, 0]
+    records = (b"v ", b"vt ", b"vn ", b"f ")
+    while start < end:
+        stop = min(start + window, end)
+        if stop < end:  # split after a newline
+            newline = data.find(b"\n", stop, end)
+            stop = end if newline == -1 else newline + 1
+        text = data[start:stop]
+        if not regular and irregular(text):
+            found = collections.Counter(record_pattern.findall(text))
+            for i, record in enumerate(records):
+                counts[i] += found[record.strip()]
+        else:
+            for i, record in enumerate(records):
+                counts[i] += text.count(b"\n" + record) + text.startswith(record)
+        start = stop
+    return tuple(counts)
+
+
+def index_blocks(data: mmap.mmap, code_page: Tuple[str, str]) -> List[Block]:
+    """split at each "g" & "o" record"""
+    regular = not irregular(data)
+    records = sorted(
+        (start, type_)
+        for type_ in (b"g", b"o")
+        for start in record_starts(data, type_ + b" ", regular))
+    starts = [0] + [start for start, type_ in records if start != 0]
+    group_name, model_name = None, None
+    states = list()
+    if len(records) == 0 or records[0][0] != 0:
+        states.append((None, None, "default"))
+    for start, type_ in records:
+        args = record_args(data, start, code_page)
+        if type_ == b"g":
+            group_name, model_name = args, None
+        else:
+            model_name = args
+        states.append((group_name, model_name, "default"))
+    blocks = list()
+    offsets = (0, 0, 0)
+    for start, end, state in zip(starts, [*starts[1:], len(data)], states):
+        counts = count_records(data, start, end, regular=regular)
+        blocks.append((start, end, state, offsets, counts))
+        offsets = tuple(offset + count for offset, count in zip(offsets, counts))
+    return blocks
+
+
+@functools.lru_cache(maxsize=64)
+def relative_face(num_vertices: int, has_uv: bool) -> str:
+    """rexx magic obj indexing; works for Blender, might break elsewhere"""
+    # NOTE: inverts winding order; which is desired
+    corner = "{0}/{0}/{0}" if has_uv else "{0}//{0}"
+    return "f " + " ".join(
+        corner.format(i)
+        for i in range(-1, -(num_vertices + 1), -1))
+
+
 class Obj(base.SceneDescription, breki.FriendlyTextFile):
     """Y+ forward; Z+ up"""
     exts = ["*.obj"]
     groups: Dict[str, Dict[str, geometry.Model]]
     # ^ {"group_name": {"model_name": model}}
     mtl_files: List[str]
+    indexed: bool
+    # ^ export mode; True: shared v, vt & vn w/ absolute indices
+    float_format: str
+    # ^ %-format for each exported float; e.g. "%.6g"
+    batch_size: int = 1024
+    # ^ polygons per chunk
+    blocks: List[Block]
+    # ^ index of g & o sections; filled by .parse(lazy=True)
 
     def __init__(self, filepath: str, archive=None, code_page=None):
         super().__init__(filepath, archive, code_page)
         self.groups = dict()
         self.mtl_files = list()
+        self.indexed = False
+        self.float_format = "%r"  # same as str(float)
+        self.blocks = list()
+        self._block_pools = dict()
+        # ^ {block_index: pools}
 
     @parse_first
     def __repr__(self) -> str:
@@ -37,48 +485,131 @@ class Obj(base.SceneDescription, breki.FriendlyTextFile):
 
     @parse_first
     def as_lines(self) -> List[str]:
-        out = list()
-        out.append("# generated w/ ass")
-
-        def indices(polygon: geometry.Polygon) -> List[int]:
-            """rexx magic obj indexing; works for Blender, might break elsewhere"""
-            # NOTE: inverts winding order; which is desired
-            return range(-1, -(len(polygon.vertices) + 1), -1)
+        return "".join(self.chunks()).split("\n")[:-1]
 
+    @parse_first
+    def chunks(self) -> Iterator[str]:
+        """text for up to .batch_size polygons at a time; each ends w/ a newline"""
+        yield "# generated w/ ass\n"
+        offsets = [0, 0, 0]  # v, vt & vn written so far (for .indexed)
         # TODO: make sure None group is first
         for group_name, models in self.groups.items():
             if group_name is not None:
-                out.append(f"g {group_name}")
+                yield f"g {group_name}\n"
             for model_name, model in models.items():
                 if model_name is not None:
-                    out.append(f"o {model_name}")
-                polygons = collections.defaultdict(list)
-                # ^ {Material: [Polygon]}
-                for mesh in model.meshes:
-                    polygons[mesh.material].extend(mesh.polygons)
-                for material in polygons:
-                    out.append(f"usemtl {material.name}")
-                    # TODO: generate .mtl files
-                    # -- f"mtllib {material.name}.mtl"
-                    for polygon in polygons[material]:
-                        vertices = [*map(model.apply_transforms, polygon.vertices)]
-                        # NOTE: only the first uv can be saved
-                        if all(len(v.uv) > 0 for v in vertices):
-                            for v in vertices:
-                                out.extend([
-                                    f"v {v.position.x} {v.position.y} {v.position.z}",
-                                    f"vn {v.normal.x} {v.normal.y} {v.normal.z}",
-                                    f"vt {v.uv[0].x} {v.uv[0].y}"])
-                            out.append("f " + " ".join([
-                                f"{i}/{i}/{i}" for i in indices(polygon)]))
-                        else:  # no uv
-                            for v in vertices:
-                                out.extend([
-                                    f"v {v.position.x} {v.position.y} {v.position.z}",
-                                    f"vn {v.normal.x} {v.normal.y} {v.normal.z}"])
-                            out.append("f " + " ".join([
-                                f"{i}//{i}" for i in indices(polygon)]))
-        return out
+                    yield f"o {model_name}\n"
+                if self.indexed:
+                    yield from self.indexed_model_chunks(model, offsets)
+                else:
+                    yield from self.model_chunks(model)
+
+    @staticmethod
+    def material_polygons(model: geometry.Model) -> Dict[geometry.Material, List[geometry.Polygon]]:
+        polygons = collections.defaultdict(list)
+        for mesh in model.meshes:
+            polygons[mesh.material].extend(mesh.polygons)
+        return polygons
+
+    def line_formats(self) -> Tuple[str, str, str]:
+        """v, vt & vn %-format strings"""
+        f = self.float_format
+        return f"v {f} {f} {f}", f"vt {f} {f}", f"vn {f} {f} {f}"
+
+    def model_chunks(self, model: geometry.Model) -> Iterator[str]:
+        """v, vt & vn for every polygon corner"""
+        v_line, vt_line, vn_line = self.line_formats()
+        for material, polygons in self.material_polygons(model).items():
+            yield f"usemtl {material.name}\n"
+            # TODO: generate .mtl files
+            # -- f"mtllib {material.name}.mtl"
+            for batch in base.batched(polygons, self.batch_size):
+                lines = list()
+                values = list()
+                vertices = iter(model.transform_vertices(
+                    vertex
+                    for polygon in batch
+                    for vertex in polygon.vertices))
+                for polygon in batch:
+                    corners = list(itertools.islice(vertices, len(polygon.vertices)))
+                    # NOTE: only the first uv can be saved
+                    has_uv = all(len(v.uv) > 0 for v in corners)
+                    for v in corners:
+                        position, normal = v.position, v.normal
+                        if has_uv:
+                            lines.extend((v_line, vn_line, vt_line))
+                            values.extend((
+                                position.x, position.y, position.z,
+                                normal.x, normal.y, normal.z,
+                                v.uv[0].x, v.uv[0].y))
+                        else:
+                            lines.extend((v_line, vn_line))
+                            values.extend((
+                                position.x, position.y, position.z,
+                                normal.x, normal.y, normal.z))
+                    lines.append(relative_face(len(corners), has_uv))
+                yield "\n".join(lines) % tuple(values) + "\n"
+
+    def indexed_model_chunks(self, model: geometry.Model, offsets: List[int]) -> Iterator[str]:
+        """deduplicated v, vt & vn pools & absolute indices
+        offsets: [v, vt, vn] already in the file (updated in place)"""
+        v_line, vt_line, vn_line = self.line_formats()
+        v_pool, vt_pool, vn_pool = dict(), dict(), dict()
+        # ^ {(x, y, z): index}
+
+        def index(pool: Dict[tuple, int], key: tuple, offset: int, new: List[float]) -> int:
+            out = pool.get(key)
+            if out is None:
+                out = pool[key] = offset + len(pool) + 1
+                new.extend(key)
+            return out
+
+        for material, polygons in self.material_polygons(model).items():
+            faces = [f"usemtl {material.name}"]
+            for batch in base.batched(polygons, self.batch_size):
+                new_v, new_vt, new_vn = list(), list(), list()
+                # ^ flat components, written before faces
+                vertices = iter(model.transform_vertices(
+                    vertex
+                    for polygon in batch
+                    for vertex in polygon.vertices))
+                for polygon in batch:
+                    corners = list(itertools.islice(vertices, len(polygon.vertices)))
+                    # NOTE: only the first uv can be saved
+                    has_uv = all(len(v.uv) > 0 for v in corners)
+                    face = list()
+                    for v in reversed(corners):  # NOTE: inverts winding order; which is desired
+                        p, n = v.position, v.normal
+                        vi = index(v_pool, (p.x, p.y, p.z), offsets[0], new_v)
+                        vni = index(vn_pool, (n.x, n.y, n.z), offsets[2], new_vn)
+                        if has_uv:
+                            vti = index(vt_pool, (v.uv[0].x, v.uv[0].y), offsets[1], new_vt)
+                            face.append(f"{vi}/{vti}/{vni}")
+                        else:
+                            face.append(f"{vi}//{vni}")
+                    faces.append("f " + " ".join(face))
+                lines = [
+                    *[v_line] * (len(new_v) // 3),
+                    *[vt_line] * (len(new_vt) // 2),
+                    *[vn_line] * (len(new_vn) // 3)]
+                if len(lines) > 0:
+                    yield "\n".join(lines) % (*new_v, *new_vt, *new_vn) + "\n"
+                yield "\n".join(faces) + "\n"
+                faces = list()
+        offsets[0] += len(v_pool)
+        offsets[1] += len(vt_pool)
+        offsets[2] += len(vn_pool)
+
+    @parse_first
+    def save_as(self, filepath: str):
+        encoding, errors = self.code_page
+        with open(filepath, "w", encoding=encoding, errors=errors, newline="\n") as obj_file:
+            self.write(obj_file)
+
+    @parse_first
+    def write(self, stream: TextIO):
+        """stream .obj text into an open text file"""
+        stream.writelines(self.chunks())
 
     @property
     def friend_patterns(self) -> Dict[str, breki.DataType]:
@@ -86,10 +617,41 @@ class Obj(base.SceneDescription, breki.FriendlyTextFile):
             filename: breki.DataType.TEXT
             for filename in self.mtl_files}
 
-    def parse(self):
+    def make_friends(self, candidates: Dict[str, str] = None, archive=None):
+        """parses .mtl friends (updates shared materials)"""
+        super().make_friends(candidates, archive)
+        for filename in self.mtl_files:
+            friend = self.friends.get(filename)
+            if friend is None or isinstance(friend, Mtl):
+                continue
+            mtl = Mtl.from_stream(os.path.join(self.folder, filename), friend.stream, code_page=self.code_page)
+            mtl.parse()
+            self.friends[filename] = mtl
+
+    def parse(self, fast: bool = False, workers: int = 1, lazy: bool = False):
+        """fast: bulk parse into MeshBuffers
+        workers: split the file across processes (implies fast)
+        lazy: index g & o sections; models are fast parsed on first access"""
         if self.is_parsed:
             return
         self.is_parsed = True
+        if lazy:
+            self.parse_lazy()
+            self.make_friends()  # .mtl files
+            return
+        if fast or workers > 1:
+            filepath = os.path.join(self.folder, self.filename)
+            if workers > 1 and self.archive is None and os.path.isfile(filepath):
+                chunks = self.parse_parallel(filepath, workers)
+            else:  # single process
+                chunks = [parse_chunk(self.stream.read())]
+            self.mtl_files = [
+                mtl_file
+                for chunk_pools, sections, mtl_files in chunks
+                for mtl_file in mtl_files]
+            self.groups = build_groups(chunks)
+            self.make_friends()  # .mtl files
+            return
         # parser state
         groups = {None: {None: geometry.Model([geometry.Mesh()])}}
         group_name = None
@@ -135,7 +697,7 @@ class Obj(base.SceneDescription, breki.FriendlyTextFile):
             elif type_ == "mtllib":
                 self.mtl_files.append(args)
             elif type_ == "usemtl":
-                material = geometry.Material(args)
+                material = shared_material(args)
                 mesh = geometry.Mesh(material)
                 groups[group_name][model_name].meshes.append(mesh)
         # cleanup
@@ -159,6 +721,98 @@ class Obj(base.SceneDescription, breki.FriendlyTextFile):
         self.groups = clean
         self.make_friends()  # .mtl files
 
+    @contextlib.contextmanager
+    def open_data(self) -> Iterator[Union[mmap.mmap, bytes]]:
+        """memory-maps the file; reads the whole stream if it isn't on disk"""
+        filepath = os.path.join(self.folder, self.filename)
+        if self.archive is None and os.path.isfile(filepath):
+            with open(filepath, "rb") as obj_file:
+                if os.path.getsize(filepath) == 0:  # can't mmap an empty file
+                    yield b""
+                    return
+                with mmap.mmap(obj_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    yield data
+        else:
+            if not hasattr(self, "_data"):
+                self.stream.seek(0)
+                self._data = self.stream.read().encode(*self.code_page)
+            yield self._data
+
+    def parse_lazy(self):
+        code_page = tuple(self.code_page)
+        with self.open_data() as data:
+            self.blocks = index_blocks(data, code_page)
+            self.mtl_files = [
+                record_args(data, start, code_page)
+                for start in record_starts(data, b"mtllib ")]
+        models = collections.defaultdict(list)
+        # ^ {(group_name, model_name): [block_index]}
+        for i, (start, end, state, offsets, counts) in enumerate(self.blocks):
+            if counts[3] > 0:  # has faces
+                models[state[:2]].append(i)
+        self.groups = dict()
+        for (group_name, model_name), block_indices in models.items():
+            group = self.groups.setdefault(group_name, base.LazyDict())
+            group.loaders[model_name] = functools.partial(self.load_model, block_indices)
+
+    def block_text(self, data: Union[mmap.mmap, bytes], index: int) -> str:
+        start, end = self.blocks[index][:2]
+        return data[start:end].decode(*self.code_page)
+
+    def block_pools(self, data: Union[mmap.mmap, bytes], index: int) -> Pools:
+        if index not in self._block_pools:
+            self._block_pools[index] = parse_records(self.block_text(data, index))[0]
+        return self._block_pools[index]
+
+    def load_model(self, block_indices: List[int]) -> geometry.Model:
+        """fast parse the faces in some blocks & the vertices they use"""
+        meshes = list()
+        with self.open_data() as data:
+            for i in block_indices:
+                state, offsets = self.blocks[i][2:4]
+                pools, sections, mtl_files = parse_chunk(self.block_text(data, i), state)
+                self._block_pools[i] = pools
+                for group_name, model_name, material_name, corners in sections:
+                    axes, corners = self.pool_window(data, corners, offsets)
+                    meshes.append(build_mesh(shared_material(material_name), axes, corners))
+        return geometry.Model(meshes)
+
+    def pool_window(self, data: Union[mmap.mmap, bytes], corners: Corners,
+                    offsets: Tuple[int, int, int]) -> Tuple[Tuple[List[array.array], ...], Corners]:
+        """(axes, corners) w/ only the pool entries corners can use; indices are shifted to match"""
+        sizes, indices, *uniques = corners
+        pools, shifted = list(), list()
+        for axis, (unique, offset) in enumerate(zip(uniques, offsets)):
+            # absolute indices; 0 is missing
+            unique = array.array("q", [i + LOCAL + offset if i < 0 else i for i in unique])
+            used = [i for i in unique if i > 0]
+            pool = array.array("d")
+            base_index = 0  # entries before the window
+            if len(used) > 0:
+                starts = [block[3][axis] for block in self.blocks]
+                first = bisect.bisect_left(starts, min(used)) - 1
+                last = bisect.bisect_left(starts, max(used)) - 1
+                if first >= 0:
+                    base_index = starts[first]
+                    for j in range(first, last + 1):
+                        pool.extend(self.block_pools(data, j)[axis])
+            shifted.append(array.array("q", [i - base_index if i > 0 else 0 for i in unique]))
+            pools.append(pool)
+        return pool_axes(tuple(pools)), (sizes, indices, *shifted)
+
+    def parse_parallel(self, filepath: str, workers: int) -> List[Chunk]:
+        code_page = tuple(self.code_page)
+        with open(filepath, "rb") as obj_file:
+            with mmap.mmap(obj_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                # NOTE: more chunks than workers to balance the load
+                bounds = chunk_bounds(data, workers * 4)
+                states = chunk_states(data, [start for start, end in bounds], code_page)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(parse_file_chunk, filepath, start, end, state, code_page)
+                for (start, end), state in zip(bounds, states)]
+            return [future.result() for future in futures]
+
     @classmethod
     def from_groups(cls, filepath: str, groups: GroupList) -> Obj:
         out = cls(filepath)
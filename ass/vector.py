@@ -1,9 +1,14 @@
 """2D & 3D vector classes"""
 from __future__ import annotations
 
+import array
+import contextlib
+import enum
+import functools
 import itertools
 import math
-from typing import Iterable, Union
+import operator
+from typing import Iterable, List, Union
 
 
 # TODO: swizzle __getattr__ methods
@@ -11,6 +16,34 @@ from typing import Iterable, Union
 # -- so we can keep it consistent
 # -- _compatible_type(other) -> bool
 
+
+class Precision(enum.Enum):
+    EXACT = 0  # math.fsum; no intermediate rounding errors
+    FAST = 1  # plain float arithmetic; much quicker in hot loops
+
+
+precision = Precision.EXACT
+# NOTE: tests expect EXACT; only switch to FAST where speed matters
+# -- vector.precision = vector.Precision.FAST
+# -- or temporarily: `with vector.precision_mode(vector.Precision.FAST): ...`
+
+
+@contextlib.contextmanager
+def precision_mode(mode: Precision):
+    """temporarily change the module-level precision"""
+    global precision
+    previous = precision
+    precision = mode
+    try:
+        yield
+    finally:
+        precision = previous
+
+
+def _is_fast(mode: Precision = None) -> bool:
+    return (precision if mode is None else mode) == Precision.FAST
+
+
 class vec2:
     """2D vector class"""
     __slots__ = ["x", "y"]
@@ -24,7 +57,11 @@ class vec2:
         return self.magnitude()
 
     def __add__(self, other: Iterable) -> vec2:
-        if isinstance(other, (vec2, vec3, Iterable)):
+        if other.__class__ is vec2:  # specialised path
+            if _is_fast():
+                return _vec2(self.x + other.x, self.y + other.y)
+            return _vec2(math.fsum((self.x, other.x)), math.fsum((self.y, other.y)))
+        elif isinstance(other, (vec2, vec3, Iterable)):
             return vec2(*map(math.fsum, zip(self, other)))
         else:
             raise TypeError(f"cannot add '{type(other).__name__}' to '{type(self).__name__}'")
@@ -75,6 +112,10 @@ class vec2:
             setattr(self, "xy"[key], value)
 
     def __sub__(self, other: Iterable) -> vec2:
+        if other.__class__ is vec2:  # specialised path
+            if _is_fast():
+                return _vec2(self.x - other.x, self.y - other.y)
+            return _vec2(math.fsum((self.x, -other.x)), math.fsum((self.y, -other.y)))
         return vec2(*[math.fsum((s, -o)) for s, o in zip(self, other)])
 
     def __truediv__(self, other: float) -> vec2:
@@ -98,12 +139,17 @@ class vec2:
         theta = math.radians(degrees)
         cos_theta = math.cos(theta)
         sin_theta = math.sin(theta)
+        if _is_fast():
+            x, y = self.x, self.y
+            return _vec2(round(x * cos_theta + y * sin_theta, 6), round(y * cos_theta - x * sin_theta, 6))
         x = round(math.fsum([self[0] * cos_theta, self[1] * sin_theta]), 6)
         y = round(math.fsum([self[1] * cos_theta, -self[0] * sin_theta]), 6)
         return vec2(x, y)
 
-    def sqrmagnitude(self) -> float:
+    def sqrmagnitude(self, mode: Precision = None) -> float:
         """for quick comparisions"""
+        if _is_fast(mode):
+            return self.x * self.x + self.y * self.y
         return math.fsum([a ** 2 for a in self])
 
 
@@ -115,13 +161,20 @@ class vec3:
     z: float
 
     def __init__(self, x=0, y=0, z=0):
-        self.x, self.y, self.z = map(float, (x, y, z))
+        self.x, self.y, self.z = float(x), float(y), float(z)
 
     def __abs__(self) -> float:
         return self.magnitude()
 
     def __add__(self, other: Iterable) -> vec3:
-        if isinstance(other, (vec2, vec3)) or (isinstance(other, Iterable) and len(other) in (2, 3)):
+        if other.__class__ is vec3:  # specialised path
+            if _is_fast():
+                return _vec3(self.x + other.x, self.y + other.y, self.z + other.z)
+            return _vec3(
+                math.fsum((self.x, other.x)),
+                math.fsum((self.y, other.y)),
+                math.fsum((self.z, other.z)))
+        elif isinstance(other, (vec2, vec3)) or (isinstance(other, Iterable) and len(other) in (2, 3)):
             return vec3(*map(math.fsum, itertools.zip_longest(self, other, fillvalue=0)))
         else:
             raise TypeError(f"cannot add '{type(other).__name__}' to '{type(self).__name__}'")
@@ -151,7 +204,7 @@ class vec3:
 
     def __mul__(self, other: Union[float, Iterable]) -> vec3:
         if isinstance(other, (int, float)):
-            return vec3(*[i * other for i in self])
+            return _vec3(self.x * other, self.y * other, self.z * other)
         elif isinstance(other, Iterable):
             return vec3(math.fsum([self[1] * other[2], -self[2] * other[1]]),
                         math.fsum([self[2] * other[0], -self[0] * other[2]]),
@@ -174,7 +227,14 @@ class vec3:
             setattr(self, "xyz"[key], value)
 
     def __sub__(self, other: Iterable) -> vec3:
-        return vec3(*map(math.fsum, zip(self, -other)))
+        if other.__class__ is vec3:  # specialised path
+            if _is_fast():
+                return _vec3(self.x - other.x, self.y - other.y, self.z - other.z)
+            return _vec3(
+                math.fsum((self.x, -other.x)),
+                math.fsum((self.y, -other.y)),
+                math.fsum((self.z, -other.z)))
+        return vec3(*[math.fsum((s, -o)) for s, o in itertools.zip_longest(self, other, fillvalue=0)])
 
     def __truediv__(self, other: float) -> vec3:
         return vec3(self.x / other, self.y / other, self.z / other)
@@ -199,34 +259,63 @@ class vec3:
         cos_x, sin_x = math.cos(angles[0]), math.sin(angles[0])
         cos_y, sin_y = math.cos(angles[1]), math.sin(angles[1])
         cos_z, sin_z = math.cos(angles[2]), math.sin(angles[2])
+        if _is_fast():
+            x, y, z = self
+            y, z = y * cos_x - z * sin_x, y * sin_x + z * cos_x
+            x, z = x * cos_y + z * sin_y, z * cos_y - x * sin_y
+            x, y = x * cos_z - y * sin_z, x * sin_z + y * cos_z
+            return _vec3(round(x, 6), round(y, 6), round(z, 6))
         out = vec3(self[0],
                    math.fsum([self[1] * cos_x, -self[2] * sin_x]),
                    math.fsum([self[1] * sin_x, self[2] * cos_x]))
         out = vec3(math.fsum([out.x * cos_y, out.z * sin_y]),
                    out.y,
-                   math.fsum([out.z * cos_y, out.x * sin_y]))
+                   math.fsum([out.z * cos_y, -out.x * sin_y]))
         out = vec3(math.fsum([out.x * cos_z, -out.y * sin_z]),
                    math.fsum([out.x * sin_z, out.y * cos_z]),
                    out.z)
         out = vec3(*[round(i, 6) for i in out])
         return out
 
-    def sqrmagnitude(self) -> float:
+    def sqrmagnitude(self, mode: Precision = None) -> float:
         """vec3.magnitude but without math.sqrt
         handy for comparing length quickly"""
+        if _is_fast(mode):
+            return self.x * self.x + self.y * self.y + self.z * self.z
         return math.fsum([i ** 2 for i in self])
 
 
-def dot(a: Iterable, b: Iterable) -> float:
+# NOTE: skips float() & __init__; only pass floats!
+def _vec2(x: float, y: float) -> vec2:
+    out = vec2.__new__(vec2)
+    out.x, out.y = x, y
+    return out
+
+
+def _vec3(x: float, y: float, z: float) -> vec3:
+    out = vec3.__new__(vec3)
+    out.x, out.y, out.z = x, y, z
+    return out
+
+
+def dot(a: Iterable, b: Iterable, mode: Precision = None) -> float:
     """Returns the dot product of two vectors"""
+    if a.__class__ is vec3 and b.__class__ is vec3:  # specialised path
+        if _is_fast(mode):
+            return a.x * b.x + a.y * b.y + a.z * b.z
+        return math.fsum((a.x * b.x, a.y * b.y, a.z * b.z))
+    elif _is_fast(mode):
+        return sum([i * j for i, j in itertools.zip_longest(a, b, fillvalue=0)])
     return math.fsum([i * j for i, j in itertools.zip_longest(a, b, fillvalue=0)])
 
 
-def lerp(a: Union[float, Iterable], b: Union[float, Iterable], t: float) -> Union[float, list]:
+def lerp(a: Union[float, Iterable], b: Union[float, Iterable], t: float, mode: Precision = None) -> Union[float, list]:
     """Interpolates between two given points by t [0-1]"""
     if isinstance(a, Iterable) and isinstance(b, Iterable):
-        r = [lerp(i, j, t) for i, j in itertools.zip_longest(a, b, fillvalue=0)]
+        r = [lerp(i, j, t, mode) for i, j in itertools.zip_longest(a, b, fillvalue=0)]
         return r
+    elif _is_fast(mode):
+        return a + t * (b - a)
     else:
         return math.fsum([a, t * math.fsum([b, -a])])
 
@@ -259,4 +348,254 @@ def sort_clockwise(points: vec3, normal: Iterable) -> list:
     return sorted_vec3s
 
 
+# NOTE: arrays store components in one flat array.array("d")
+# -- [x0, y0, z0, x1, y1, z1, ...]
+# -- math is done per-axis w/ C-level loops (map & operator)
+# -- so we don't allocate a vec3 for every point in a mesh
+class VecArray:
+    """base class for contiguous arrays of vectors"""
+    __slots__ = ["data"]
+    data: array.array  # flat array of components
+    _size: int  # components per vector
+    _vector: type  # vec2 / vec3
+
+    def __init__(self, vectors: Iterable[Iterable[float]] = tuple()):
+        vectors = list(vectors)
+        if any(len(vector) != self._size for vector in vectors):
+            raise ValueError(f"{self.__class__.__name__} vectors must have {self._size} components")
+        self.data = array.array("d", itertools.chain.from_iterable(vectors))
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {len(self)} vectors>"
+
+    # CONTAINER
+
+    def __eq__(self, other: VecArray) -> bool:
+        if isinstance(other, VecArray) and len(other.data) == len(self.data):
+            return all(map(math.isclose, self.data, other.data))
+        return False
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[vec2, vec3, VecArray]:
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            size = self._size
+            if step == 1:
+                return self.from_flat(self.data[start * size:stop * size])
+            return self.__class__([self[i] for i in range(start, stop, step)])
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError(f"{self.__class__.__name__} index out of range")
+        return self._vector(*self.data[key * self._size:(key + 1) * self._size])
+
+    def __iter__(self) -> Iterable:
+        size = self._size
+        data = self.data
+        return (
+            self._vector(*data[i:i + size])
+            for i in range(0, len(data), size))
+
+    def __len__(self) -> int:
+        return len(self.data) // self._size
+
+    def __setitem__(self, key: int, value: Iterable[float]):
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError(f"{self.__class__.__name__} index out of range")
+        value = tuple(value)
+        assert len(value) == self._size
+        self.data[key * self._size:(key + 1) * self._size] = array.array("d", value)
+
+    def append(self, vector: Iterable[float]):
+        vector = tuple(vector)
+        assert len(vector) == self._size
+        self.data.extend(vector)
+
+    def extend(self, vectors: Union[VecArray, Iterable[Iterable[float]]]):
+        if isinstance(vectors, self.__class__):
+            self.data.extend(vectors.data)
+        else:
+            self.data.extend(self.__class__(vectors).data)
+
+    # MATH
+
+    def __add__(self, other: Union[VecArray, Iterable]) -> VecArray:
+        return self.from_flat(array.array("d", map(operator.add, self.data, self._operand(other))))
+
+    def __neg__(self) -> VecArray:
+        return self.from_flat(array.array("d", map(operator.neg, self.data)))
+
+    def __sub__(self, other: Union[VecArray, Iterable]) -> VecArray:
+        return self.from_flat(array.array("d", map(operator.sub, self.data, self._operand(other))))
+
+    def __truediv__(self, other: float) -> VecArray:
+        return self.scaled(1 / other)
+
+    def dot(self, other: Union[VecArray, Iterable]) -> array.array:
+        """dot product of each vector"""
+        products = array.array("d", map(operator.mul, self.data, self._operand(other)))
+        size = self._size
+        return array.array("d", functools.reduce(
+            lambda a, b: map(operator.add, a, b),
+            [products[i::size] for i in range(size)]))
+
+    def lerp(self, other: Union[VecArray, Iterable], t: float) -> VecArray:
+        """Interpolates between each pair of points by t [0-1]"""
+        delta = array.array("d", map(operator.sub, self._operand(other), self.data))
+        return self + self.from_flat(delta).scaled(t)
+
+    def magnitudes(self) -> array.array:
+        """length of each vector"""
+        return array.array("d", map(math.sqrt, self.sqrmagnitudes()))
+
+    def normalise(self):
+        """scale each vector into a unit vector"""
+        self.data = self.normalised().data
+
+    def normalised(self) -> VecArray:
+        """returns each vector as a unit vector (zero length vectors are unchanged)"""
+        scales = [
+            1 / m if m != 0 else 1.0
+            for m in self.magnitudes()]
+        size = self._size
+        return self.from_axes(*[
+            map(operator.mul, self.data[i::size], scales)
+            for i in range(size)])
+
+    def scaled(self, scale: float) -> VecArray:
+        return self.from_flat(array.array("d", map(operator.mul, self.data, itertools.repeat(scale))))
+
+    def sqrmagnitudes(self) -> array.array:
+        """VecArray.magnitudes but without math.sqrt"""
+        return self.dot(self)
+
+    # HELPERS
+
+    def _operand(self, other: Union[VecArray, Iterable]) -> Iterable[float]:
+        """flat components to pair with self.data"""
+        if isinstance(other, VecArray):
+            if len(other.data) != len(self.data) or other._size != self._size:
+                raise ValueError(f"cannot pair {other!r} with {self!r}")
+            return other.data
+        elif isinstance(other, (vec2, vec3, Iterable)):  # broadcast a single vector
+            other = tuple(other)
+            if len(other) != self._size:
+                raise ValueError(f"cannot pair {len(other)} component vector with {self!r}")
+            return itertools.cycle(other)
+        else:
+            raise TypeError(f"cannot pair '{type(other).__name__}' with '{type(self).__name__}'")
+
+    def axes(self) -> List[array.array]:
+        """[xs, ys, (zs)]"""
+        size = self._size
+        return [self.data[i::size] for i in range(size)]
+
+    # INITIALISERS
+
+    @classmethod
+    def from_axes(cls, *axes: Iterable[float]) -> VecArray:
+        """inverse of .axes()"""
+        assert len(axes) == cls._size
+        axes = [array.array("d", axis) for axis in axes]
+        assert len({len(axis) for axis in axes}) == 1, "all axes must be the same length"
+        out = cls.from_flat(array.array("d", bytes(8 * len(axes[0]) * cls._size)))
+        for i, axis in enumerate(axes):
+            out.data[i::cls._size] = axis
+        return out
+
+    @classmethod
+    def from_flat(cls, data: Iterable[float]) -> VecArray:
+        """wrap a flat array of components (no copy if data is already an array)"""
+        out = cls.__new__(cls)
+        out.data = data if isinstance(data, array.array) and data.typecode == "d" else array.array("d", data)
+        if len(out.data) % cls._size != 0:
+            raise ValueError(f"{cls.__name__} vectors must have {cls._size} components")
+        return out
+
+    def as_vectors(self) -> List[Union[vec2, vec3]]:
+        return list(self)
+
+
+class Vec2Array(VecArray):
+    """contiguous array of vec2s"""
+    __slots__ = list()
+    _size = 2
+    _vector = vec2
+
+    def __mul__(self, other: float) -> Vec2Array:
+        return self.scaled(other)
+
+    def __rmul__(self, other: float) -> Vec2Array:
+        return self.scaled(other)
+
+    def cross(self, other: Union[Vec2Array, Iterable]) -> array.array:
+        """z component of each 2D cross product"""
+        other = self.from_flat(array.array("d", itertools.islice(self._operand(other), len(self.data))))
+        xs, ys = self.axes()
+        oxs, oys = other.axes()
+        return array.array("d", map(
+            operator.sub,
+            map(operator.mul, xs, oys),
+            map(operator.mul, ys, oxs)))
+
+    def rotated(self, degrees: float) -> Vec2Array:
+        """returns each vector rotated clockwise on Z-axis (see vec2.rotated)"""
+        theta = math.radians(degrees)
+        cos_theta = math.cos(theta)
+        sin_theta = math.sin(theta)
+        xs, ys = self.axes()
+        return self.from_axes(
+            [round(x * cos_theta + y * sin_theta, 6) for x, y in zip(xs, ys)],
+            [round(y * cos_theta - x * sin_theta, 6) for x, y in zip(xs, ys)])
+
+
+class Vec3Array(VecArray):
+    """contiguous array of vec3s"""
+    __slots__ = list()
+    _size = 3
+    _vector = vec3
+
+    def __mul__(self, other: Union[float, Vec3Array, Iterable]) -> Vec3Array:
+        """scale by a float, or cross product w/ vector(s); like vec3"""
+        if isinstance(other, (int, float)):
+            return self.scaled(other)
+        return self.cross(other)
+
+    def __rmul__(self, other: float) -> Vec3Array:
+        return self.scaled(other)
+
+    def cross(self, other: Union[Vec3Array, Iterable]) -> Vec3Array:
+        other = self.from_flat(array.array("d", itertools.islice(self._operand(other), len(self.data))))
+        xs, ys, zs = self.axes()
+        oxs, oys, ozs = other.axes()
+        return self.from_axes(
+            [y * oz - z * oy for y, z, oy, oz in zip(ys, zs, oys, ozs)],
+            [z * ox - x * oz for x, z, ox, oz in zip(xs, zs, oxs, ozs)],
+            [x * oy - y * ox for x, y, ox, oy in zip(xs, ys, oxs, oys)])
+
+    def rotated(self, x: float = 0, y: float = 0, z: float = 0) -> Vec3Array:
+        """returns each vector rotated; same as vec3.rotated"""
+        angles = [math.radians(i) for i in (x, y, z)]
+        cos_x, sin_x = math.cos(angles[0]), math.sin(angles[0])
+        cos_y, sin_y = math.cos(angles[1]), math.sin(angles[1])
+        cos_z, sin_z = math.cos(angles[2]), math.sin(angles[2])
+        xs, ys, zs = self.axes()
+        # x-axis
+        ys, zs = (
+            [y * cos_x - z * sin_x for y, z in zip(ys, zs)],
+            [y * sin_x + z * cos_x for y, z in zip(ys, zs)])
+        # y-axis
+        xs, zs = (
+            [x * cos_y + z * sin_y for x, z in zip(xs, zs)],
+            [z * cos_y - x * sin_y for x, z in zip(xs, zs)])
+        # z-axis
+        xs, ys = (
+            [x * cos_z - y * sin_z for x, y in zip(xs, ys)],
+            [x * sin_z + y * cos_z for x, y in zip(xs, ys)])
+        return self.from_axes(*[
+            [round(a, 6) for a in axis]
+            for axis in (xs, ys, zs)])
+
+
 # TODO: ivec2, ivec3, QAngle
@@ -0,0 +1,55 @@
+from ass import geometry
+from ass import vector
+
+
+def cube_mesh() -> geometry.Mesh:
+    return geometry.generate_cube((-1, -1, -1), (1, 1, 1)).meshes[0]
+
+
+def test_from_mesh():
+    mesh = cube_mesh()
+    buffer = geometry.MeshBuffer.from_mesh(mesh)
+    assert buffer.material == mesh.material
+    assert len(buffer.polygons) == 6
+    assert buffer.num_vertices == 24  # each corner has a unique normal
+    assert len(buffer.indices) == 24
+    assert list(buffer.face_offsets) == [0, 4, 8, 12, 16, 20, 24]
+
+
+def test_shared_vertices():
+    normal = vector.vec3(0, 0, 1)
+    vertices = [
+        geometry.Vertex((x, y, 0), normal, (x, y))
+        for x, y in [(0, 0), (1, 0), (1, 1), (0, 1)]]
+    quad = [
+        geometry.Polygon([vertices[0], vertices[1], vertices[2]]),
+        geometry.Polygon([vertices[0], vertices[2], vertices[3]])]
+    buffer = geometry.MeshBuffer.from_mesh(geometry.Mesh(polygons=quad))
+    assert buffer.num_vertices == 4
+    assert list(buffer.indices) == [0, 1, 2, 0, 2, 3]
+    assert len(buffer.uvs) == 1
+
+
+def test_polygons_view():
+    mesh = cube_mesh()
+    buffer = geometry.MeshBuffer.from_mesh(mesh)
+    for expected, actual in zip(mesh.polygons, buffer.polygons):
+        assert isinstance(actual, geometry.Polygon)
+        assert actual.vertices == expected.vertices
+    assert buffer.polygons[-1].vertices == mesh.polygons[-1].vertices
+    assert len(buffer.polygons[1:3]) == 2
+    assert buffer.as_mesh().polygons[0].vertices == mesh.polygons[0].vertices
+
+
+def test_model():
+    buffer = geometry.MeshBuffer.from_mesh(cube_mesh())
+    model = geometry.Model([buffer])
+    assert model.meshes == [buffer]  # kept packed
+    model = geometry.Model([buffer, geometry.MeshBuffer.from_mesh(cube_mesh())])
+    assert len(model.meshes) == 1
+    assert isinstance(model.meshes[0], geometry.MeshBuffer)
+    assert len(model.meshes[0].polygons) == 12
+    assert model.meshes[0].polygons[6].vertices == buffer.polygons[0].vertices
+    model = geometry.Model([buffer, cube_mesh()])  # mixed
+    assert isinstance(model.meshes[0], geometry.Mesh)
+    assert len(model.meshes[0].polygons) == 12
@@ -0,0 +1,53 @@
+import math
+
+from ass import geometry
+from ass import vector
+
+
+def test_world_matrix_identity():
+    model = geometry.Model()
+    assert model.world_matrix == (
+        1, 0, 0, 0,
+        0, 1, 0, 0,
+        0, 0, 1, 0,
+        0, 0, 0, 1)
+
+
+def test_world_matrix_invalidated():
+    model = geometry.Model(origin=(1, 2, 3))
+    assert model.world_matrix[3::4] == (1, 2, 3, 1)
+    model.origin.x = 4  # in-place edit
+    assert model.world_matrix[3::4] == (4, 2, 3, 1)
+    model.origin = vector.vec3(5, 6, 7)  # replaced
+    assert model.world_matrix[3::4] == (5, 6, 7, 1)
+    model.angles.z = 90
+    assert math.isclose(model.world_matrix[4], 1)  # X+ -> Y+
+
+
+def test_transform_vertices():
+    model = geometry.Model(origin=(10, 0, 0), angles=(0, 0, 90), scale=2)
+    vertex = geometry.Vertex((1, 0, 0), (1, 0, 0), (0.5, 0.5))
+    transformed = model.transform_vertices([vertex])[0]
+    assert transformed.position == (10, 2, 0)
+    assert transformed.normal == (0, 1, 0)
+    assert transformed.uv == vertex.uv
+    # original is left unchanged
+    assert vertex.position == (1, 0, 0)
+
+
+def test_apply_transforms():
+    model = geometry.Model(origin=(1, 2, 3), angles=(15, 30, 45), scale=(1, 2, 3))
+    vertex = geometry.Vertex((1, 1, 1), (0, 0, 1))
+    expected = vector.vec3(1, 2, 3).rotated(15, 30, 45) + model.origin
+    normal = vector.vec3(0, 0, 1).rotated(15, 30, 45)
+    assert model.apply_transforms(vertex) is vertex
+    assert vertex.position == expected
+    assert vertex.normal == normal
+
+
+def test_transform_matrix():
+    model = geometry.Model(origin=(1, 2, 3), angles=(15, 30, 45), scale=(1, 2, 3))
+    translation, rotation, scale = model.transform_matrix.decompose()
+    assert translation == model.origin
+    assert model.transform_matrix.to_euler() == model.angles
+    assert scale == model.scale
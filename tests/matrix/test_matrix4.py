@@ -0,0 +1,97 @@
+import math
+
+from ass import matrix
+from ass import quaternion
+from ass import vector
+
+import pytest
+
+
+angles = {
+    "none": (0, 0, 0),
+    "yaw": (0, 0, 45),
+    "pitch": (0, 30, 0),
+    "roll": (60, 0, 0),
+    "all": (15, 30, 45),
+    "negative": (-20, -40, 170)}
+
+
+def test_identity():
+    identity = matrix.Matrix4()
+    assert identity.rows == [
+        (1, 0, 0, 0),
+        (0, 1, 0, 0),
+        (0, 0, 1, 0),
+        (0, 0, 0, 1)]
+    point = vector.vec3(1, 2, 3)
+    assert identity * point == point
+    assert identity * identity == identity
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        matrix.Matrix4(range(15))
+
+
+def test_translation():
+    translation = matrix.Matrix4.from_translation((1, 2, 3))
+    assert translation.translation == (1, 2, 3)
+    assert translation * vector.vec3(1, 1, 1) == (2, 3, 4)
+    assert translation.transform_direction(vector.vec3(1, 1, 1)) == (1, 1, 1)
+
+
+@pytest.mark.parametrize("xyz", angles.values(), ids=angles.keys())
+def test_from_euler(xyz):
+    rotation = matrix.Matrix4.from_euler(vector.vec3(*xyz))
+    point = vector.vec3(1, 2, 3)
+    for actual, expected in zip(rotation * point, point.rotated(*xyz)):
+        assert math.isclose(actual, expected, abs_tol=1e-6)  # .rotated rounds
+
+
+@pytest.mark.parametrize("xyz", angles.values(), ids=angles.keys())
+def test_quaternion(xyz):
+    xyz = vector.vec3(*xyz)
+    from_euler = matrix.Matrix4.from_euler(xyz)
+    from_quaternion = matrix.Matrix4.from_quaternion(quaternion.Quaternion.from_euler(xyz))
+    assert from_euler.is_close(from_quaternion, abs_tol=1e-9)
+    q = from_euler.to_quaternion()
+    assert matrix.Matrix4.from_quaternion(q).is_close(from_euler, abs_tol=1e-9)
+
+
+@pytest.mark.parametrize("xyz", angles.values(), ids=angles.keys())
+def test_to_euler(xyz):
+    rotation = matrix.Matrix4.from_euler(vector.vec3(*xyz))
+    assert rotation.to_euler() == xyz
+
+
+def test_gimbal_lock():
+    rotation = matrix.Matrix4.from_euler(vector.vec3(20, 90, 0))
+    recovered = matrix.Matrix4.from_euler(rotation.to_euler())
+    assert recovered.is_close(rotation, abs_tol=1e-9)
+
+
+def test_compose_decompose():
+    rotation = quaternion.Quaternion.from_euler(vector.vec3(15, 30, 45))
+    trs = matrix.Matrix4.compose((1, 2, 3), rotation, (2, 3, 4))
+    translation, new_rotation, scale = trs.decompose()
+    assert translation == (1, 2, 3)
+    assert scale == (2, 3, 4)
+    assert matrix.Matrix4.from_quaternion(new_rotation).is_close(
+        matrix.Matrix4.from_quaternion(rotation), abs_tol=1e-9)
+
+
+def test_inverse():
+    rotation = quaternion.Quaternion.from_euler(vector.vec3(15, 30, 45))
+    trs = matrix.Matrix4.compose((1, 2, 3), rotation, (2, 3, 4))
+    assert (trs * trs.inverse()).is_close(matrix.Matrix4(), abs_tol=1e-9)
+    point = vector.vec3(5, -6, 7)
+    assert trs.inverse() * (trs * point) == point
+    with pytest.raises(ValueError):
+        matrix.Matrix4.from_scale((0, 1, 1)).inverse()
+
+
+def test_transposed():
+    m = matrix.Matrix4(range(16))
+    assert m.transposed().rows == m.columns
+    assert m.transposed().transposed() == m
+    assert math.isclose(matrix.Matrix4.from_scale((2, 3, 4)).determinant(), 24)
@@ -0,0 +1,170 @@
+import math
+import random
+
+from ass.physics import AABB, Brush, BVH, Plane, Split
+from ass.vector import vec3
+
+import pytest
+
+
+def random_aabbs(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    out = list()
+    for i in range(count):
+        origin = [rng.uniform(-100, 100) for a in range(3)]
+        extents = [rng.uniform(0.5, 8) for a in range(3)]
+        out.append(AABB.from_origin_extents(origin, extents))
+    return out
+
+
+def wedge() -> Brush:
+    """unit cube cut in half diagonally; solid below x + y = 1"""
+    brush = Brush.from_bounds(AABB.from_origin_extents([0.5] * 3, [0.5] * 3))
+    brush._planes.append(Plane(vec3(1, 1, 0).normalised(), math.sqrt(2) / 2))
+    return brush
+
+
+def intersects(a: AABB, b: AABB) -> bool:
+    return all(m <= M2 and m2 <= M for m, M, m2, M2 in zip(a.mins, a.maxs, b.mins, b.maxs))
+
+
+splits = {s.name: s for s in Split}
+
+
+@pytest.mark.parametrize("split", splits.values(), ids=splits.keys())
+def test_build(split: Split):
+    aabbs = random_aabbs(256)
+    bvh = BVH(aabbs, split)
+    assert len(bvh) == 256
+    assert len(bvh.parents) == 2 * 256 - 1
+    assert bvh.depth() < 32
+    root_mins, root_maxs = bvh.node_bounds(bvh.root)
+    assert root_mins == tuple(min(a.mins[i] for a in aabbs) for i in range(3))
+    assert root_maxs == tuple(max(a.maxs[i] for a in aabbs) for i in range(3))
+    assert {id(a) for a in bvh} == {id(a) for a in aabbs}
+
+
+def test_empty():
+    bvh = BVH()
+    assert len(bvh) == 0
+    assert bvh.query_box(AABB.from_origin_extents([0] * 3, [1] * 3)) == list()
+    assert bvh.query_point((0, 0, 0)) == list()
+    assert bvh.query_ray((0, 0, 0), (1, 0, 0)) == list()
+    assert bvh.nearest((0, 0, 0)) is None
+
+
+@pytest.mark.parametrize("split", splits.values(), ids=splits.keys())
+def test_query_box(split: Split):
+    aabbs = random_aabbs(256)
+    bvh = BVH(aabbs, split)
+    for box in random_aabbs(32, seed=1):
+        expected = {id(a) for a in aabbs if intersects(a, box)}
+        assert {id(a) for a in bvh.query_box(box)} == expected
+
+
+def test_query_point():
+    aabbs = random_aabbs(256)
+    bvh = BVH(aabbs)
+    rng = random.Random(2)
+    for i in range(64):
+        point = vec3(*[rng.uniform(-100, 100) for a in range(3)])
+        expected = {id(a) for a in aabbs if point in a}
+        assert {id(a) for a in bvh.query_point(point)} == expected
+    # brush planes are tested once inside the bounds
+    brush = wedge()
+    bvh = BVH([brush])
+    assert bvh.query_point((0.25, 0.25, 0.5)) == [brush]
+    assert bvh.query_point((0.75, 0.75, 0.5)) == list()
+
+
+def test_query_ray():
+    aabbs = random_aabbs(256)
+    bvh = BVH(aabbs)
+    origin, direction = vec3(-200, 0, 0), vec3(1, 0, 0)
+    hits = bvh.query_ray(origin, direction)
+    expected = {id(a) for a in aabbs if a.mins.y <= 0 <= a.maxs.y and a.mins.z <= 0 <= a.maxs.z}
+    assert {id(a) for t, a in hits} == expected
+    assert [t for t, a in hits] == sorted(a.mins.x + 200 for t, a in hits)
+    assert all(t <= 50 for t, a in bvh.query_ray(origin, direction, 50))
+    # brushes are clipped by their planes
+    brush = wedge()
+    bvh = BVH([brush])
+    (t, hit), = bvh.query_ray((2, 0.25, 0.5), (-1, 0, 0))
+    assert hit is brush
+    assert math.isclose(t, 1.25)
+    assert bvh.query_ray((2, 0.9, 0.5), (-1, -1, 0)) == list()  # misses the cut corner
+    (t, hit), = bvh.query_ray((0.25, 0.25, 0.5), (0, 0, 1))  # starts inside
+    assert t == 0
+
+
+@pytest.mark.parametrize("split", splits.values(), ids=splits.keys())
+def test_nearest(split: Split):
+    aabbs = random_aabbs(256)
+    bvh = BVH(aabbs, split)
+    rng = random.Random(3)
+
+    def distance(point, aabb):
+        return math.sqrt(sum(max(m - p, 0, p - M) ** 2 for p, m, M in zip(point, aabb.mins, aabb.maxs)))
+
+    for i in range(32):
+        point = [rng.uniform(-150, 150) for a in range(3)]
+        d, aabb = bvh.nearest(point)
+        assert math.isclose(d, min(distance(point, a) for a in aabbs), abs_tol=1e-9)
+        assert math.isclose(d, distance(point, aabb), abs_tol=1e-9)
+    assert bvh.nearest((1000, 1000, 1000), max_distance=10) is None
+    # root is a leaf
+    box = aabbs[0]
+    bvh = BVH([box])
+    assert bvh.nearest((1000, 1000, 1000), max_distance=1) is None
+    d, nearest = bvh.nearest((1000, 1000, 1000))
+    assert nearest is box
+    assert math.isclose(d, distance((1000, 1000, 1000), box))
+    bvh = BVH(aabbs[:2], split)
+    bvh.remove(aabbs[1])
+    assert bvh.nearest((1000, 1000, 1000), max_distance=1) is None
+
+
+def test_insert_remove():
+    aabbs = random_aabbs(128)
+    bvh = BVH()
+    for aabb in aabbs:
+        bvh.insert(aabb)
+    assert len(bvh) == 128
+    assert bvh.depth() < 32
+    removed = aabbs[::2]
+    for aabb in removed:
+        bvh.remove(aabb)
+    kept = aabbs[1::2]
+    assert len(bvh) == 64
+    assert {id(a) for a in bvh} == {id(a) for a in kept}
+    for box in random_aabbs(16, seed=1):
+        expected = {id(a) for a in kept if intersects(a, box)}
+        assert {id(a) for a in bvh.query_box(box)} == expected
+    with pytest.raises(ValueError):
+        bvh.remove(removed[0])
+    # freed nodes are reused
+    node_count = len(bvh.parents)
+    for aabb in removed:
+        bvh.insert(aabb)
+    assert len(bvh.parents) == node_count
+    for aabb in aabbs:
+        bvh.remove(aabb)
+    assert bvh.root == -1
+    assert len(bvh) == 0
+
+
+def test_duplicates():
+    aabb, other = random_aabbs(2)
+    with pytest.raises(ValueError):
+        BVH([aabb, other, aabb])
+    bvh = BVH([aabb])
+    with pytest.raises(ValueError):
+        bvh.insert(aabb)
+    assert len(bvh) == 1
+    assert len(list(bvh)) == 1
+    bvh.remove(aabb)
+    assert bvh.query_box(aabb) == list()
+    # equal, but not the same object
+    twin = AABB.from_mins_maxs(aabb.mins, aabb.maxs)
+    bvh = BVH([aabb, twin])
+    assert len(bvh) == 2
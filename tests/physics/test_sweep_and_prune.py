@@ -0,0 +1,127 @@
+import itertools
+import random
+
+from ass import physics
+from ass import physics2d
+from ass.physics import AABB, SweepAndPrune
+
+import pytest
+
+
+def random_aabbs(count: int, seed: int = 0, spread: float = 100):
+    rng = random.Random(seed)
+    return [
+        AABB.from_origin_extents(
+            [rng.uniform(-spread, spread) for a in range(3)],
+            [rng.uniform(0.5, 8) for a in range(3)])
+        for i in range(count)]
+
+
+def intersects(a: AABB, b: AABB) -> bool:
+    return all(m <= M2 and m2 <= M for m, M, m2, M2 in zip(a.mins, a.maxs, b.mins, b.maxs))
+
+
+def brute_force(aabbs):
+    return [
+        (i, j)
+        for (i, a), (j, b) in itertools.combinations(enumerate(aabbs), 2)
+        if a is not None and b is not None and intersects(a, b)]
+
+
+seeds = {f"seed{i}": i for i in range(4)}
+
+
+@pytest.mark.parametrize("seed", seeds.values(), ids=seeds.keys())
+def test_find_overlapping_pairs(seed: int):
+    aabbs = random_aabbs(300, seed)
+    pairs = physics.find_overlapping_pairs(aabbs)
+    assert len(pairs) > 0
+    assert pairs == brute_force(aabbs)
+
+
+def test_empty():
+    assert physics.find_overlapping_pairs([]) == list()
+    assert physics.find_overlapping_pairs(random_aabbs(1)) == list()
+
+
+def test_touching():
+    a = AABB.from_mins_maxs((0, 0, 0), (1, 1, 1))
+    b = AABB.from_mins_maxs((1, 0, 0), (2, 1, 1))
+    c = AABB.from_mins_maxs((2.5, 0, 0), (3, 1, 1))
+    assert physics.find_overlapping_pairs([a, b, c]) == [(0, 1)]
+
+
+def test_update():
+    aabbs = random_aabbs(200)
+    sap = SweepAndPrune(aabbs)
+    rng = random.Random(1)
+    for step in range(100):
+        index = rng.randrange(len(aabbs))
+        before = set(sap.pairs)
+        if rng.random() < 0.5:  # move in place
+            aabbs[index].origin = aabbs[index].origin + [rng.uniform(-10, 10) for a in range(3)]
+            added, lost = sap.update(index)
+        else:  # replace w/ a bigger box
+            aabbs[index] = AABB.from_origin_extents(aabbs[index].origin, [rng.uniform(0.5, 24) for a in range(3)])
+            added, lost = sap.update(index, aabbs[index])
+        if step % 10 == 0:
+            assert sorted(sap.pairs) == brute_force(aabbs)
+        assert added == sap.pairs - before
+        assert lost == before - sap.pairs
+    assert sorted(sap.pairs) == sorted(SweepAndPrune(aabbs).pairs)
+
+
+def test_add_remove():
+    aabbs = random_aabbs(200)
+    sap = SweepAndPrune(aabbs[:100])
+    for aabb in aabbs[100:]:
+        index, added = sap.add(aabb)
+        assert sap.objects[index] is aabb
+        assert all(index in pair for pair in added)
+    assert sorted(sap.pairs) == brute_force(aabbs)
+    for index in range(0, 200, 3):
+        lost = sap.remove(index)
+        aabbs[index] = None
+        assert all(index in pair for pair in lost)
+    assert sorted(sap.pairs) == brute_force(aabbs)
+    with pytest.raises(IndexError):
+        sap.remove(0)
+    with pytest.raises(IndexError):
+        sap.update(0)
+    # rebuild re-reads every box
+    for aabb in aabbs[1::3]:
+        aabb.origin = aabb.origin + [5, 5, 5]
+    before = set(sap.pairs)
+    added, lost = sap.rebuild()
+    assert sorted(sap.pairs) == brute_force(aabbs)
+    assert (added, lost) == (sap.pairs - before, before - sap.pairs)
+
+
+def test_2d():
+    rng = random.Random(0)
+    shapes = list()
+    for i in range(300):
+        center = physics2d.vector.vec2(rng.uniform(-100, 100), rng.uniform(-100, 100))
+        if i % 2 == 0:
+            shapes.append(physics2d.Circle(center, rng.uniform(0.5, 8)))
+        else:
+            shapes.append(physics2d.AABB.from_origin_extents(center, (rng.uniform(0.5, 8), rng.uniform(0.5, 8))))
+
+    def overlap(a, b):
+        if isinstance(a, physics2d.Circle):
+            return a.intersects(b)
+        elif isinstance(b, physics2d.Circle):
+            return b.intersects(a)
+        return a.intersects(b)
+
+    expected = [
+        (i, j)
+        for (i, a), (j, b) in itertools.combinations(enumerate(shapes), 2)
+        if overlap(a, b)]
+    assert len(expected) > 0
+    assert physics2d.find_overlapping_pairs(shapes) == expected
+    # circle corner cases are tested exactly
+    circle = physics2d.Circle(physics2d.vector.vec2(0, 0), 1)
+    near_corner = physics2d.AABB.from_mins_maxs((0.8, 0.8), (2, 2))  # bounds overlap, circle doesn't
+    near_edge = physics2d.AABB.from_mins_maxs((0.9, -2), (2, 2))  # no corners inside circle
+    assert physics2d.find_overlapping_pairs([circle, near_corner, near_edge]) == [(0, 2), (1, 2)]
@@ -0,0 +1,76 @@
+import math
+
+from ass import quaternion
+from ass import vector
+
+import pytest
+
+
+angles = {
+    "yaw": (0, 0, 45),
+    "pitch": (0, 30, 0),
+    "roll": (60, 0, 0),
+    "all": (15, 30, 45)}
+
+
+def isclose_vec3(a, b):
+    return all(math.isclose(i, j, abs_tol=1e-6) for i, j in zip(a, b))
+
+
+@pytest.mark.parametrize("xyz", angles.values(), ids=angles.keys())
+def test_rotate(xyz):
+    q = quaternion.Quaternion.from_euler(vector.vec3(*xyz))
+    point = vector.vec3(1, 2, 3)
+    assert isclose_vec3(q.rotate(point), point.rotated(*xyz))
+    assert isclose_vec3(q * point, point.rotated(*xyz))
+
+
+@pytest.mark.parametrize("xyz", angles.values(), ids=angles.keys())
+def test_rotate_many(xyz):
+    q = quaternion.Quaternion.from_euler(vector.vec3(*xyz))
+    points = [vector.vec3(i, -i, i * 2) for i in range(8)]
+    rotated = q.rotate_many(vector.Vec3Array(points))
+    assert isinstance(rotated, vector.Vec3Array)
+    for actual, point in zip(rotated, points):
+        assert isclose_vec3(actual, q.rotate(point))
+
+
+@pytest.mark.parametrize("xyz", angles.values(), ids=angles.keys())
+def test_to_euler(xyz):
+    q = quaternion.Quaternion.from_euler(vector.vec3(*xyz))
+    assert q.to_euler() == xyz
+
+
+def test_multiply():
+    yaw = quaternion.Quaternion.from_euler(vector.vec3(z=90))
+    roll = quaternion.Quaternion.from_euler(vector.vec3(x=90))
+    point = vector.vec3(0, 1, 0)
+    # roll first, then yaw
+    assert isclose_vec3((yaw * roll) * point, yaw * (roll * point))
+    assert isclose_vec3((yaw * roll) * point, point.rotated(90, 0, 90))
+
+
+def test_inverse():
+    q = quaternion.Quaternion.from_euler(vector.vec3(15, 30, 45))
+    identity = quaternion.Quaternion(0, 0, 0, 1)
+    assert all(math.isclose(a, b, abs_tol=1e-9) for a, b in zip(q * q.inverse(), identity))
+    assert q.conjugate() == q.inverse()  # unit quaternion
+    with pytest.raises(ValueError):
+        quaternion.Quaternion().inverse()
+
+
+def test_normalise():
+    q = quaternion.Quaternion(1, 2, 3, 4)
+    assert not math.isclose(q.magnitude(), 1)
+    q.normalise()
+    assert math.isclose(q.magnitude(), 1)
+
+
+def test_slerp():
+    start = quaternion.Quaternion.from_euler(vector.vec3(z=0))
+    end = quaternion.Quaternion.from_euler(vector.vec3(z=90))
+    assert start.slerp(end, 0) == start
+    assert start.slerp(end, 1) == end
+    halfway = start.slerp(end, 0.5)
+    assert halfway == quaternion.Quaternion.from_euler(vector.vec3(z=45))
+    assert halfway == start.slerp(-end, 0.5)  # shortest path
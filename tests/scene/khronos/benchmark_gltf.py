@@ -0,0 +1,33 @@
+"""Gltf.from_models timings for grids of generate_cube models
+
+$ python tests/scene/khronos/benchmark_gltf.py
+"""
+import time
+
+from ass.scene import khronos
+from ass import geometry
+
+
+def tiled_cubes(size: int) -> dict:
+    """size x size grid of generate_cube models; 24 unique vertices each"""
+    return {
+        f"cube_{x}_{y}": geometry.generate_cube((x * 2, y * 2, 0), (x * 2 + 1, y * 2 + 1, 1))
+        for x in range(size)
+        for y in range(size)}
+
+
+def best_time(models: dict, deduplicate: bool, repeats: int = 3) -> float:
+    best = float("inf")
+    for attempt in range(repeats):
+        start = time.perf_counter()
+        khronos.Gltf.from_models("cubes.gltf", models, deduplicate=deduplicate)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    print("vertices | deduplicate | raw")
+    for size in (4, 8, 16, 32, 64):
+        models = tiled_cubes(size)
+        timings = [best_time(models, deduplicate) * 1000 for deduplicate in (True, False)]
+        print(f"{size * size * 24:>8} | {timings[0]:>9.2f}ms | {timings[1]:.2f}ms")
@@ -1,4 +1,11 @@
+import base64
+import io
+import json
+import os
+import struct
+
 from ass.scene import khronos
+from ass import geometry
 from ass import physics
 # from ass import quaternion
 from ass import vector
@@ -35,3 +42,180 @@ def test_cube():
     # TODO: verify buffers
     # -- vertex buffer
     # -- index buffer
+
+
+def test_deduplicate():
+    cube_model = physics.AABB.from_mins_maxs(
+        vector.vec3(-1, -1, -1),
+        vector.vec3(+1, +1, +1)).as_model()
+    models = {"cube_a": cube_model, "cube_b": cube_model}
+    gltf = khronos.Gltf.from_models("cubes.gltf", models)
+    vertex_buffer, index_buffer = gltf.buffers[0]
+    assert len(vertex_buffer.vertices) == 24  # 4 unique vertices per side
+    assert len(index_buffer.indices) == 2 * 6 * 2 * 3  # 2 cubes, 6 quads, 2 triangles each
+    # raw vertices
+    gltf = khronos.Gltf.from_models("cubes.gltf", models, deduplicate=False)
+    vertex_buffer, index_buffer = gltf.buffers[0]
+    assert len(vertex_buffer.vertices) == 2 * 6 * 4
+    assert len(index_buffer.indices) == 2 * 6 * 2 * 3
+
+
+def test_tiled_export():
+    # NOTE: timings for bigger grids: tests/scene/khronos/benchmark_gltf.py
+    for size in (4, 8):
+        models = dict()
+        for x in range(size):
+            for y in range(size):
+                model = geometry.generate_cube((0, 0, 0), (1, 1, 1))
+                model.origin = vector.vec3(x * 2, y * 2, 0)
+                models[f"cube_{x}_{y}"] = model
+        for deduplicate, num_vertices in ((True, 24), (False, size * size * 24)):
+            gltf = khronos.Gltf.from_models("cubes.gltf", models, deduplicate=deduplicate)
+            vertex_buffer, index_buffer = gltf.buffers[0]
+            assert len(vertex_buffer.vertices) == num_vertices
+            assert len(index_buffer.indices) == size * size * 6 * 2 * 3
+            assert len(gltf.json["nodes"]) == size * size
+
+
+def test_buffer_bytes():
+    cube_model = physics.AABB.from_mins_maxs(
+        vector.vec3(-1, -1, -1),
+        vector.vec3(+1, +1, +1)).as_model()
+    for deduplicate in (True, False):
+        gltf = khronos.Gltf.from_models("cube.gltf", {"cube": cube_model}, deduplicate=deduplicate)
+        vertex_buffer, index_buffer = gltf.buffers[0]
+        vertex_buffer.batch_size = 5  # test partial batches
+        expected = b"".join([
+            struct.pack("<3f3f4f", *vertex.position, *vertex.normal, *vertex.colour)
+            for vertex in vertex_buffer.vertices])
+        assert vertex_buffer.as_bytes() == expected
+        stream = io.BytesIO()
+        vertex_buffer.write(stream)
+        assert stream.getvalue() == expected
+        # indices
+        expected = struct.pack(f"<{len(index_buffer.indices)}I", *index_buffer.indices)
+        assert index_buffer.as_bytes() == expected
+        stream = io.BytesIO()
+        index_buffer.write(stream)
+        assert stream.getvalue() == expected
+
+
+def test_save_as_glb(tmp_path):
+    cube_model = physics.AABB.from_mins_maxs(
+        vector.vec3(-1, -1, -1),
+        vector.vec3(+1, +1, +1)).as_model()
+    gltf = khronos.Gltf.from_models("cube.glb", {"cube": cube_model})
+    gltf.save_as(str(tmp_path / "cube.glb"))
+    with open(tmp_path / "cube.glb", "rb") as glb_file:
+        raw = glb_file.read()
+    assert raw == gltf.as_bytes()
+    assert os.listdir(tmp_path) == ["cube.glb"]
+    # header
+    magic, version, length = struct.unpack("<4s2I", raw[:12])
+    assert (magic, version, length) == (b"glTF", 2, len(raw))
+    # JSON chunk
+    json_length, chunk_type = struct.unpack("<2I", raw[12:20])
+    assert chunk_type == khronos.Chunk.JSON.value
+    assert json_length % 4 == 0
+    glb_json = json.loads(raw[20:20 + json_length])
+    # BIN chunk
+    bin_start = 20 + json_length + 8
+    bin_length, chunk_type = struct.unpack("<2I", raw[bin_start - 8:bin_start])
+    assert chunk_type == khronos.Chunk.BIN.value
+    assert bin_start + bin_length == len(raw)
+    assert glb_json["buffers"] == [{"byteLength": bin_length}]
+    vertex_buffer, index_buffer = gltf.buffers[0]
+    for view, buffer in zip(glb_json["bufferViews"], (vertex_buffer, index_buffer)):
+        assert view["buffer"] == 0
+        assert view["byteOffset"] % 4 == 0
+        start = bin_start + view["byteOffset"]
+        assert raw[start:start + view["byteLength"]] == buffer.as_bytes()
+
+
+def test_save_as_gltf(tmp_path):
+    cube_model = physics.AABB.from_mins_maxs(
+        vector.vec3(-1, -1, -1),
+        vector.vec3(+1, +1, +1)).as_model()
+    gltf = khronos.Gltf.from_models("cube.gltf", {"cube": cube_model})
+    gltf.save_as(str(tmp_path / "cube.gltf"))
+    assert sorted(os.listdir(tmp_path)) == ["cube.gltf", "cube.index.0.bin", "cube.vertex.0.bin"]
+
+
+class TestParse:
+    def models(self):
+        aabb = physics.AABB.from_mins_maxs(
+            vector.vec3(-1, -1, -1),
+            vector.vec3(+1, +1, +1))
+        cube = aabb.as_model()
+        cube.angles.z = 45
+        moved_cube = aabb.as_model()
+        moved_cube.origin = vector.vec3(4, 0, 2)
+        moved_cube.scale = vector.vec3(1, 2, 3)
+        return {"cube": cube, "moved_cube": moved_cube}
+
+    def check(self, gltf: khronos.Gltf):
+        models = self.models()
+        assert list(gltf.models.keys()) == list(models.keys())
+        assert not any(gltf.models.is_loaded(name) for name in models)  # lazy
+        for name, model in models.items():
+            parsed = gltf.models[name]
+            assert gltf.models.is_loaded(name)
+            assert parsed.origin == model.origin
+            assert parsed.angles == model.angles
+            assert parsed.scale == model.scale
+            assert len(parsed.meshes) == 1
+            mesh = parsed.meshes[0]
+            assert isinstance(mesh, geometry.MeshBuffer)
+            assert len(mesh.polygons) == 6 * 2  # 6 quads -> 12 triangles
+            assert mesh.num_vertices == 24
+            expected = {(tuple(v.position), tuple(v.normal)) for v in model.meshes[0].polygons[0].vertices}
+            positions = {(tuple(p), tuple(n)) for p, n in zip(mesh.positions, mesh.normals)}
+            assert expected.issubset(positions)
+
+    def test_glb(self, tmp_path):
+        khronos.Gltf.from_models("cubes.glb", self.models()).save_as(str(tmp_path / "cubes.glb"))
+        self.check(khronos.Gltf.from_file(str(tmp_path / "cubes.glb"), parse=True))
+
+    def test_gltf(self, tmp_path):
+        khronos.Gltf.from_models("cubes.gltf", self.models()).save_as(str(tmp_path / "cubes.gltf"))
+        self.check(khronos.Gltf.from_file(str(tmp_path / "cubes.gltf"), parse=True))
+
+    def test_data_uri(self, tmp_path):
+        gltf = khronos.Gltf.from_models("cubes.gltf", self.models())
+        gltf.save_as(str(tmp_path / "cubes.gltf"))
+        for buffer in gltf.json["buffers"]:
+            with open(tmp_path / buffer["uri"], "rb") as bin_file:
+                data = base64.b64encode(bin_file.read()).decode()
+            buffer["uri"] = f"data:application/octet-stream;base64,{data}"
+            os.remove(bin_file.name)
+        with open(tmp_path / "cubes.gltf", "w") as json_file:
+            json.dump(gltf.json, json_file)
+        assert os.listdir(tmp_path) == ["cubes.gltf"]
+        self.check(khronos.Gltf.from_file(str(tmp_path / "cubes.gltf"), parse=True))
+
+    def test_resave(self, tmp_path):
+        khronos.Gltf.from_models("cubes.glb", self.models()).save_as(str(tmp_path / "cubes.glb"))
+        glb = khronos.Gltf.from_file(str(tmp_path / "cubes.glb"), parse=True)
+        assert glb.buffers == list()  # parsed
+        os.mkdir(tmp_path / "copy")
+        glb.save_as(str(tmp_path / "copy" / "cubes.glb"))
+        self.check(khronos.Gltf.from_file(str(tmp_path / "copy" / "cubes.glb"), parse=True))
+        glb.save_as(str(tmp_path / "copy" / "cubes.gltf"))
+        assert sorted(os.listdir(tmp_path / "copy")) == ["cubes.0.bin", "cubes.glb", "cubes.gltf"]
+        assert "uri" not in glb.json["buffers"][0]  # still reads the .glb BIN chunk
+        gltf = khronos.Gltf.from_file(str(tmp_path / "copy" / "cubes.gltf"), parse=True)
+        self.check(gltf)
+        # overwrite the file we parsed
+        gltf.save_as(str(tmp_path / "copy" / "cubes.gltf"))
+        self.check(khronos.Gltf.from_file(str(tmp_path / "copy" / "cubes.gltf"), parse=True))
+
+    def test_interleaved(self):
+        # 2 VEC3 float positions, w/ 4 bytes of padding between each
+        data = struct.pack("<3f4x3f4x", 1, 2, 3, 4, 5, 6)
+        uri = "data:application/octet-stream;base64," + base64.b64encode(data).decode()
+        gltf = khronos.Gltf("interleaved.gltf")
+        gltf.json = {
+            "buffers": [{"uri": uri, "byteLength": len(data)}],
+            "bufferViews": [{"buffer": 0, "byteLength": len(data), "byteStride": 16}],
+            "accessors": [{"bufferView": 0, "componentType": 5126, "count": 2, "type": "VEC3"}]}
+        assert list(gltf.accessor(0)) == [1, 2, 3, 4, 5, 6]
@@ -0,0 +1,119 @@
+import struct
+
+import pytest
+
+from ass.scene.pixar import crate
+
+
+def test_lz4_decompress():
+    # "ab" + match (offset 2, length 6) + "!"
+    block = b"\x22ab\x02\x00" + b"\x10!"
+    assert crate.lz4_decompress(block) == b"abababab!"
+    # long literals use extra length bytes
+    literals = bytes(range(20))
+    assert crate.lz4_decompress(bytes([0xF0, 20 - 15]) + literals) == literals
+
+
+def test_lz4_bad_offset():
+    with pytest.raises(ValueError):
+        crate.lz4_decompress(b"\x10a\x05\x00\x10a")
+
+
+def test_decompress():
+    block = b"\x22ab\x02\x00" + b"\x10!"
+    assert crate.decompress(b"\x00" + block) == b"abababab!"
+    chunks = b"\x02" + struct.pack("<i", len(block)) + block + struct.pack("<i", 2) + b"\x10?"
+    assert crate.decompress(chunks) == b"abababab!?"
+
+
+class TestDecodeInts:
+    def test_common_delta(self):
+        # deltas: 1, 1, 1, 7; common: 1
+        data = struct.pack("<i", 1) + bytes([0b01000000]) + struct.pack("<b", 7)
+        assert list(crate.decode_ints(data, 4)) == [1, 2, 3, 10]
+
+    def test_sizes(self):
+        # deltas: -2 (common), 300 (int16), -70000 (int32), -2 (common), 5 (int8)
+        codes = [0, 2, 3, 0, 1]
+        packed = bytes([
+            codes[0] | codes[1] << 2 | codes[2] << 4 | codes[3] << 6,
+            codes[4]])
+        data = struct.pack("<i", -2) + packed + struct.pack("<hib", 300, -70000, 5)
+        assert list(crate.decode_ints(data, 5)) == [-2, 298, -69702, -69704, -69699]
+
+    def test_unsigned(self):
+        data = struct.pack("<i", -1) + bytes([0])
+        assert list(crate.decode_ints(data, 1, "I")) == [0xFFFFFFFF]
+
+    def test_wide(self):
+        data = struct.pack("<q", 1 << 40) + bytes([0b0100]) + struct.pack("<h", -1)
+        assert list(crate.decode_ints(data, 2, "q")) == [1 << 40, (1 << 40) - 1]
+
+    def test_empty(self):
+        assert len(crate.decode_ints(b"", 0)) == 0
+
+
+def test_not_a_crate():
+    with pytest.raises(ValueError):
+        crate.Crate(b"#usda 1.0\n" + bytes(80))
+
+
+def test_lz4_compress():
+    for data in (b"", b"abc", bytes(range(256)) * 4, b"ab" * 1000 + b"!"):
+        block = crate.lz4_compress(data)
+        assert crate.lz4_decompress(block) == data
+    assert len(crate.lz4_compress(b"ab" * 1000)) < 100
+    assert crate.decompress(crate.compress(b"xyz" * 50)) == b"xyz" * 50
+
+
+@pytest.mark.parametrize("typecode", ["i", "I", "q"])
+def test_encode_ints(typecode):
+    values = [0, 1, 2, 3, 300, 70000, 70001, 5, 5, 5]
+    data = crate.encode_ints(values, typecode)
+    assert list(crate.decode_ints(data, len(values), typecode)) == values
+    compressed = crate.compressed_ints(values, typecode)
+    assert list(crate.read_compressed_ints(compressed, 0, len(values), typecode)[0]) == values
+
+
+def test_writer():
+    writer = crate.CrateWriter()
+    writer.add_spec("/", crate.SpecType.PSEUDO_ROOT, {
+        "upAxis": (crate.Type.TOKEN, "Z"),
+        "primChildren": (crate.Type.TOKEN_VECTOR, ["mesh"])})
+    writer.add_spec("/mesh", crate.SpecType.PRIM, {
+        "specifier": (crate.Type.SPECIFIER, "def"),
+        "typeName": (crate.Type.TOKEN, "Mesh"),
+        "properties": (crate.Type.TOKEN_VECTOR, ["faceVertexIndices"])})
+    indices = list(range(100))
+    writer.add_spec("/mesh.faceVertexIndices", crate.SpecType.ATTRIBUTE, {
+        "typeName": (crate.Type.TOKEN, "int[]"),
+        "default": (crate.Type.INT, indices)})
+    reader = crate.Crate(writer.as_bytes())
+    assert reader.children("/") == ["/mesh"]
+    assert reader.spec_fields("/")["upAxis"] == "Z"
+    assert reader.spec_fields("/mesh")["typeName"] == "Mesh"
+    assert reader.spec_fields("/mesh")["specifier"] == "def"
+    assert list(reader.spec_fields("/mesh.faceVertexIndices")["default"]) == indices
+
+
+def test_quaternions():
+    writer = crate.CrateWriter()
+    writer.add_spec("/", crate.SpecType.PSEUDO_ROOT, {
+        "primChildren": (crate.Type.TOKEN_VECTOR, ["root"])})
+    writer.add_spec("/root", crate.SpecType.PRIM, {
+        "specifier": (crate.Type.SPECIFIER, "def"),
+        "properties": (crate.Type.TOKEN_VECTOR, ["orient", "orients"])})
+    writer.add_spec("/root.orient", crate.SpecType.ATTRIBUTE, {
+        "typeName": (crate.Type.TOKEN, "quatf"),
+        "default": (crate.Type.QUATF, (1.0, 0.0, 0.0, 0.5))})
+    writer.add_spec("/root.orients", crate.SpecType.ATTRIBUTE, {
+        "typeName": (crate.Type.TOKEN, "quatd[]"),
+        "default": (crate.Type.QUATD, [(1.0, 2.0, 3.0, 4.0)])})
+    data = writer.as_bytes()
+    # stored as (i, j, k, real)
+    assert struct.pack("<4f", 0.0, 0.0, 0.5, 1.0) in data
+    assert struct.pack("<4d", 2.0, 3.0, 4.0, 1.0) in data
+    # read as (real, i, j, k); same as .usda text
+    reader = crate.Crate(data)
+    assert reader.spec_fields("/root.orient")["default"] == (1.0, 0.0, 0.0, 0.5)
+    assert reader.spec_fields("/root.orients")["default"] == [(1.0, 2.0, 3.0, 4.0)]
@@ -1,4 +1,7 @@
+import io
+
 from ass.scene import pixar
+from ass import geometry
 from ass import physics
 from ass import vector
 
@@ -39,3 +42,300 @@ def test_cube():
     # -- polygon indices & counts
     # -- mesh subsets (MaterialBindingAPI)
     # -- materials
+
+
+def test_usd_repr():
+    # pixar.py -> pixar/ package; keep the module level names
+    assert pixar.usd_repr is pixar.usd.usd_repr
+    assert pixar.sanitise is pixar.usd.sanitise
+    assert pixar.array_chunks is pixar.usd.array_chunks
+    assert pixar.usd_repr([True, False]) == "[true, false]"
+    assert pixar.usd_repr("tree.01") == '"tree_01"'
+    assert pixar.sanitise("foliage/tree 01") == "tree_01"
+
+
+def test_array_chunks():
+    points = [(0.5, 1.0, -2.0)] * 5
+    text = "".join(pixar.usd.array_chunks("point3f[]", points, batch_size=2))
+    assert text == repr(points)
+    assert "".join(pixar.usd.array_chunks("int[]", [1, 2, 3])) == "[1, 2, 3]"
+    assert "".join(pixar.usd.array_chunks("texCoord2f[]", [(1 / 3, 0.25)], "%.3g")) == "[(0.333, 0.25)]"
+    assert "".join(pixar.usd.array_chunks("float[]", [])) == "[]"
+
+
+def test_write():
+    aabb = physics.AABB.from_mins_maxs(
+        vector.vec3(-1, -1, -1),
+        vector.vec3(+1, +1, +1))
+    cube = pixar.Usd.from_models("cube.usd", {"cube": aabb.as_model()})
+    cube.float_format = "%.6g"
+    stream = io.StringIO()
+    cube.write(stream)
+    assert stream.getvalue().split("\n")[:-1] == cube.as_lines()
+    assert "point3f[] points = [(-1, -1, 1), " in stream.getvalue()
+
+
+def test_shared_points():
+    aabb = physics.AABB.from_mins_maxs(
+        vector.vec3(-1, -1, -1),
+        vector.vec3(+1, +1, +1))
+    cube = pixar.Usd.from_models("cube.usd", {"cube": aabb.as_model()})
+    cube.regenerate_prims()
+    mesh = cube.prims[0].children[0].children[0]
+    properties = {property_.name: property_ for property_ in mesh.properties}
+    assert len(properties["points"].value) == 8
+    assert len(properties["faceVertexIndices"].value) == 24
+    assert len(properties["primvars:normals"].value) == 6
+    assert properties["primvars:normals"].metadata == {"interpolation": "faceVarying"}
+    assert len(properties["primvars:normals:indices"].value) == 24
+    # corners still land on the same positions
+    model = aabb.as_model()
+    corners = [
+        tuple(vertex.position)
+        for polygon in model.meshes[0].polygons
+        for vertex in reversed(polygon.vertices)]
+    points = properties["points"].value
+    assert [points[i] for i in properties["faceVertexIndices"].value] == corners
+
+
+def test_save_as_usdc(tmp_path):
+    aabb = physics.AABB.from_mins_maxs(
+        vector.vec3(-1, -1, -1),
+        vector.vec3(+1, +1, +1))
+    cube_model = aabb.as_model()
+    cube_model.origin = vector.vec3(1, 2, 3)
+    cube = pixar.Usd.from_models("cube.usdc", {"cube": cube_model})
+    cube.save_as(str(tmp_path / "cube.usdc"))
+    with open(tmp_path / "cube.usdc", "rb") as usdc_file:
+        assert usdc_file.read(8) == b"PXR-USDC"
+    usdc = pixar.Usd.from_file(str(tmp_path / "cube.usdc"))
+    usdc.parse()
+    assert usdc.metadata["upAxis"] == "Z"
+    model = usdc.models["cube"]
+    assert model.origin == cube_model.origin
+    before = [
+        [tuple(vertex.position) for vertex in polygon.vertices]
+        for polygon in cube_model.meshes[0].polygons]
+    after = [
+        [tuple(vertex.position) for vertex in polygon.vertices]
+        for mesh in model.meshes
+        for polygon in mesh.polygons]
+    assert after == before
+
+
+def test_write_deep():
+    root = pixar.Prim("Xform", "n0", properties=[], children=[])
+    prim = root
+    for i in range(1, 50):
+        child = pixar.Prim("Xform", f"n{i}", properties=[pixar.Property("float", "x", 1.5)], children=[])
+        prim.children = [child]
+        prim = child
+    usd = pixar.Usd.from_models("deep.usda", {})
+    usd.prims = [root]
+    stream = io.StringIO()
+    usd.write(stream, buffer_size=64)
+    lines = stream.getvalue().split("\n")[:-1]
+    assert lines == usd.as_lines()
+    assert list(root.as_lines()) == lines[7:]
+    assert lines[-1] == "}"
+    assert lines[-2] == "    }"
+    deepest = 49 * "    "
+    assert f'{deepest}def Xform "n49"' in lines
+    assert f"{deepest}    float x = 1.5" in lines
+
+
+def test_instancing(tmp_path):
+    models = dict()
+    for i in range(3):
+        model = physics.AABB.from_mins_maxs(
+            vector.vec3(-1, -1, -1),
+            vector.vec3(+1, +1, +1)).as_model()
+        model.origin = vector.vec3(i * 4, 0, 0)
+        models[f"crate_{i}"] = model
+    models["big"] = physics.AABB.from_mins_maxs(
+        vector.vec3(-2, -2, -2),
+        vector.vec3(+2, +2, +2)).as_model()
+    usd = pixar.Usd.from_models("props.usdc", models)
+    usd.regenerate_prims()
+    root = usd.prims[0]
+    prims = {prim.name: prim for prim in root.children}
+    assert prims["_prototypes"].specifier == "class"
+    assert [prim.name for prim in prims["_prototypes"].children] == ["crate_0"]
+    for i in range(3):
+        instance = prims[f"crate_{i}"]
+        assert instance.metadata == {
+            "instanceable": True,
+            "prepend references": "</root/_prototypes/crate_0>"}
+        assert instance.children == []
+    assert prims["big"].children[0].type_ == "Mesh"
+    lines = usd.as_lines()
+    assert 'class Scope "_prototypes"' in [line.strip() for line in lines]
+    assert "        instanceable = true" in lines
+    # .usdc round trip
+    usd.save_as(str(tmp_path / "props.usdc"))
+    usdc = pixar.Usd.from_file(str(tmp_path / "props.usdc"))
+    usdc.parse()
+    assert list(usdc.models) == ["crate_0", "crate_1", "crate_2", "big"]
+    assert usdc.models["crate_2"].origin == vector.vec3(8, 0, 0)
+    # instances share their prototype's polygons
+    assert usdc.models["crate_1"].meshes[0].polygons[0] is usdc.models["crate_2"].meshes[0].polygons[0]
+    assert len(usdc.models["crate_1"].meshes[0].polygons) == 6
+    # instancing off
+    usd.instancing = False
+    usd.regenerate_prims()
+    assert "_prototypes" not in [prim.name for prim in usd.prims[0].children]
+
+
+def test_instancing_collision():
+    # NOTE: hash(-1) == hash(-2); these triangles have equal hashes but different content
+    def triangle(x: float) -> geometry.Model:
+        vertices = [
+            geometry.Vertex(position, (0, 0, 1), (0, 0))
+            for position in ((x, 0, 0), (1, 0, 0), (0, 1, 0))]
+        return geometry.Model([geometry.Mesh(geometry.Material("tri"), [geometry.Polygon(vertices)])])
+
+    triangles = {f"tri_{i}": triangle(x) for i, x in enumerate((-1, -2, -1))}
+    meshes = [model.meshes[0] for model in triangles.values()]
+    assert hash(pixar.usd.mesh_key(meshes[0])) == hash(pixar.usd.mesh_key(meshes[1]))
+    mesh_ids = dict()
+    keys = [pixar.usd.content_key(model, mesh_ids) for model in triangles.values()]
+    assert keys[0] != keys[1]
+    assert keys[0] == keys[2]
+    usd = pixar.Usd.from_models("triangles.usda", triangles)
+    usd.regenerate_prims()
+    prims = {prim.name: prim for prim in usd.prims[0].children}
+    assert [prim.name for prim in prims["_prototypes"].children] == ["tri_0"]
+    assert prims["tri_1"].children[0].type_ == "Mesh"
+    assert prims["tri_2"].metadata["prepend references"] == "</root/_prototypes/tri_0>"
+
+
+def test_property_from_lines():
+    points = pixar.Property.from_lines([
+        "point3f[] points = [(0, 1, 2), (3.5, -4e2, inf)] (",
+        '    interpolation = "vertex"',
+        ")"])
+    assert points.type_ == "point3f[]"
+    assert isinstance(points.value, vector.Vec3Array)
+    assert list(points.value.data)[:5] == [0, 1, 2, 3.5, -400]
+    assert points.metadata == {"interpolation": "vertex"}
+    indices = pixar.Property.from_lines(["int[] faceVertexIndices = [0, 1, 2, 3]"])
+    assert indices.value.typecode == "q"
+    assert list(indices.value) == [0, 1, 2, 3]
+    order = pixar.Property.from_lines(['uniform token[] xformOpOrder = ["xformOp:translate"]'])
+    assert (order.type_, order.value) == ("uniform token[]", ["xformOp:translate"])
+    binding = pixar.Property.from_lines(["rel material:binding = </_materials/brick>"])
+    assert (binding.type_, binding.value) == ("rel", "</_materials/brick>")
+    declared = pixar.Property.from_lines(["float radius"])
+    assert declared.value is None
+    assert list(declared.as_lines()) == ["float radius"]
+
+
+def test_bulk_array():
+    text = repr([(i, i + 0.5) for i in range(100)])
+    uvs = pixar.usd.bulk_array(text, "d", 2, window=16)
+    assert list(uvs.data) == [x for i in range(100) for x in (i, i + 0.5)]
+    ints = pixar.usd.bulk_array(repr(list(range(100))), "q", 1, window=16)
+    assert list(ints) == list(range(100))
+
+
+def test_prim_from_lines():
+    prim = pixar.Prim.from_lines([
+        'def Xform "model" (',
+        "    instanceable = true",
+        "    prepend references = </root/_prototypes/crate>",
+        ")",
+        "{",
+        "    double3 xformOp:translate = (1, 2, 3)  # comment",
+        "",
+        '    def Scope "empty"',
+        "    {",
+        "    }",
+        "}"])
+    assert (prim.specifier, prim.type_, prim.name) == ("def", "Xform", "model")
+    assert prim.metadata == {
+        "instanceable": True,
+        "prepend references": "</root/_prototypes/crate>"}
+    assert prim.properties[0].value == (1, 2, 3)
+    assert [child.name for child in prim.children] == ["empty"]
+
+
+def test_parse_text(tmp_path):
+    aabb = physics.AABB.from_mins_maxs(
+        vector.vec3(-1, -1, -1),
+        vector.vec3(+1, +1, +1))
+    cube_model = aabb.as_model()
+    cube_model.origin = vector.vec3(1, 2, 3)
+    cube = pixar.Usd.from_models("cube.usda", {"cube": cube_model})
+    cube.save_as(str(tmp_path / "cube.usda"))
+    usda = pixar.Usd.from_file(str(tmp_path / "cube.usda"))
+    usda.parse()
+    assert usda.as_lines() == cube.as_lines()
+    assert usda.metadata["upAxis"] == "Z"
+    model = usda.models["cube"]
+    assert model.origin == cube_model.origin
+    before = [
+        [tuple(vertex.position) for vertex in polygon.vertices]
+        for polygon in cube_model.meshes[0].polygons]
+    after = [
+        [tuple(vertex.position) for vertex in polygon.vertices]
+        for mesh in model.meshes
+        for polygon in mesh.polygons]
+    assert after == before
+
+
+def test_round_trip_arrays(tmp_path):
+    text = "\n".join([
+        "#usda 1.0",
+        "",
+        'def Xform "root"',
+        "{",
+        "    uniform int[] ids = [1, 2, 3]",
+        "    custom float3[] offsets = [(1, 2, 3), (4.5, 5, 6)]",
+        "    double3[] positions = [(0.5, 0, -1)]",
+        "    float2[] primvars:st = [(0, 1), (0.25, 0.75)]",
+        "    int3[] triples = [(1, 2, 3)]",
+        "    quatf[] orients = [(1, 0, 0, 0)]",
+        "    matrix4d[] frames = [((1, 0, 0, 0), (0, 1, 0, 0), (0, 0, 1, 0), (0, 0, 0, 1))]",
+        "}",
+        ""])
+    with open(tmp_path / "arrays.usda", "w") as usda_file:
+        usda_file.write(text)
+    first = pixar.Usd.from_file(str(tmp_path / "arrays.usda"))
+    first.parse()
+    written = "".join(first.as_lines())
+    assert "array(" not in written
+    assert "Array" not in written
+    assert "uniform int[] ids = [1, 2, 3]" in written
+    assert "custom float3[] offsets = [(1.0, 2.0, 3.0), (4.5, 5.0, 6.0)]" in written
+    first.save_as(str(tmp_path / "copy.usda"))
+    second = pixar.Usd.from_file(str(tmp_path / "copy.usda"))
+    second.parse()
+    assert second.as_lines() == first.as_lines()
+
+
+def test_primvar_defaults(tmp_path):
+    text = "\n".join([
+        "#usda 1.0",
+        "",
+        'def Mesh "quad"',
+        "{",
+        "    int[] faceVertexCounts = [4]",
+        "    int[] faceVertexIndices = [0, 1, 2, 3]",
+        "    point3f[] points = [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)]",
+        "    normal3f[] primvars:normals = [(0, 0, 1)]",
+        "    float2[] primvars:st = [(0, 0), (1, 0), (1, 1), (0, 1)] (",
+        '        interpolation = "faceVarying"',
+        "    )",
+        "    texCoord2f[] primvars:lightmap = [(0.5, 0.5)]",
+        "}",
+        ""])
+    with open(tmp_path / "quad.usda", "w") as usda_file:
+        usda_file.write(text)
+    usda = pixar.Usd.from_file(str(tmp_path / "quad.usda"))
+    usda.parse()
+    polygon, = usda.models["quad"].meshes[0].polygons
+    # primvars w/o interpolation are constant
+    assert {tuple(vertex.normal) for vertex in polygon.vertices} == {(0, 0, 1)}
+    assert {tuple(vertex.uv1) for vertex in polygon.vertices} == {(0.5, 0.5)}
+    # float2[] primvars are uvs (reversed for rightHanded orientation)
+    assert [tuple(vertex.uv0) for vertex in polygon.vertices] == [(0, 1), (1, 1), (1, 0), (0, 0)]
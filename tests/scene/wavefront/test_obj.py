@@ -1,3 +1,8 @@
+import io
+import re
+
+import pytest
+
 from ass.scene import wavefront
 from ass import geometry
 from ass import vector
@@ -42,3 +47,307 @@ def test_dummy():
         line_no += 1
 
     assert len(lines) == 4 + 2 * 4 * len(quads) + len(quads)
+
+
+def test_indexed():
+    model = geometry.generate_cube((0, 0, 0), (1, 1, 1))
+    obj = wavefront.Obj.from_models("cube.obj", [model, model])
+    obj.indexed = True
+    lines = obj.as_lines()
+    assert lines[:3] == ["# generated w/ ass", "g group_000", "o model_000"]
+    # first model
+    v_lines = [line for line in lines[3:] if line.startswith("v ")]
+    vn_lines = [line for line in lines[3:] if line.startswith("vn ")]
+    f_lines = [line for line in lines[3:] if line.startswith("f ")]
+    assert len(v_lines) == 2 * 8  # shared corners
+    assert len(vn_lines) == 2 * 6  # shared face normals
+    assert len(f_lines) == 2 * 6
+    assert len(set(v_lines)) == 8
+    # second model writes its own pools
+    second = lines.index("o model_001")
+    assert lines[second + 1].startswith("v ")
+    indices = {
+        int(corner.split("//")[0])
+        for line in lines[second:] if line.startswith("f ")
+        for corner in line[2:].split(" ")}
+    assert indices == set(range(9, 17))
+    # same polygons as the default mode (w/ absolute indices)
+    obj.indexed = False
+    positions = {line[2:] for line in obj.as_lines() if line.startswith("v ")}
+    assert positions == {line[2:] for line in v_lines}
+
+
+class TestChunks:
+    def obj(self) -> wavefront.Obj:
+        models = [
+            geometry.generate_cube((i, 0, 0), (i + 0.5, 1, 1))
+            for i in range(3)]
+        return wavefront.Obj.from_models("cubes.obj", models)
+
+    @pytest.mark.parametrize("indexed", (False, True))
+    def test_batches(self, indexed: bool):
+        obj = self.obj()
+        obj.indexed = indexed
+        lines = obj.as_lines()
+        obj.batch_size = 4  # 2 chunks of faces per model
+        chunks = list(obj.chunks())
+        assert all(chunk.endswith("\n") for chunk in chunks)
+        batched_lines = "".join(chunks).split("\n")[:-1]
+        if indexed:  # new v, vt & vn are written before each batch of faces
+            assert sorted(batched_lines) == sorted(lines)
+        else:
+            assert batched_lines == lines
+        assert len([line for line in batched_lines if line.startswith("f ")]) == 3 * 6
+        assert len(chunks) > len(obj.groups["group_000"]) * 2
+
+    def test_float_format(self):
+        obj = self.obj()
+        obj.float_format = "%.3g"
+        lines = obj.as_lines()
+        assert "v 0.5 0 0" in lines
+        assert "vn -1 0 0" in lines
+
+    def test_write(self):
+        obj = self.obj()
+        stream = io.StringIO()
+        obj.write(stream)
+        assert stream.getvalue() == "\n".join(obj.as_lines()) + "\n"
+
+
+test_obj_lines = """# test
+mtllib test.mtl
+v 0 0 0
+v 1 0 0
+v 1 1 0
+v 0 1 0
+vt 0 0
+vt 1 0
+vt 1 1
+vn 0 0 1
+g first
+o quad
+usemtl brick
+f 1/1/1 2/2/1 3/3/1 4/3/1
+usemtl tile
+f 1//1 2//1 3//1
+o tri
+f 1 2 3
+f -4/-3/-1 -3/-2/-1 -2/-1/-1
+g second
+  f 1/1 2/2 3/3
+f 1/1/1 2//1 3""".split("\n")
+
+
+class TestFastParse:
+    def polygons(self, obj: wavefront.Obj):
+        return {
+            (group_name, model_name, mesh.material.name): [
+                [(tuple(v.position), tuple(v.normal), tuple(v.uv[0]), tuple(v.colour)) for v in polygon]
+                for polygon in mesh.polygons]
+            for group_name, models in obj.groups.items()
+            for model_name, model in models.items()
+            for mesh in model.meshes}
+
+    def test_matches_slow_parse(self):
+        slow = wavefront.Obj.from_lines("test.obj", test_obj_lines)
+        slow.parse()
+        fast = wavefront.Obj.from_lines("test.obj", test_obj_lines)
+        fast.parse(fast=True)
+        assert fast.mtl_files == slow.mtl_files == ["test.mtl"]
+        assert self.polygons(fast) == self.polygons(slow)
+        assert all(
+            isinstance(mesh, geometry.MeshBuffer)
+            for models in fast.groups.values()
+            for model in models.values()
+            for mesh in model.meshes)
+
+    def test_indented(self):
+        lines = [
+            "g first", "v 0 0 0", "v 1 0 0", "v 0 1 0", "f 1 2 3",
+            "  g indented", "    o tri", "\tv 0 0 1", "  f 1 2 4", "\tf\t2 3 -1"]
+        fast = wavefront.Obj.from_lines("test.obj", lines)
+        fast.parse(fast=True)
+        lazy = wavefront.Obj.from_lines("test.obj", lines)
+        lazy.parse(lazy=True)
+        assert list(lazy.groups) == ["first", "indented"]
+        assert list(lazy.groups["indented"]) == ["tri"]
+        assert [block[4] for block in lazy.blocks] == [(3, 0, 0, 1), (0, 0, 0, 0), (1, 0, 0, 2)]
+        polygons = TestFastParse.polygons
+        assert polygons(self, lazy) == polygons(self, fast)
+        assert len(lazy.groups["indented"]["tri"].meshes[0].polygons) == 2
+
+    def test_shared_vertices(self):
+        obj = wavefront.Obj.from_lines("test.obj", test_obj_lines)
+        obj.parse(fast=True)
+        brick = obj.groups["first"]["quad"].meshes[0]
+        assert brick.num_vertices == 4
+        assert list(brick.indices) == [0, 1, 2, 3]
+
+    def test_extra_components(self):
+        lines = ["v 0 0 0 1", "v 1 0 0 1", "v 0 1 0 1", "vt 0 0 0", "vt 1 0 0", "vt 0 1 0", "f 1/1 2/2 3/3"]
+        obj = wavefront.Obj.from_lines("test.obj", lines)
+        obj.parse(fast=True)
+        mesh = obj.groups[None][None].meshes[0]
+        assert list(mesh.positions.data) == [0, 0, 0, 1, 0, 0, 0, 1, 0]
+        assert list(mesh.uvs[0].data) == [0, 0, 1, 0, 0, 1]
+
+    def test_index_out_of_range(self):
+        obj = wavefront.Obj.from_lines("test.obj", ["v 0 0 0", "f 1 2 3"])
+        with pytest.raises(IndexError):
+            obj.parse(fast=True)
+
+
+class TestParallelParse:
+    @pytest.mark.parametrize("workers", (2, 4))
+    def test_matches_fast_parse(self, tmp_path, workers: int):
+        # NOTE: each line is roughly one chunk; state & relative indices cross chunks
+        with open(tmp_path / "test.obj", "w") as obj_file:
+            obj_file.write("\n".join(test_obj_lines))
+        fast = wavefront.Obj.from_lines("test.obj", test_obj_lines)
+        fast.parse(fast=True)
+        parallel = wavefront.Obj.from_file(str(tmp_path / "test.obj"))
+        parallel.parse(workers=workers)
+        assert parallel.mtl_files == ["test.mtl"]
+        polygons = TestFastParse.polygons
+        assert polygons(self, parallel) == polygons(self, fast)
+
+    @pytest.mark.parametrize("workers", (2, 4))
+    def test_irregular(self, tmp_path, workers: int):
+        # NOTE: tab separated & indented state records must carry across chunks
+        lines = ["v\t0 0 0", "v\t1 0 0", "v\t0 1 0"]
+        for i in range(4):
+            lines.extend([f"g\tgrp{i}", f"  usemtl\tm{i}", *["\tf\t1 2 3"] * 50])
+        with open(tmp_path / "test.obj", "w") as obj_file:
+            obj_file.write("\n".join(lines))
+        fast = wavefront.Obj.from_lines("test.obj", lines)
+        fast.parse(fast=True)
+        assert list(fast.groups) == [f"grp{i}" for i in range(4)]
+        parallel = wavefront.Obj.from_file(str(tmp_path / "test.obj"))
+        parallel.parse(workers=workers)
+        polygons = TestFastParse.polygons
+        assert polygons(self, parallel) == polygons(self, fast)
+
+    def test_chunk_state(self):
+        text = b"g first\no quad\nusemtl brick\nf 1 2 3\ng second\nf 1 2 3\no tri\nf 1 2 3\n"
+        states = {
+            text.index(b"f 1"): ("first", "quad", "brick"),
+            text.index(b"g second"): ("first", "quad", "brick"),
+            text.index(b"f 1", text.index(b"g second")): ("second", None, "default"),
+            text.index(b"f 1", text.index(b"o tri")): ("second", "tri", "default")}
+        for start, state in states.items():
+            assert wavefront.chunk_state(text, start, ("utf-8", "strict")) == state
+        # indented & tab separated
+        text = text.replace(b"g ", b"g\t").replace(b"o ", b"  o ").replace(b"usemtl ", b"\tusemtl\t")
+        states = dict(zip(
+            [m.start() for m in re.finditer(rb"f 1", text)],
+            [("first", "quad", "brick"), ("second", None, "default"), ("second", "tri", "default")]))
+        for start, state in states.items():
+            assert wavefront.chunk_state(text, start, ("utf-8", "strict")) == state
+
+    def test_chunk_bounds(self):
+        text = b"v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n"
+        bounds = wavefront.chunk_bounds(text, 3)
+        assert bounds[0][0] == 0 and bounds[-1][1] == len(text)
+        assert all(text[start - 1:start] == b"\n" for start, end in bounds[1:])
+        assert b"".join(text[start:end] for start, end in bounds) == text
+
+
+class TestMtl:
+    mtl_lines = [
+        "# test material library",
+        "newmtl brick",
+        "Kd 0.8 0.2 0.1",
+        "Ns 96.0",
+        "illum 2",
+        "map_Kd -bm 0.5 brick.png",
+        "norm brick_normal.png"]
+
+    def test_metadata(self):
+        mtl = wavefront.Mtl.from_lines("test.mtl", self.mtl_lines)
+        mtl.parse()
+        assert list(mtl.materials) == ["brick"]
+        metadata = mtl.materials["brick"].metadata
+        assert metadata["Kd"] == (0.8, 0.2, 0.1)
+        assert metadata["Ns"] == 96.0
+        assert metadata["illum"] == 2
+        assert metadata["map_Kd"] == "brick.png"
+        assert metadata["norm"] == "brick_normal.png"
+
+    def test_shared_material(self, tmp_path):
+        obj_lines = [
+            "mtllib test.mtl",
+            "v 0 0 0", "v 1 0 0", "v 0 1 0",
+            "usemtl brick",
+            "f 1 2 3"]
+        with open(tmp_path / "test.obj", "w") as obj_file:
+            obj_file.write("\n".join(obj_lines))
+        with open(tmp_path / "test.mtl", "w") as mtl_file:
+            mtl_file.write("\n".join(self.mtl_lines))
+        slow = wavefront.Obj.from_file(str(tmp_path / "test.obj"))
+        slow.parse()
+        slow.make_friends({"test.mtl": str(tmp_path / "test.mtl")})
+        fast = wavefront.Obj.from_file(str(tmp_path / "test.obj"))
+        fast.parse(fast=True)
+        materials = {
+            mesh.material
+            for obj in (slow, fast)
+            for group in obj.groups.values()
+            for model in group.values()
+            for mesh in model.meshes}
+        assert len(materials) == 1
+        material = materials.pop()
+        assert material is wavefront.shared_material("brick")
+        assert isinstance(slow.friends["test.mtl"], wavefront.Mtl)
+        assert material.metadata["map_Kd"] == "brick.png"
+
+
+class TestLazyParse:
+    def test_matches_fast_parse(self, tmp_path):
+        with open(tmp_path / "test.obj", "w") as obj_file:
+            obj_file.write("\n".join(test_obj_lines))
+        fast = wavefront.Obj.from_lines("test.obj", test_obj_lines)
+        fast.parse(fast=True)
+        lazy = wavefront.Obj.from_file(str(tmp_path / "test.obj"))
+        lazy.parse(lazy=True)
+        assert lazy.mtl_files == ["test.mtl"]
+        assert not any(
+            models.is_loaded(model_name)
+            for models in lazy.groups.values()
+            for model_name in models)
+        polygons = TestFastParse.polygons
+        assert polygons(self, lazy) == polygons(self, fast)
+
+    def test_from_stream(self):
+        fast = wavefront.Obj.from_lines("test.obj", test_obj_lines)
+        fast.parse(fast=True)
+        lazy = wavefront.Obj.from_lines("test.obj", test_obj_lines)
+        lazy.parse(lazy=True)
+        polygons = TestFastParse.polygons
+        assert polygons(self, lazy) == polygons(self, fast)
+
+    def test_shared_vertices(self):
+        # NOTE: "o second" uses vertices from "o first" (absolute indices)
+        lines = [
+            "o first", "v 0 0 0", "v 1 0 0", "v 0 1 0", "f 1 2 3",
+            "o empty", "v 0 0 1",
+            "o second", "v 1 1 0", "f 2 5 3", "f -1 -2 -4"]
+        lazy = wavefront.Obj.from_lines("test.obj", lines)
+        lazy.parse(lazy=True)
+        assert list(lazy.groups[None]) == ["first", "second"]
+        second = lazy.groups[None]["second"]
+        assert not lazy.groups[None].is_loaded("first")
+        positions = [
+            tuple(vertex.position)
+            for polygon in second.meshes[0].polygons
+            for vertex in polygon.vertices]
+        assert positions == [(1, 0, 0), (1, 1, 0), (0, 1, 0), (1, 1, 0), (0, 0, 1), (1, 0, 0)]
+
+    def test_index_blocks(self):
+        text = b"mtllib a.mtl\nv 0 0 0\ng first\nv 1 0 0\nvt 0 0\nf 1 2 3\no quad\nf 1 2 3\n"
+        blocks = wavefront.index_blocks(text, ("utf-8", "strict"))
+        assert [block[2] for block in blocks] == [
+            (None, None, "default"),
+            ("first", None, "default"),
+            ("first", "quad", "default")]
+        assert [block[3] for block in blocks] == [(0, 0, 0), (1, 0, 0), (2, 1, 0)]
+        assert [block[4] for block in blocks] == [(1, 0, 0, 0), (1, 1, 0, 1), (0, 0, 0, 1)]
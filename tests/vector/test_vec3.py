@@ -112,3 +112,58 @@ class TestMath:
         B = vector.vec3(0.9, 0.8, 0.7)
         C = A + B
         assert (C.x, C.y, C.z) == (1.0, 1.0, 1.0)
+
+    def test_sub(self):
+        A = vector.vec3(1.0, 1.0, 1.0)
+        B = vector.vec3(0.9, 0.8, 0.7)
+        assert A - B == [0.1, 0.2, 0.3]
+        assert A - B == A - (0.9, 0.8, 0.7)
+
+    def test_rotated(self):
+        A = vector.vec3(1, 0, 0)
+        assert A.rotated(z=90) == [0, 1, 0]
+        assert A.rotated(y=90) == [0, 0, -1]
+        assert vector.vec3(0, 1, 0).rotated(x=90) == [0, 0, 1]
+        B = vector.vec3(1, 2, 3)
+        assert math.isclose(B.rotated(15, 30, 45).magnitude(), B.magnitude(), rel_tol=1e-6)
+
+
+class TestPrecision:
+    def test_default(self):
+        assert vector.precision == vector.Precision.EXACT
+
+    def test_context(self):
+        with vector.precision_mode(vector.Precision.FAST):
+            assert vector.precision == vector.Precision.FAST
+        assert vector.precision == vector.Precision.EXACT
+
+    def test_fast_matches_exact(self):
+        A = vector.vec3(0.1, 0.2, 0.3)
+        B = vector.vec3(0.9, -0.8, 0.7)
+        exact = (A + B, A - B, A * 3, A.rotated(15, 30, 45), vector.dot(A, B), A.sqrmagnitude())
+        with vector.precision_mode(vector.Precision.FAST):
+            fast = (A + B, A - B, A * 3, A.rotated(15, 30, 45), vector.dot(A, B), A.sqrmagnitude())
+        for e, f in zip(exact, fast):
+            if isinstance(e, float):
+                assert math.isclose(e, f)
+            else:
+                assert e == f
+
+    def test_fast_vec2(self):
+        A = vector.vec2(0.1, 0.2)
+        B = vector.vec2(0.9, -0.8)
+        exact = (A + B, A - B, A.rotated(30), A.rotated(-135), A.sqrmagnitude())
+        with vector.precision_mode(vector.Precision.FAST):
+            fast = (A + B, A - B, A.rotated(30), A.rotated(-135), A.sqrmagnitude())
+        for e, f in zip(exact, fast):
+            if isinstance(e, float):
+                assert math.isclose(e, f)
+            else:
+                assert isinstance(f, vector.vec2)
+                assert e == f
+
+    def test_per_call(self):
+        A = vector.vec3(0.1, 0.2, 0.3)
+        fast = vector.dot(A, A, mode=vector.Precision.FAST)
+        assert math.isclose(fast, vector.dot(A, A))
+        assert math.isclose(vector.lerp(1, 3, 0.25, mode=vector.Precision.FAST), 1.5)
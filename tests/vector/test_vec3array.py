@@ -0,0 +1,124 @@
+import math
+
+from ass import vector
+
+import pytest
+
+
+points = [vector.vec3(i, i * 2, -i) for i in range(-4, 5)]
+
+
+class TestInit:
+    def test_from_vec3s(self):
+        array = vector.Vec3Array(points)
+        assert len(array) == len(points)
+        assert len(array.data) == len(points) * 3
+        assert array.as_vectors() == points
+        assert all(isinstance(v, vector.vec3) for v in array)
+
+    def test_from_tuples(self):
+        array = vector.Vec3Array([(1, 2, 3), (4, 5, 6)])
+        assert array[1] == vector.vec3(4, 5, 6)
+        assert array[-1] == vector.vec3(4, 5, 6)
+
+    def test_bad_length(self):
+        with pytest.raises(ValueError):
+            vector.Vec3Array([(1, 2, 3), (4, 5)])
+        # total is a multiple of 3, but each item isn't
+        with pytest.raises(ValueError):
+            vector.Vec3Array([(1, 2), (3, 4), (5, 6)])
+        with pytest.raises(ValueError):
+            vector.Vec3Array([(1, 2, 3, 4), (5, 6)])
+
+    def test_axes(self):
+        array = vector.Vec3Array(points)
+        xs, ys, zs = array.axes()
+        assert list(xs) == [p.x for p in points]
+        assert vector.Vec3Array.from_axes(xs, ys, zs) == array
+
+
+class TestSequence:
+    def test_slice(self):
+        array = vector.Vec3Array(points)
+        assert array[2:5].as_vectors() == points[2:5]
+        assert array[::2].as_vectors() == points[::2]
+
+    def test_setitem(self):
+        array = vector.Vec3Array(points)
+        array[0] = (9, 9, 9)
+        assert array[0] == vector.vec3(9, 9, 9)
+        assert array[1] == points[1]
+
+    def test_append_extend(self):
+        array = vector.Vec3Array()
+        array.append(points[0])
+        array.extend(points[1:])
+        assert array.as_vectors() == points
+
+
+class TestMath:
+    def test_add_sub(self):
+        A = vector.Vec3Array(points)
+        B = vector.Vec3Array(reversed(points))
+        assert (A + B).as_vectors() == [a + b for a, b in zip(points, reversed(points))]
+        assert (A - B).as_vectors() == [a - b for a, b in zip(points, reversed(points))]
+
+    def test_broadcast(self):
+        A = vector.Vec3Array(points)
+        offset = vector.vec3(1, 2, 3)
+        assert (A + offset).as_vectors() == [p + offset for p in points]
+
+    def test_scale(self):
+        A = vector.Vec3Array(points)
+        assert (A * 2).as_vectors() == [p * 2 for p in points]
+        assert (A / 2).as_vectors() == [p / 2 for p in points]
+
+    def test_dot(self):
+        A = vector.Vec3Array(points)
+        B = vector.Vec3Array(reversed(points))
+        expected = [vector.dot(a, b) for a, b in zip(points, reversed(points))]
+        assert all(map(math.isclose, A.dot(B), expected))
+
+    def test_cross(self):
+        A = vector.Vec3Array(points)
+        axis = vector.vec3(0, 0, 1)
+        assert A.cross(axis).as_vectors() == [p * axis for p in points]
+        assert (A * axis) == A.cross(axis)
+
+    def test_normalised(self):
+        A = vector.Vec3Array(points).normalised()
+        for actual, point in zip(A, points):
+            assert actual == point.normalised()
+
+    def test_rotated(self):
+        A = vector.Vec3Array(points)
+        for angles in [(90, 0, 0), (0, 0, 45), (15, 30, 60)]:
+            assert A.rotated(*angles).as_vectors() == [p.rotated(*angles) for p in points]
+
+    def test_lerp(self):
+        A = vector.Vec3Array(points)
+        B = vector.Vec3Array(reversed(points))
+        expected = [vector.lerp(a, b, 0.25) for a, b in zip(points, reversed(points))]
+        assert A.lerp(B, 0.25).as_vectors() == expected
+
+
+class TestVec2Array:
+    def test_roundtrip(self):
+        uvs = [vector.vec2(i, -i) for i in range(4)]
+        array = vector.Vec2Array(uvs)
+        assert array.as_vectors() == uvs
+
+    def test_bad_length(self):
+        with pytest.raises(ValueError):
+            vector.Vec2Array([(1, 2, 3), (4, 5, 6)])
+        with pytest.raises(ValueError):
+            vector.Vec2Array([(1,), (2, 3, 4)])
+
+    def test_rotated(self):
+        uvs = [vector.vec2(i, 1 - i) for i in range(4)]
+        array = vector.Vec2Array(uvs)
+        assert array.rotated(30).as_vectors() == [uv.rotated(30) for uv in uvs]
+
+    def test_cross(self):
+        array = vector.Vec2Array([(1, 0), (0, 1)])
+        assert list(array.cross((0, 1))) == [1, 0]